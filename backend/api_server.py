@@ -10,16 +10,45 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import json
-from typing import List
-from main import run_hiring_system
+import uuid
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from main import HiringAgentPool, run_hiring_system
+from models.models import EvaluationOptions
 from helper_func.pdf_parser import PDFParser
+from helper_func.llm_client import (
+    circuit_breaker,
+    concurrency_limiter,
+    context_cache,
+    get_response_cache,
+    hedge_policy,
+    key_pool,
+    model_router,
+    prompt_batcher,
+    rate_limiter,
+)
 import time
 from websockets.exceptions import ConnectionClosedError
 
+# Long-lived agent pool shared by every evaluation request
+hiring_pool = HiringAgentPool()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the hiring agents once instead of once per evaluation
+    await hiring_pool.start()
+    try:
+        yield
+    finally:
+        await hiring_pool.stop()
+
+
 app = FastAPI(
     title="Hiring Agent System API",
     description="API to interact with the uAgents-based hiring system.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -86,6 +115,26 @@ async def test_endpoint():
     }
 
 
+@app.get("/health")
+async def health_check():
+    """Agent pool and LLM client state (breaker, limiters, response cache)"""
+    breaker = circuit_breaker.snapshot()
+    cache = get_response_cache()
+    return {
+        "status": "ok" if breaker["state"] == "closed" else "degraded",
+        "agents_ready": hiring_pool.started,
+        "circuit_breaker": breaker,
+        "rate_limiter": rate_limiter.snapshot(),
+        "api_keys": key_pool.snapshot(),
+        "model_routes": model_router.snapshot(),
+        "batching": prompt_batcher.snapshot(),
+        "concurrency": concurrency_limiter.snapshot(),
+        "hedging": hedge_policy.snapshot(),
+        "llm_cache": cache.stats() if cache else None,
+        "context_cache": context_cache.snapshot(),
+    }
+
+
 @app.websocket("/ws/progress")
 async def websocket_endpoint(websocket: WebSocket):
     # wait for the websocket to connect
@@ -118,12 +167,37 @@ async def websocket_endpoint(websocket: WebSocket):
             pass  # Ignore cleanup errors
 
 
+# Form values that turn a triage threshold off
+TRIAGE_OFF = ("off", "none")
+
+
+def _evaluation_options(**fields) -> EvaluationOptions:
+    """EvaluationOptions from the form fields the client set (the rest keep
+    their defaults); raises ValueError for invalid values"""
+    options = {name: value for name, value in fields.items() if value not in (None, "")}
+    for name in ("triage_reject_below", "triage_accept_above"):
+        if str(options.get(name, "")).lower() in TRIAGE_OFF:
+            options[name] = None
+    return EvaluationOptions(**options)
+
+
 @app.post("/evaluate-candidate")
 async def evaluate_candidate(
     candidate_name: str = Form(...),
     job_title: str = Form(...),
     job_description: str = Form(...),
     resume_file: UploadFile = File(...),
+    # Evaluation options: the EvaluationOptions default is used for any
+    # that isn't set; a triage threshold of "off" disables that side
+    mode: Optional[str] = Form(None),
+    debate_mode: Optional[str] = Form(None),
+    min_debate_rounds: Optional[int] = Form(None),
+    max_debate_rounds: Optional[int] = Form(None),
+    triage_reject_below: Optional[str] = Form(None),
+    triage_accept_above: Optional[str] = Form(None),
+    triage_decision: Optional[str] = Form(None),
+    evaluation_id: Optional[str] = Form(None),
+    stream_output: Optional[bool] = Form(None),
 ):
     """Evaluate a candidate using the hiring agent system"""
     print("=" * 60)
@@ -134,6 +208,20 @@ async def evaluate_candidate(
         print(f"📄 Job title: {job_title}")
         print(f"📄 Parsing PDF file: {resume_file.filename}")
 
+        try:
+            options = _evaluation_options(
+                mode=mode,
+                debate_mode=debate_mode,
+                min_debate_rounds=min_debate_rounds,
+                max_debate_rounds=max_debate_rounds,
+                triage_reject_below=triage_reject_below,
+                triage_accept_above=triage_accept_above,
+                triage_decision=triage_decision,
+                stream_output=stream_output,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         # Parse the uploaded PDF
         resume_content = PDFParser.extract_text_from_pdf(await resume_file.read())
 
@@ -147,6 +235,11 @@ async def evaluate_candidate(
 
         print("🚀 Kicking off the hiring agent pipeline and awaiting results...")
 
+        # Correlates the agent messages and progress events of this request.
+        # Passing the ID of a failed or timed out evaluation resumes it from
+        # its last completed stage.
+        evaluation_id = evaluation_id or uuid.uuid4().hex
+
         # Send initial connection event, this is the first message, send out to the client from the server via the websocket
         await manager.send_message(
             {
@@ -155,27 +248,37 @@ async def evaluate_candidate(
                 "message": "Starting hiring evaluation process...",
                 "step": "initialization",
                 "position": "info",
+                "evaluation_id": evaluation_id,
                 "timestamp": time.time(),
             }
         )
 
         # Create event emitter for this request
         async def emit_event(
-            agent_name: str, message: str, step: str, position: str = "info"
+            agent_name: str,
+            message: str,
+            step: str,
+            position: str = "info",
+            event_type: str = "agent_message",
         ):
+            # event_type "agent_delta": more text of a message still being
+            # written (the final agent_message carries the full text);
+            # "agent_reset": the text streamed so far is void (a retry)
             event = {
-                "type": "agent_message",
+                "type": event_type,
                 "agent_name": agent_name,
                 "message": message,
                 "step": step,
                 "position": position,
+                "evaluation_id": evaluation_id,
                 "timestamp": time.time(),
             }
             # send the event to the client via the websocket
             await manager.send_message(event)
-            print(f"📡 Sent WebSocket event: {agent_name} - {message[:50]}...")
+            if event_type == "agent_message":
+                print(f"📡 Sent WebSocket event: {agent_name} - {message[:50]}...")
 
-        # Run the hiring system with fresh agents
+        # Run the hiring system through the shared agent pool
         try:
             result = await run_hiring_system(
                 resume_content=resume_content,
@@ -183,6 +286,9 @@ async def evaluate_candidate(
                 candidate_name=candidate_name,
                 job_title=job_title,
                 event_emitter=emit_event,
+                pool=hiring_pool,
+                evaluation_id=evaluation_id,
+                options=options,
             )
 
             if result:
@@ -198,6 +304,7 @@ async def evaluate_candidate(
                 return {
                     "status": "error",
                     "message": "Failed to complete candidate evaluation",
+                    "evaluation_id": evaluation_id,  # send it back to resume
                 }
         except asyncio.CancelledError:
             # Handle asyncio cancellation gracefully - shield should prevent this
@@ -215,6 +322,9 @@ async def evaluate_candidate(
         # Handle top-level cancellation
         print("⚠️ Request was cancelled")
         return {"status": "error", "message": "Request was cancelled"}
+    except HTTPException:
+        # Bad input (invalid options, unreadable PDF): the client gets the 4xx
+        raise
     except Exception as e:
         print(f"❌ Error in evaluation: {str(e)}")
         # Send error event
@@ -0,0 +1,118 @@
+"""Compare the old regex + json.loads parsing of LLM output with repair_json.
+
+Runs every sample in json_repair_corpus.jsonl (one {"agent", "kind",
+"output"} object per line) through both parsers and reports, per kind of
+output, how many answers each recovers, how many of those still validate
+into the agent's response model, and the time per parse.
+
+    python benchmarks/bench_json_repair.py [corpus.jsonl]
+"""
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import ValidationError
+
+from helper_func.json_repair import repair_json
+from models.models import (
+    DebateResponse,
+    DecisionResponse,
+    IntersectionResponse,
+    JobParseResponse,
+    ResumeParseResponse,
+)
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_repair_corpus.jsonl")
+
+# Response model and the fields the agent fills in itself
+MODELS = {
+    "job_parser": (JobParseResponse, {"job_title": "Engineer"}),
+    "resume_parser": (ResumeParseResponse, {"candidate_name": "Candidate"}),
+    "intersection_evaluator": (IntersectionResponse, {}),
+    "pro_hire_advocate": (DebateResponse, {"position": "pro", "round_number": 1}),
+    "anti_hire_advocate": (DebateResponse, {"position": "anti", "round_number": 1}),
+    "decision_maker": (DecisionResponse, {}),
+}
+REPEAT = 200
+
+
+def legacy_parse(content: str):
+    """The parsing SimpleLLMAgent did before repair_json"""
+    try:
+        content = re.sub(r"^```json\s*|```$", "", content.strip(), flags=re.MULTILINE)
+        return json.loads(content.strip())
+    except (json.JSONDecodeError, KeyError):
+        return {}
+
+
+def repair_parse(content: str):
+    try:
+        return repair_json(content)[0]
+    except ValueError:
+        return {}
+
+
+def validates(agent: str, data) -> bool:
+    model, fields = MODELS[agent]
+    if not isinstance(data, dict):
+        return False
+    try:
+        model.model_validate({**data, **fields})
+        return True
+    except ValidationError:
+        return False
+
+
+def time_parser(parser, outputs) -> float:
+    """Mean microseconds per parse"""
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        for output in outputs:
+            parser(output)
+    return (time.perf_counter() - started) / (REPEAT * len(outputs)) * 1e6
+
+
+def main(path: str):
+    with open(path) as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    by_kind = defaultdict(list)
+    for sample in samples:
+        by_kind[sample["kind"]].append(sample)
+
+    header = f"{'kind':<18}{'n':>4}  {'legacy ok/valid':>16}  {'repair ok/valid':>16}  {'legacy µs':>10}  {'repair µs':>10}"
+    print(header)
+    print("-" * len(header))
+    totals = defaultdict(int)
+    for kind, group in by_kind.items():
+        outputs = [s["output"] for s in group]
+        row = {}
+        for name, parser in (("legacy", legacy_parse), ("repair", repair_parse)):
+            results = [parser(s["output"]) for s in group]
+            row[name + "_ok"] = sum(1 for r in results if r)
+            row[name + "_valid"] = sum(validates(s["agent"], r) for s, r in zip(group, results))
+            row[name + "_us"] = time_parser(parser, outputs)
+            for key in ("ok", "valid"):
+                totals[f"{name}_{key}"] += row[f"{name}_{key}"]
+        print(
+            f"{kind:<18}{len(group):>4}  "
+            f"{row['legacy_ok']:>7}/{row['legacy_valid']:<8}  "
+            f"{row['repair_ok']:>7}/{row['repair_valid']:<8}  "
+            f"{row['legacy_us']:>10.1f}  {row['repair_us']:>10.1f}"
+        )
+
+    print("-" * len(header))
+    print(
+        f"{'total':<18}{len(samples):>4}  "
+        f"{totals['legacy_ok']:>7}/{totals['legacy_valid']:<8}  "
+        f"{totals['repair_ok']:>7}/{totals['repair_valid']:<8}"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else CORPUS)
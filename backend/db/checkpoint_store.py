@@ -0,0 +1,106 @@
+import os
+import json
+import sqlite3
+import time
+from typing import Dict, Any
+
+# Default location, next to the other local agent state
+DEFAULT_CHECKPOINT_PATH = os.getenv(
+    "HIRING_CHECKPOINT_DB",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "agent_data",
+        "checkpoints.db",
+    ),
+)
+
+
+class CheckpointStore:
+    """Local SQLite store for the completed stage responses of evaluations.
+
+    Every finished stage (parses, intersection, each debate argument, the
+    decision) is saved under its evaluation ID, so an evaluation that timed
+    out or whose process died can be resumed without redoing that LLM work.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Open (or create) the checkpoint database
+
+        Args:
+            path: SQLite file (defaults to HIRING_CHECKPOINT_DB or
+                agent_data/checkpoints.db)
+        """
+        self.path = path or DEFAULT_CHECKPOINT_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stage_checkpoints (
+                evaluation_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (evaluation_id, stage)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def save(self, evaluation_id: str, stage: str, payload: Dict[str, Any]):
+        """
+        Save (or replace) the output of one stage
+
+        Args:
+            evaluation_id: Evaluation the stage belongs to
+            stage: Stage key, e.g. "job_parse" or "pro:2"
+            payload: JSON-serialisable stage output
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO stage_checkpoints VALUES (?, ?, ?, ?)",
+            (evaluation_id, stage, json.dumps(payload), time.time()),
+        )
+        self.conn.commit()
+
+    def load(self, evaluation_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get all saved stage outputs of an evaluation
+
+        Args:
+            evaluation_id: Evaluation to load
+
+        Returns:
+            Dict of stage key -> stage output (empty if nothing was saved)
+        """
+        rows = self.conn.execute(
+            "SELECT stage, payload FROM stage_checkpoints WHERE evaluation_id = ?",
+            (evaluation_id,),
+        ).fetchall()
+        return {stage: json.loads(payload) for stage, payload in rows}
+
+    def delete(self, evaluation_id: str):
+        """Drop all checkpoints of an evaluation"""
+        self.conn.execute(
+            "DELETE FROM stage_checkpoints WHERE evaluation_id = ?", (evaluation_id,)
+        )
+        self.conn.commit()
+
+    def prune(self, max_age: float) -> int:
+        """
+        Drop checkpoints older than max_age seconds
+
+        Returns:
+            Number of deleted stage checkpoints
+        """
+        cursor = self.conn.execute(
+            "DELETE FROM stage_checkpoints WHERE created_at < ?",
+            (time.time() - max_age,),
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
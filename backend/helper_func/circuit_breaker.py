@@ -0,0 +1,78 @@
+import time
+from typing import Dict
+
+
+class CircuitBreaker:
+    """Fails calls fast while a provider is degraded.
+
+    States:
+        "closed": calls go through; ``failure_threshold`` consecutive
+            failures open the circuit.
+        "open": calls are refused for ``reset_timeout`` seconds.
+        "half_open": after the timeout one trial call is let through; its
+            success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_started_at = None  # set while the half-open trial call runs
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def retry_in(self) -> float:
+        """Seconds until the next trial call is allowed (0 unless open)"""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open":
+            # One trial at a time (a trial that never reported back, e.g. was
+            # cancelled, is given up after reset_timeout)
+            now = time.monotonic()
+            if self.trial_started_at is None or now - self.trial_started_at > self.reset_timeout:
+                self.trial_started_at = now
+                return True
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.trial_started_at is not None or self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self.trial_started_at = None
+
+    def record_neutral(self):
+        """A call ended without showing whether the API is healthy (e.g. a
+        429): a half-open trial is over, so the next call may be the trial"""
+        self.trial_started_at = None
+
+    def snapshot(self) -> Dict:
+        """Current state, for health checks"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": round(self.retry_in(), 1),
+            "times_opened": self.times_opened,
+        }
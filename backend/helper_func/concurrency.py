@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class _StageLatency:
+    """Smoothed and baseline latency of one stage's calls"""
+
+    def __init__(self):
+        self.samples = 0
+        self.smoothed = None
+        self.baseline = None
+
+    def record(self, latency: float, decay: float):
+        self.samples += 1
+        if self.smoothed is None:
+            self.smoothed = self.baseline = latency
+            return
+        self.smoothed = 0.8 * self.smoothed + 0.2 * latency
+        if self.smoothed < self.baseline:
+            self.baseline = self.smoothed
+        else:
+            self.baseline += decay * (self.smoothed - self.baseline)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on the number of LLM calls in flight.
+
+    The window grows additively (by about one call per window's worth of
+    healthy responses) while calls succeed at normal latency, and is cut
+    multiplicatively when the provider pushes back: a 429, an overload or
+    a timeout, or latency well above the usual for that kind of call.
+    Callers over the window wait in arrival order.
+
+    Latency is tracked per stage, since a decision call normally takes
+    several times as long as a parse. Each stage's baseline follows its
+    lowest smoothed latency but drifts back up (``baseline_decay``), so
+    one unusually fast call doesn't make every later one look congested.
+    A stage needs ``min_samples`` calls before its latency counts.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 8,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        backoff: float = 0.5,
+        latency_tolerance: float = 3.0,
+        baseline_decay: float = 0.02,
+        min_samples: int = 5,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        # Latency above latency_tolerance x the baseline counts as congestion
+        self.latency_tolerance = latency_tolerance
+        self.baseline_decay = baseline_decay
+        self.min_samples = min_samples
+
+        self.in_flight = 0
+        self._waiters = deque()
+        self._latency: Dict[str, _StageLatency] = {}
+        self._last_decrease = 0.0
+
+        # Metrics
+        self.increases = 0
+        self.decreases = 0
+
+    async def acquire(self):
+        """Wait for a free slot in the window"""
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Got a slot just as we were cancelled: hand it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free now and nobody is waiting"""
+        if self._waiters or self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def cancel(self):
+        """Give back a slot that was taken but not used for a call"""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def release(self, latency: float, overloaded: bool = False, stage: Optional[str] = None):
+        """Free a slot and adapt the window to how the call went"""
+        self.in_flight -= 1
+
+        stats = self._latency.setdefault(stage or "default", _StageLatency())
+        slow = (
+            stats.samples >= self.min_samples
+            and latency > self.latency_tolerance * stats.baseline
+        )
+        stats.record(latency, self.baseline_decay)
+
+        congested = overloaded or slow
+        now = time.monotonic()
+        if congested:
+            # Cut at most once per round trip, so a burst of failures from
+            # one window doesn't collapse it to the minimum
+            if now - self._last_decrease > stats.smoothed:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+        elif self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.increases += 1
+
+        self._wake()
+
+    def snapshot(self) -> Dict:
+        """Current window and load, for health checks"""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "latency": {
+                stage: {"smoothed": stats.smoothed, "baseline": stats.baseline}
+                for stage, stats in self._latency.items()
+            },
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+from helper_func.token_budget import estimate_tokens
+
+# ".../v1beta/models/gemini-2.0-flash:generateContent" -> API base and model
+_MODEL_URL = re.compile(r"^(.*?)/(models/[^/:]+):")
+
+
+def split_model_url(api_url: str) -> Optional[Tuple[str, str]]:
+    """(API base URL, "models/<name>") of a generateContent URL, None if it
+    doesn't look like one"""
+    match = _MODEL_URL.match(api_url or "")
+    return (match.group(1), match.group(2)) if match else None
+
+
+class ContextCacheRegistry:
+    """Local registry of Gemini ``cachedContents`` handles.
+
+    A prompt prefix shared by many calls (e.g. the intersection analysis
+    every debate turn starts with) is uploaded once, and later calls refer
+    to the handle instead of re-sending the text. Handles are keyed on a
+    hash of the model, API key and text. A handle's TTL is extended when
+    it is used with less than half of it left, so a prefix in active use
+    never expires. Gemini rejects prefixes under a minimum size, so shorter ones
+    aren't cached; a prefix whose upload failed isn't retried until
+    ``failure_ttl`` has passed.
+    """
+
+    def __init__(self, ttl: float = 600, min_tokens: int = 1024, failure_ttl: float = 300):
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self.failure_ttl = failure_ttl
+
+        self._handles: Dict[str, list] = {}  # key -> [name, expires_at]
+        self._failed: Dict[str, float] = {}  # key -> monotonic time to retry at
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        # Metrics
+        self.created = 0
+        self.hits = 0
+        self.refreshed = 0
+        self.failures = 0
+
+    async def handle(
+        self, session: aiohttp.ClientSession, api_url: str, api_key: str, text: str
+    ) -> Optional[str]:
+        """Name of a cachedContents entry holding ``text``, created on first
+        use; None if the text is too short or caching failed"""
+        target = split_model_url(api_url)
+        if target is None or estimate_tokens(text) < self.min_tokens:
+            return None
+
+        # Entries belong to the API key's project
+        key = hashlib.sha256(f"{target[1]}\n{api_key}\n{text}".encode()).hexdigest()
+        now = time.monotonic()
+        entry = self._handles.get(key)
+        # Leave a margin so a handle doesn't expire while its call is in flight
+        if entry is not None and entry[1] - now > 30:
+            if entry[1] - now < self.ttl / 2 and not await self._refresh(
+                session, target[0], api_key, entry
+            ):
+                self._handles.pop(key, None)
+            else:
+                self.hits += 1
+                return entry[0]
+        if self._failed.get(key, 0) > now:
+            return None
+
+        # Concurrent calls with the same prefix share one upload
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        name = None
+        try:
+            name = await self._create(session, target, api_key, text)
+        finally:
+            del self._pending[key]
+            future.set_result(name)
+
+        if name is None:
+            self.failures += 1
+            self._failed[key] = time.monotonic() + self.failure_ttl
+        else:
+            self.created += 1
+            self._handles[key] = [name, time.monotonic() + self.ttl]
+        return name
+
+    def invalidate(self, name: str):
+        """Forget a handle Gemini no longer knows (e.g. it expired early)"""
+        for key, entry in list(self._handles.items()):
+            if entry[0] == name:
+                del self._handles[key]
+
+    async def _create(
+        self, session: aiohttp.ClientSession, target: Tuple[str, str], api_key: str, text: str
+    ) -> Optional[str]:
+        api_base, model = target
+        body = {
+            "model": model,
+            "contents": [{"role": "user", "parts": [{"text": text}]}],
+            "ttl": f"{int(self.ttl)}s",
+        }
+        try:
+            async with session.post(
+                f"{api_base}/cachedContents?key={api_key}", json=body, timeout=30
+            ) as response:
+                if response.status != 200:
+                    print(f"⚠️ Context cache: upload failed ({response.status}): {await response.text()}")
+                    return None
+                return (await response.json()).get("name")
+        except Exception as e:
+            print(f"⚠️ Context cache: upload failed: {e}")
+            return None
+
+    async def _refresh(
+        self, session: aiohttp.ClientSession, api_base: str, api_key: str, entry: list
+    ) -> bool:
+        """Extend a handle's TTL; False if Gemini no longer has it"""
+        try:
+            async with session.patch(
+                f"{api_base}/{entry[0]}?key={api_key}&updateMask=ttl",
+                json={"ttl": f"{int(self.ttl)}s"},
+                timeout=30,
+            ) as response:
+                if response.status != 200:
+                    return False
+        except Exception:
+            return False
+        entry[1] = time.monotonic() + self.ttl
+        self.refreshed += 1
+        return True
+
+    def snapshot(self) -> Dict:
+        """Handle counts and hit metrics, for health checks"""
+        return {
+            "handles": len(self._handles),
+            "created": self.created,
+            "hits": self.hits,
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+        }
@@ -0,0 +1,85 @@
+import re
+from typing import List, Optional, Set
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(re.findall(r"[a-z0-9+#]+", text.lower()))
+
+
+def _is_repeat(point: str, earlier: List[Set[str]], similarity: float) -> bool:
+    """True if ``point`` mostly restates one of the earlier key points"""
+    tokens = _tokens(point)
+    if not tokens:
+        return True
+    for other in earlier:
+        if other and len(tokens & other) / len(tokens | other) >= similarity:
+            return True
+    return False
+
+
+class DebateConvergenceDetector:
+    """Decides when the pro/anti debate has stopped producing new information.
+
+    Checked after every completed round (both sides have argued). The debate
+    stops once ``max_rounds`` is reached, or after ``min_rounds`` when:
+    - a side concedes (its confidence drops to ``concede_confidence`` or
+      below), or
+    - both sides converge: at most ``novelty_threshold`` of their latest key
+      points are new and their confidence moved by ``confidence_delta`` or
+      less since the previous round.
+    """
+
+    def __init__(
+        self,
+        min_rounds: int = 1,
+        max_rounds: int = 3,
+        novelty_threshold: float = 0.34,
+        confidence_delta: float = 0.05,
+        concede_confidence: float = 0.3,
+        point_similarity: float = 0.5,
+    ):
+        self.max_rounds = max(1, max_rounds)
+        self.min_rounds = max(1, min(min_rounds, self.max_rounds))
+        self.novelty_threshold = novelty_threshold
+        self.confidence_delta = confidence_delta
+        self.concede_confidence = concede_confidence
+        self.point_similarity = point_similarity
+
+    def novelty(self, arguments: List) -> float:
+        """Share of the latest round's key points not made in earlier rounds"""
+        latest = arguments[-1].key_points
+        if not latest:
+            return 0.0
+        earlier = [_tokens(point) for arg in arguments[:-1] for point in arg.key_points]
+        new_points = [
+            point
+            for point in latest
+            if not _is_repeat(point, earlier, self.point_similarity)
+        ]
+        return len(new_points) / len(latest)
+
+    def _has_converged(self, arguments: List) -> bool:
+        if len(arguments) < 2:
+            return False
+        confidence_change = abs(arguments[-1].confidence - arguments[-2].confidence)
+        return (
+            self.novelty(arguments) <= self.novelty_threshold
+            and confidence_change <= self.confidence_delta
+        )
+
+    def stop_reason(self, pro_arguments: List, anti_arguments: List) -> Optional[str]:
+        """Why the debate should stop now, or None to run another round"""
+        rounds = min(len(pro_arguments), len(anti_arguments))
+        if rounds >= self.max_rounds:
+            return f"reached {self.max_rounds} rounds"
+        if rounds < self.min_rounds:
+            return None
+
+        for side, arguments in (("pro", pro_arguments), ("anti", anti_arguments)):
+            if arguments[-1].confidence <= self.concede_confidence:
+                return f"{side}-hire side conceded (confidence {arguments[-1].confidence:.2f})"
+
+        if self._has_converged(pro_arguments) and self._has_converged(anti_arguments):
+            return "both sides converged (no new key points or confidence change)"
+
+        return None
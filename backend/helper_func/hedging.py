@@ -0,0 +1,66 @@
+from collections import deque
+from typing import Dict, Optional
+
+
+class HedgePolicy:
+    """When to send a duplicate ("hedge") of a slow LLM call.
+
+    A call that hasn't answered after the ``percentile`` of recently seen
+    latencies gets a second copy, and whichever answers first wins. Hedges
+    are capped at ``budget`` of all calls, so the extra cost stays bounded.
+
+    Latencies are kept per stage: a decision call normally takes several
+    times as long as a parse, so one shared window would hedge every
+    decision and never a parse.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget: float = 0.05,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self._latencies: Dict[str, deque] = {}
+
+        # Metrics
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float, stage: Optional[str] = None):
+        """Latency of a successful call of ``stage``"""
+        latencies = self._latencies.get(stage or "default")
+        if latencies is None:
+            latencies = self._latencies[stage or "default"] = deque(maxlen=self.window)
+        latencies.append(latency)
+
+    def _trigger_delay(self, stage: str) -> Optional[float]:
+        latencies = self._latencies.get(stage, ())
+        if len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    def delay(self, stage: Optional[str] = None) -> Optional[float]:
+        """Seconds after which a new call of ``stage`` should be hedged, None
+        while there's too little latency data"""
+        self.calls += 1
+        return self._trigger_delay(stage or "default")
+
+    def allows_hedge(self) -> bool:
+        """Whether the hedge budget allows one more hedge"""
+        return self.hedges + 1 <= self.budget * self.calls
+
+    def snapshot(self) -> Dict:
+        """Hedge volume and current trigger delay, for health checks"""
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "trigger_delay": {stage: self._trigger_delay(stage) for stage in self._latencies},
+        }
@@ -0,0 +1,253 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+_FENCE = re.compile(r"^```(?:json)?\s*|```\s*$", re.MULTILINE)
+_PLAIN = re.compile(r'[^"\\]+')  # string content up to the next quote or escape
+_NUMBER = re.compile(r"-?\d+(?:\.\d*)?(?:[eE][+-]?\d*)?")
+_WORD = re.compile(r"[A-Za-z]+")
+_WHITESPACE = re.compile(r"\s*")
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_LITERALS = {
+    "true": True, "false": False, "null": None,
+    # Python spellings the model sometimes slips into
+    "True": True, "False": False, "None": None,
+}
+
+
+def _join_surrogates(value: str) -> str:
+    """Combine \\uXXXX surrogate pairs into one character and drop a half
+    pair left over from truncation"""
+    return value.encode("utf-16", "surrogatepass").decode("utf-16", "ignore")
+
+
+class _NoValue(Exception):
+    """No usable value at this position (end of input or garbage)"""
+
+
+class _Repairer:
+    """Lenient recursive-descent parse of one JSON value.
+
+    Anything the strict grammar would reject is fixed in the least invasive
+    way: unterminated strings, arrays and objects are closed, trailing
+    commas are dropped and a missing comma between members is assumed. On
+    text that can't be read as JSON at all, parsing stops there and the
+    containers parsed so far are closed, so the result is the longest valid
+    prefix. Every fix is noted against the dotted path of the field it
+    touched.
+    """
+
+    def __init__(self, text: str, start: int):
+        self.text = text
+        self.pos = start
+        self.end = len(text)
+        self.repaired: List[str] = []
+
+    def _note(self, path: str):
+        if path and path not in self.repaired:
+            self.repaired.append(path)
+
+    def _peek(self) -> Optional[str]:
+        self.pos = _WHITESPACE.match(self.text, self.pos).end()
+        return self.text[self.pos] if self.pos < self.end else None
+
+    def _stop(self, path: str):
+        """Give up on the rest of the input"""
+        self._note(path)
+        self.pos = self.end
+
+    def value(self, path: str) -> Any:
+        char = self._peek()
+        if char is None:
+            raise _NoValue
+        if char == "{":
+            return self._object(path)
+        if char == "[":
+            return self._array(path)
+        if char == '"':
+            return self._string(path)
+
+        match = _NUMBER.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            raw = match.group()
+            if self.pos >= self.end:
+                self._note(path)  # may have been cut short
+            cleaned = raw.rstrip("eE+-").rstrip(".")
+            if cleaned != raw:
+                self._note(path)
+            if not cleaned or cleaned == "-":
+                raise _NoValue
+            if cleaned.lstrip("-").isdigit():
+                return int(cleaned)
+            return float(cleaned)
+
+        match = _WORD.match(self.text, self.pos)
+        if match:
+            word = match.group()
+            if word in _LITERALS:
+                self.pos = match.end()
+                if word not in ("true", "false", "null"):
+                    self._note(path)
+                return _LITERALS[word]
+            if match.end() >= self.end:
+                # A literal cut off at the end, e.g. "tru"
+                for literal in ("true", "false", "null"):
+                    if literal.startswith(word):
+                        self.pos = self.end
+                        self._note(path)
+                        return _LITERALS[literal]
+        raise _NoValue
+
+    def _string(self, path: str) -> str:
+        text = self.text
+        self.pos += 1
+        chunks = []
+        surrogates = False
+        while self.pos < self.end:
+            match = _PLAIN.match(text, self.pos)
+            if match:
+                chunks.append(match.group())
+                self.pos = match.end()
+                continue
+            if text[self.pos] == '"':
+                self.pos += 1
+                value = "".join(chunks)
+                return _join_surrogates(value) if surrogates else value
+            escape = text[self.pos + 1:self.pos + 2]
+            if not escape:
+                break
+            if escape == "u":
+                digits = text[self.pos + 2:self.pos + 6]
+                if len(digits) < 4:
+                    break
+                try:
+                    code = int(digits, 16)
+                except ValueError:
+                    chunks.append(digits)
+                else:
+                    chunks.append(chr(code))
+                    surrogates = surrogates or 0xD800 <= code <= 0xDFFF
+                self.pos += 6
+            else:
+                chunks.append(_ESCAPES.get(escape, escape))
+                self.pos += 2
+
+        # Unterminated: the output was cut off inside this string
+        self.pos = self.end
+        self._note(path)
+        value = "".join(chunks)
+        return _join_surrogates(value) if surrogates else value
+
+    def _array(self, path: str) -> list:
+        self.pos += 1
+        items = []
+        comma = False  # a comma follows the last item
+        while True:
+            char = self._peek()
+            if char is None:
+                self._note(path)
+                return items
+            if char == "]":
+                if comma:
+                    self._note(path)  # trailing comma
+                self.pos += 1
+                return items
+            if char == ",":
+                if comma or not items:
+                    self._note(path)  # doubled or leading comma
+                comma = True
+                self.pos += 1
+                continue
+            if items and not comma:
+                self._note(path)  # missing comma
+            try:
+                items.append(self.value(path))
+            except _NoValue:
+                self._stop(path)
+                return items
+            comma = False
+
+    def _object(self, path: str) -> dict:
+        self.pos += 1
+        result = {}
+        comma = False  # a comma follows the last member
+        while True:
+            char = self._peek()
+            if char is None:
+                self._note(path)
+                return result
+            if char == "}":
+                if comma:
+                    self._note(path)  # trailing comma
+                self.pos += 1
+                return result
+            if char == ",":
+                if comma or not result:
+                    self._note(path)  # doubled or leading comma
+                comma = True
+                self.pos += 1
+                continue
+            if char != '"':
+                self._stop(path)
+                return result
+            if result and not comma:
+                self._note(path)  # missing comma
+
+            key = self._string("")
+            if self.pos >= self.end:
+                # Cut off inside (or right after) the key: drop it
+                self._note(path)
+                return result
+            field = f"{path}.{key}" if path else key
+
+            if self._peek() != ":":
+                self._stop(field)
+                return result
+            self.pos += 1
+            try:
+                result[key] = self.value(field)
+            except _NoValue:
+                self._stop(field)
+                return result
+            comma = False
+
+
+def _strip_fences(content: str) -> str:
+    return _FENCE.sub("", content.strip()).strip()
+
+
+def repair_json(content: str) -> Tuple[Any, List[str]]:
+    """Parse LLM output as JSON, repairing it if needed.
+
+    Returns ``(data, repaired_fields)``. Well-formed JSON (with or without
+    a markdown fence) goes through ``json.loads`` and reports no repairs.
+    Otherwise the first JSON object in the text is recovered leniently:
+    prose around it is ignored, a truncated tail is closed and trailing
+    commas are dropped. ``repaired_fields`` lists the dotted paths of the
+    fields that were cut short, dropped or fixed; fixes to the top level
+    object itself (prose, a missing closing brace) aren't listed. Raises
+    ValueError when no object can be recovered.
+    """
+    content = _strip_fences(content)
+    try:
+        return json.loads(content), []
+    except json.JSONDecodeError:
+        pass
+
+    # Prose may contain braces of its own: take the first object that
+    # recovers any fields
+    fallback = None
+    start = content.find("{")
+    while start != -1:
+        repairer = _Repairer(content, start)
+        data = repairer.value("")
+        if data:
+            return data, repairer.repaired
+        if fallback is None:
+            fallback = (data, repairer.repaired)
+        start = content.find("{", start + 1)
+    if fallback is None:
+        raise ValueError("no JSON object found in LLM response")
+    return fallback
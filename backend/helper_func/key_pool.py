@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class _KeyState:
+    """Usage of one API key"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.recent = deque()  # send times within the last minute
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+
+        # Metrics
+        self.requests = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.tokens = 0
+
+    def used_last_minute(self, now: float) -> int:
+        while self.recent and now - self.recent[0] > 60:
+            self.recent.popleft()
+        return len(self.recent)
+
+
+class APIKeyPool:
+    """Spreads LLM calls over several API keys, each with its own quota.
+
+    Every call goes to the key with the most headroom: the fewest requests
+    in the last minute (relative to ``requests_per_minute`` per key, if
+    known), counting calls still in flight. A key that is rate limited
+    (429) cools down for the time the API asked for, or ``cooldown``
+    seconds, and gets no calls until then. When every key is cooling down,
+    callers wait for the first one to come back. A single key only cools
+    down when the API gave a time; otherwise the caller's own backoff
+    decides when to try again.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        requests_per_minute: Optional[float] = None,
+        cooldown: float = 10.0,
+    ):
+        self._keys = [_KeyState(key) for key in dict.fromkeys(k for k in keys if k)]
+        self.requests_per_minute = requests_per_minute
+        self.cooldown = cooldown
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _state(self, key: str) -> Optional[_KeyState]:
+        for state in self._keys:
+            if state.key == key:
+                return state
+        return None
+
+    def _headroom(self, state: _KeyState, now: float) -> float:
+        used = state.used_last_minute(now) + state.in_flight
+        if self.requests_per_minute:
+            return 1.0 - used / self.requests_per_minute
+        return -used
+
+    def ready_in(self) -> float:
+        """Seconds until some key can take a call (0 if one can now)"""
+        if not self._keys:
+            return 0.0
+        now = time.monotonic()
+        return max(0.0, min(state.cooldown_until for state in self._keys) - now)
+
+    async def acquire(self) -> Optional[str]:
+        """Key to send the next call with (None if the pool is empty)"""
+        if not self._keys:
+            return None
+        while True:
+            now = time.monotonic()
+            ready = [state for state in self._keys if state.cooldown_until <= now]
+            if ready:
+                break
+            await asyncio.sleep(min(state.cooldown_until for state in self._keys) - now)
+
+        state = max(ready, key=lambda s: self._headroom(s, now))
+        state.recent.append(now)
+        state.in_flight += 1
+        state.requests += 1
+        return state.key
+
+    def reuse(self, key: Optional[str]):
+        """Count one more call made with ``key`` (e.g. a hedge of a call
+        already sent with it, which must use the same key)"""
+        state = self._state(key)
+        if state is not None:
+            state.recent.append(time.monotonic())
+            state.in_flight += 1
+            state.requests += 1
+
+    def abandon(self, key: Optional[str]):
+        """A call made with ``key`` was given up before it answered, or its
+        answer is reported by another call (see release)"""
+        state = self._state(key)
+        if state is not None:
+            state.in_flight -= 1
+
+    def release(self, key: Optional[str], result: dict, retry_after: Optional[float] = None):
+        """Record how a call made with ``key`` went"""
+        state = self._state(key)
+        if state is None:
+            return
+        state.in_flight -= 1
+        if result["success"]:
+            state.successes += 1
+            state.tokens += result.get("tokens", 0)
+        elif result.get("status") == 429:
+            state.rate_limited += 1
+            if retry_after is None and len(self._keys) == 1:
+                return
+            wait = retry_after if retry_after is not None else self.cooldown
+            state.cooldown_until = max(state.cooldown_until, time.monotonic() + wait)
+            print(f"🧊 API key …{key[-4:]} rate limited, cooling down for {wait:.0f}s")
+        else:
+            state.errors += 1
+
+    def snapshot(self) -> List[Dict]:
+        """Per-key counters (keys shown by their last 4 characters), for
+        health checks"""
+        now = time.monotonic()
+        return [
+            {
+                "key": f"…{state.key[-4:]}",
+                "requests": state.requests,
+                "successes": state.successes,
+                "rate_limited": state.rate_limited,
+                "errors": state.errors,
+                "tokens": state.tokens,
+                "in_flight": state.in_flight,
+                "last_minute": state.used_last_minute(now),
+                "cooling_down_for": max(0.0, state.cooldown_until - now),
+            }
+            for state in self._keys
+        ]
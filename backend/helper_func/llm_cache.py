@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Default on-disk location, next to the other local agent state
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "agent_data",
+    "llm_cache.db",
+)
+
+
+class LLMResponseCache:
+    """Content-addressed cache of LLM responses.
+
+    Responses are keyed on a hash of the model URL, generation config and
+    prompt, so the same prompt (e.g. the same job description parsed for
+    every candidate) is answered without an API call. Lookups check a small
+    in-memory LRU first, then a SQLite file that survives restarts. Entries
+    expire after ``ttl`` seconds; the disk tier keeps at most
+    ``max_disk_entries``, evicting the least recently used. Eviction runs
+    every ``evict_every`` writes rather than on each one, so the disk tier
+    may briefly hold a few entries over the limit.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        max_memory_entries: int = 512,
+        max_disk_entries: int = 10000,
+        ttl: float = 7 * 24 * 60 * 60,
+        evict_every: int = 100,
+    ):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self._puts_since_evict = 0
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created_at, content)
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)"
+        )
+        self.conn.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, config: Dict, prompt: str) -> str:
+        """Hash identifying one request"""
+        raw = json.dumps([model, config, prompt], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _remember(self, key: str, created_at: float, content: str):
+        self._memory[key] = (created_at, content)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response content, or None"""
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, content = entry
+            if now - created_at < self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return content
+            del self._memory[key]
+
+        row = self.conn.execute(
+            "SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            content, created_at = row
+            if now - created_at < self.ttl:
+                self.conn.execute(
+                    "UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key)
+                )
+                self.conn.commit()
+                self._remember(key, created_at, content)
+                self.disk_hits += 1
+                return content
+            self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self.conn.commit()
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, content: str):
+        """Store a response in both tiers"""
+        now = time.time()
+        self._remember(key, now, content)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+            (key, content, now, now),
+        )
+        self._puts_since_evict += 1
+        if self._puts_since_evict >= self.evict_every:
+            self._puts_since_evict = 0
+            self._evict(now)
+        self.conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries and the least recently used ones over the limit"""
+        self.conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_disk_entries:
+            self.conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_used LIMIT ?
+                )
+                """,
+                (count - self.max_disk_entries,),
+            )
+
+    def clear(self):
+        """Drop every cached response"""
+        self._memory.clear()
+        self.conn.execute("DELETE FROM llm_cache")
+        self.conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        (disk_entries,) = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries,
+        }
@@ -1,11 +1,31 @@
 
 import aiohttp
+import asyncio
 import ssl
 import json
+import random
 import re
 import os
-from typing import Dict
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type
 from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from helper_func.llm_cache import LLMResponseCache
+from helper_func.circuit_breaker import CircuitBreaker
+from helper_func.rate_limiter import RateLimiter
+from helper_func.concurrency import AdaptiveConcurrencyLimiter
+from helper_func.hedging import HedgePolicy
+from helper_func.partial_json import PartialJSONParser
+from helper_func.json_repair import repair_json
+from helper_func.response_schema import response_schema
+from helper_func.token_budget import estimate_tokens
+from helper_func.context_cache import ContextCacheRegistry
+from helper_func.key_pool import APIKeyPool
+from helper_func.model_router import ModelRouter
+from helper_func.micro_batcher import PromptBatcher
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +33,194 @@ load_dotenv()
 # Gemini API configuration from environment variables
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_API_URL = os.getenv("GEMINI_API_URL")
+# Comma-separated keys to spread calls over (defaults to GEMINI_API_KEY)
+GEMINI_API_KEYS = [
+    key.strip() for key in os.getenv("GEMINI_API_KEYS", "").split(",") if key.strip()
+] or [GEMINI_API_KEY]
+
+# Connection pool of the HTTP session shared by all LLM agents in a process
+HTTP_POOL_LIMIT = int(os.getenv("LLM_HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("LLM_HTTP_POOL_LIMIT_PER_HOST", "32"))
+HTTP_DNS_CACHE_TTL = 300  # seconds
+HTTP_KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept open
+
+# Responses are cached (helper_func.llm_cache) unless LLM_CACHE=off
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "on").lower() not in ("0", "off", "false")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")  # defaults to agent_data/llm_cache.db
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 60 * 60)))
+
+# Retries of rate limited (429), failed (5xx) and timed out calls, with
+# jittered exponential backoff unless the API says how long to wait
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY = 1.0  # seconds
+LLM_RETRY_MAX_DELAY = 20.0  # longer waits are not retried
+
+# Seconds one API call may take: LLM_REQUEST_TIMEOUT, or longer for an
+# answer that may be long (e.g. a batch), at LLM_OUTPUT_TOKENS_PER_SECOND
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+LLM_OUTPUT_TOKENS_PER_SECOND = float(os.getenv("LLM_OUTPUT_TOKENS_PER_SECOND", "100"))
+
+# Shared by all agents in the process: after repeated failures calls fail
+# fast until Gemini recovers
+circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+)
+
+# Requests and tokens per minute all agents in the process may use (0 means
+# no limit); callers queue in arrival order once the budget is used up
+rate_limiter = RateLimiter(
+    requests_per_minute=float(os.getenv("LLM_RPM", "0")),
+    tokens_per_minute=float(os.getenv("LLM_TPM", "0")),
+)
+
+# Each call goes to the key with the most headroom; a rate limited key cools
+# down (kept under LLM_RETRY_MAX_DELAY, so a rate limited call still retries).
+# LLM_KEY_RPM is the per-key request quota, if known (LLM_RPM above is the
+# total for the process)
+key_pool = APIKeyPool(
+    GEMINI_API_KEYS,
+    requests_per_minute=float(os.getenv("LLM_KEY_RPM", "0")) or None,
+    cooldown=min(float(os.getenv("LLM_KEY_COOLDOWN", "10")), LLM_RETRY_MAX_DELAY),
+)
+
+# Model of each pipeline stage (LLM_MODELS_<ROUTE>, see model_router); a
+# call slower than LLM_ROUTE_SLOW_SECONDS counts against its model
+model_router = ModelRouter(
+    GEMINI_API_URL, slow_after=float(os.getenv("LLM_ROUTE_SLOW_SECONDS", "20"))
+)
+
+# How many calls may be in flight at once, adapted (AIMD) to how Gemini copes
+concurrency_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=float(os.getenv("LLM_CONCURRENCY_INITIAL", "8")),
+    max_limit=float(os.getenv("LLM_CONCURRENCY_MAX", "64")),
+)
+
+# Hedging (off unless LLM_HEDGE=on): a call slower than the given percentile
+# of recent latencies gets a duplicate, the first answer wins
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE", "off").lower() in ("1", "on", "true")
+hedge_policy = HedgePolicy(
+    percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+    budget=float(os.getenv("LLM_HEDGE_BUDGET", "0.05")),
+)
+
+# Context caching (off with LLM_CONTEXT_CACHE=off): a prompt context shared
+# by many calls is uploaded to Gemini once (cachedContents) and referenced
+LLM_CONTEXT_CACHE_ENABLED = os.getenv("LLM_CONTEXT_CACHE", "on").lower() not in ("0", "off", "false")
+context_cache = ContextCacheRegistry(
+    ttl=float(os.getenv("LLM_CONTEXT_CACHE_TTL", "600")),
+    min_tokens=int(os.getenv("LLM_CONTEXT_CACHE_MIN_TOKENS", "1024")),
+)
+
+# Micro-batching (off unless LLM_BATCH=on): compatible calls made within
+# LLM_BATCH_WINDOW_MS of each other are sent as one multi-item prompt. A
+# batch's answers are capped so it fits the 45s stage timeouts
+LLM_BATCH_ENABLED = os.getenv("LLM_BATCH", "off").lower() in ("1", "on", "true")
+prompt_batcher = PromptBatcher(
+    window=float(os.getenv("LLM_BATCH_WINDOW_MS", "50")) / 1000,
+    max_items=int(os.getenv("LLM_BATCH_MAX_ITEMS", "8")),
+    max_output_tokens=int(os.getenv("LLM_BATCH_MAX_OUTPUT_TOKENS", "4096")),
+)
+
+SYSTEM_PROMPT = "You are a specialized AI agent for hiring analysis. Provide clear, structured responses in valid JSON format."
+
+# One HTTP session per event loop, as a session only works on the loop it
+# was created on
+_http_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+_closing_sessions = set()  # close tasks of sessions left by ended loops
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """HTTP session of the running event loop, created on first use.
+
+    Reusing it keeps connections to Gemini alive between calls, so only the
+    first call pays for the TCP and TLS handshake. Sessions of loops that
+    have been closed are closed here, so their connectors don't leak.
+    """
+    loop = asyncio.get_running_loop()
+    session = _http_sessions.get(loop)
+    if session is None or session.closed:
+        for old_loop, old_session in list(_http_sessions.items()):
+            if old_loop.is_closed():
+                del _http_sessions[old_loop]
+                if not old_session.closed:
+                    task = loop.create_task(old_session.close())
+                    _closing_sessions.add(task)
+                    task.add_done_callback(_closing_sessions.discard)
+
+        # Create SSL context to bypass certificate verification
+        # SSL is encrption from the server to the client
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        connector = aiohttp.TCPConnector(
+            ssl=ssl_context,
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        session = _http_sessions[loop] = aiohttp.ClientSession(connector=connector)
+    return session
+
+
+_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Process-wide LLM response cache, None if caching is disabled"""
+    global _response_cache
+
+    if LLM_CACHE_ENABLED and _response_cache is None:
+        _response_cache = LLMResponseCache(LLM_CACHE_PATH, ttl=LLM_CACHE_TTL)
+    return _response_cache
+
+
+def _retry_after(response: aiohttp.ClientResponse, error_text: str) -> Optional[float]:
+    """Seconds the API asked us to wait, from Retry-After or Gemini's RetryInfo"""
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(header)
+                return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    match = re.search(r'"retryDelay":\s*"(\d+(?:\.\d+)?)s"', error_text)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def _request_timeout(max_output_tokens: int) -> float:
+    """Seconds to wait for an answer of up to ``max_output_tokens``"""
+    return max(LLM_REQUEST_TIMEOUT, max_output_tokens / LLM_OUTPUT_TOKENS_PER_SECOND)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2**attempt))
+
+
+async def close_http_session():
+    """Close every HTTP session (call on shutdown)"""
+    loop = asyncio.get_running_loop()
+    for session_loop, session in list(_http_sessions.items()):
+        del _http_sessions[session_loop]
+        if session.closed:
+            continue
+        if session_loop is loop or session_loop.is_closed():
+            await session.close()
+        else:
+            # Still running (in another thread): close it on its own loop
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(session.close(), session_loop)
+            )
+    if _closing_sessions:
+        await asyncio.gather(*_closing_sessions, return_exceptions=True)
 
 
 class SimpleLLMAgent:
@@ -20,79 +228,443 @@ class SimpleLLMAgent:
 
     def __init__(self, name: str):
         self.name = name
-        self.api_key = GEMINI_API_KEY
-        self.api_url = GEMINI_API_URL
 
-    async def query_llm(self, prompt: str) -> dict:
-        """Query Gemini API with a prompt and get response"""
+    async def query_llm(
+        self,
+        prompt: str,
+        use_cache: bool = True,
+        on_delta: Optional[Callable[[str, str], Awaitable]] = None,
+        response_model: Optional[Type[BaseModel]] = None,
+        agent_fields: Tuple[str, ...] = (),
+        max_output_tokens: int = 1800,
+        context: Optional[str] = None,
+        stage: Optional[str] = None,
+        schema: Optional[Dict] = None,
+        batch: bool = True,
+        latency_key: Optional[str] = None,
+    ) -> dict:
+        """Query Gemini API with a prompt and get response
+
+        Identical requests are answered from the response cache; pass
+        use_cache=False to always call the API (the new answer is still cached).
+        An answer to a schema-constrained call is only cached once the
+        agent has validated it (see cache_result), so an answer that fails
+        to parse is never served again.
+        With on_delta the answer is streamed: on_delta(field, text) is awaited
+        with new text of each top-level string field of the JSON answer as it
+        is generated; if a call that already streamed text is retried,
+        on_delta(field, None) is awaited first for each such field, as the
+        text sent so far is void. With response_model, Gemini must answer
+        with JSON matching that model's schema, minus agent_fields (the
+        fields the agent sets itself); see parse_model. max_output_tokens caps the
+        answer (see helper_func.token_budget for the per-stage caps).
+
+        ``context`` is static text shared by many calls (e.g. the analysis
+        every debate turn is about). It is sent ahead of the prompt, so
+        those calls share a prefix, and is uploaded to Gemini's context
+        cache once instead of being re-sent (see helper_func.context_cache).
+
+        ``stage`` (e.g. "job_parse") picks the models that serve the call,
+        falling back to the next model of its route when one is failing
+        or slow (see helper_func.model_router).
+
+        With batching on, a call with a response_model that neither streams
+        nor has a context may be answered as part of a batch of similar
+        calls (see helper_func.micro_batcher); batch=False sends it alone.
+        ``schema`` is a ready-made responseSchema, used instead of
+        response_model's. ``latency_key`` is the key the call's latency is
+        tracked under for congestion and hedging (default ``stage``); a
+        batch takes longer than a single call, so it has its own.
+
+        A successful result carries "usage": the input and output tokens the
+        call used (none when answered from the response cache).
+        """
         headers = {
             "Content-Type": "application/json",
         }
 
-        # Gemini API uses contents format and combines system + user prompts
-        full_prompt = "You are a specialized AI agent for hiring analysis. Provide clear, structured responses in valid JSON format.\n\n" + prompt
+        # Gemini API uses contents format and combines system + user prompts.
+        # Static text goes first, so calls sharing a context share a prefix
+        prefix = SYSTEM_PROMPT if context is None else f"{SYSTEM_PROMPT}\n\n{context}"
+        full_prompt = f"{prefix}\n\n{prompt}"
+        inline_contents = [{"parts": [{"text": full_prompt}]}]
 
         payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {"text": full_prompt}
-                    ]
-                }
-            ],
+            "contents": inline_contents,
             "generationConfig": {
                 "temperature": 0.3,
-                "maxOutputTokens": 1800,
+                "maxOutputTokens": max_output_tokens,
             }
         }
+        if schema is None and response_model is not None:
+            schema = response_schema(response_model, agent_fields)
+        if schema is not None:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+            payload["generationConfig"]["responseSchema"] = schema
+
+        route = model_router.route(stage)
+        latency_key = latency_key or stage
+        cache = get_response_cache()
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(
+                route.primary_url, payload["generationConfig"], full_prompt
+            )
+            if use_cache:
+                content = cache.get(cache_key)
+                if content is not None:
+                    print(f"💾 {self.name}: Answered from response cache")
+                    return {"success": True, "content": content, "cached": True}
+
+        if (
+            batch
+            and LLM_BATCH_ENABLED
+            and response_model is not None
+            and on_delta is None
+            and context is None
+        ):
+            result = await prompt_batcher.submit(
+                self, prompt, response_model, agent_fields, max_output_tokens, stage
+            )
+            if result["success"]:
+                result = {**result, "cache_key": cache_key}
+            return result
+
+        # Reserve room for the longest answer; corrected to the real usage after
+        estimated_tokens = (
+            estimate_tokens(full_prompt) + payload["generationConfig"]["maxOutputTokens"]
+        )
+
+        streamed = set()  # fields the current attempt has streamed text of
+        if on_delta is not None:
+            caller_on_delta = on_delta
+
+            async def on_delta(field: str, text: str):
+                streamed.add(field)
+                await caller_on_delta(field, text)
+
+        use_context_cache = context is not None and LLM_CONTEXT_CACHE_ENABLED
+        failed_models = []
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            # A retried stream starts over
+            for field in streamed:
+                await caller_on_delta(field, None)
+            streamed.clear()
+
+            # Before taking rate budget, which a call that isn't made would waste
+            if not circuit_breaker.allow():
+                print(f"⛔ {self.name}: Circuit open, not calling Gemini")
+                return {
+                    "success": False,
+                    "content": f"Circuit open: Gemini is failing, retry in {circuit_breaker.retry_in():.0f}s",
+                    "retryable": False,
+                }
+
+            waited = await rate_limiter.acquire(estimated_tokens)
+            if waited >= 0.1:
+                print(f"⏳ {self.name}: Waited {waited:.1f}s for the rate limit")
+
+            api_key = await key_pool.acquire()
+            model = route.pick(exclude=failed_models)
+            model_url = route.url(model)
+            if model != route.models[0]:
+                print(f"🔀 {self.name}: Using fallback model {model}")
+
+            # Context cache entries belong to the key's project
+            cached_content = None
+            if use_context_cache:
+                cached_content = await context_cache.handle(
+                    get_http_session(), model_url, api_key, prefix
+                )
+            if cached_content is not None:
+                payload["cachedContent"] = cached_content
+                payload["contents"] = [{"role": "user", "parts": [{"text": prompt}]}]
+            else:
+                payload.pop("cachedContent", None)
+                payload["contents"] = inline_contents
+
+            await concurrency_limiter.acquire()
+            started = time.monotonic()
+            result, retry_after = None, None
+            try:
+                result, retry_after = await self._post_hedged(
+                    model_url, headers, payload, estimated_tokens, api_key, on_delta, latency_key
+                )
+            finally:
+                latency = time.monotonic() - started
+                concurrency_limiter.release(
+                    latency,
+                    overloaded=result is not None and result.get("overloaded", False),
+                    stage=latency_key,
+                )
+                key_pool.release(api_key, result or {"success": False}, retry_after)
+                route.record(model, latency, result or {"success": False})
+            # Failed calls don't use up the token quota
+            rate_limiter.adjust_tokens(result.get("tokens", 0) - estimated_tokens)
+            if result["success"]:
+                circuit_breaker.record_success()
+                if schema is None:
+                    if cache is not None:
+                        cache.put(cache_key, result["content"])
+                else:
+                    # Cached by the caller once the answer has been validated
+                    result["cache_key"] = cache_key
+                return result
+
+            if not result["retryable"]:
+                # The API answered (e.g. 400), so it isn't degraded
+                circuit_breaker.record_success()
+                if (
+                    "cachedContent" in payload
+                    and result.get("status") in (400, 403, 404)
+                    and attempt < LLM_MAX_RETRIES
+                ):
+                    # The context cache entry is gone: resend the context inline
+                    print(f"🗑️ {self.name}: Cached context unavailable, sending it inline")
+                    context_cache.invalidate(payload["cachedContent"])
+                    use_context_cache = False
+                    continue
+                return result
+
+            if result.get("status") == 429:
+                # Quota, not an outage: the next attempt goes to another
+                # key right away if one is free, else backs off as usual.
+                # A half-open trial ends without a verdict
+                circuit_breaker.record_neutral()
+                if attempt == LLM_MAX_RETRIES:
+                    return result
+                if len(key_pool) > 1 and key_pool.ready_in() == 0:
+                    print(f"🔑 {self.name}: Rate limited, retrying with another API key")
+                    continue
+                delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+                delay = max(delay, key_pool.ready_in())
+                if delay > LLM_RETRY_MAX_DELAY:
+                    return result
+                print(f"🔑 {self.name}: Rate limited, retrying in {delay:.1f}s (attempt {attempt + 2})")
+                await asyncio.sleep(delay)
+                continue
 
+            circuit_breaker.record_failure()
+            failed_models.append(model)
+            if len(set(failed_models)) < len(route.models):
+                # Another model of the route can take the retry right away
+                delay = 0.0
+            else:
+                delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+            if attempt == LLM_MAX_RETRIES or delay > LLM_RETRY_MAX_DELAY:
+                return result
+
+            print(f"🔁 {self.name}: Retrying in {delay:.1f}s (attempt {attempt + 2})")
+            await asyncio.sleep(delay)
+
+    async def _post_hedged(
+        self,
+        url: str,
+        headers: dict,
+        payload: dict,
+        estimated_tokens: int,
+        api_key: str,
+        on_delta=None,
+        latency_key: Optional[str] = None,
+    ) -> Tuple[dict, Optional[float]]:
+        """Make one API call, hedged with a duplicate if it runs slow.
+
+        The caller accounts for the call with the winning answer. A hedge
+        takes its own concurrency slot, rate budget and key usage (it goes
+        to the same key, which any cached context belongs to), and gives
+        back its reserved tokens when it ends: the answer it may have won
+        with is charged to the call.
+        """
+
+        async def timed_post():
+            started = time.monotonic()
+            outcome = await self._post(url, headers, payload, api_key, on_delta)
+            if outcome[0]["success"]:
+                hedge_policy.record(time.monotonic() - started, latency_key)
+            return outcome
+
+        async def hedge_post():
+            started = time.monotonic()
+            result, retry_after = None, None
+            try:
+                result, retry_after = await timed_post()
+                return result, retry_after
+            finally:
+                if result is None:
+                    # Cancelled once the call was answered: its short life
+                    # says nothing about latency
+                    concurrency_limiter.cancel()
+                else:
+                    concurrency_limiter.release(
+                        time.monotonic() - started,
+                        overloaded=result.get("overloaded", False),
+                        stage=latency_key,
+                    )
+                if result is None or result["success"]:
+                    key_pool.abandon(api_key)
+                else:
+                    key_pool.release(api_key, result, retry_after)
+                rate_limiter.adjust_tokens(-estimated_tokens)
+
+        # Streamed calls aren't hedged (both copies would stream their text)
+        delay = hedge_policy.delay(latency_key) if LLM_HEDGE_ENABLED and on_delta is None else None
+        primary = asyncio.create_task(timed_post())
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                # The hedge costs budget, quota and a concurrency slot; skip
+                # it if any is short
+                if (
+                    not done
+                    and hedge_policy.allows_hedge()
+                    and concurrency_limiter.try_acquire()
+                ):
+                    if rate_limiter.try_acquire(estimated_tokens):
+                        hedge_policy.hedges += 1
+                        key_pool.reuse(api_key)
+                        print(f"🪃 {self.name}: No answer after {delay:.1f}s, hedging")
+                        tasks.add(asyncio.create_task(hedge_post()))
+                    else:
+                        concurrency_limiter.cancel()
+
+            # First successful answer wins (a failure only if both fail)
+            while True:
+                done, pending = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    tasks.discard(task)
+                    outcome = task.result()
+                    if outcome[0]["success"] or not tasks:
+                        if task is not primary:
+                            hedge_policy.hedge_wins += 1
+                        return outcome
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _post(
+        self, url: str, headers: dict, payload: dict, api_key: str, on_delta=None
+    ) -> Tuple[dict, Optional[float]]:
+        """Make one API call; returns the result and the requested retry delay"""
         # Gemini API key goes in the URL
-        api_url_with_key = f"{self.api_url}?key={self.api_key}"
+        if on_delta is not None:
+            # Streaming endpoint, answering with server-sent events
+            stream_url = url.replace(":generateContent", ":streamGenerateContent")
+            api_url_with_key = f"{stream_url}?alt=sse&key={api_key}"
+        else:
+            api_url_with_key = f"{url}?key={api_key}"
 
         try:
             print(f"🔗 {self.name}: Querying Gemini API")
 
-            # Create SSL context to bypass certificate verification
-            # SSL is encrption from the server to the client
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.post(
-                    api_url_with_key, headers=headers, json=payload, timeout=30
-                ) as response:
-                    if response.status == 200:
+            session = get_http_session()
+            timeout = _request_timeout(payload["generationConfig"]["maxOutputTokens"])
+            async with session.post(
+                api_url_with_key, headers=headers, json=payload, timeout=timeout
+            ) as response:
+                if response.status == 200:
+                    if on_delta is not None:
+                        content, usage = await self._read_stream(response, on_delta)
+                    else:
                         result = await response.json()
                         # Gemini response format: candidates[0].content.parts[0].text
                         content = result["candidates"][0]["content"]["parts"][0]["text"]
-                        return {
-                            "success": True,
-                            "content": content,
-                        }
-                    else:
-                        error_text = await response.text()
-                        print(
-                            f"❌ {self.name}: API Error {response.status}: {error_text}"
-                        )
-                        return {
-                            "success": False,
-                            "content": f"API Error {response.status}: {error_text}",
-                        }
+                        usage = result.get("usageMetadata", {})
+                    input_tokens = usage.get(
+                        "promptTokenCount", estimate_tokens(json.dumps(payload["contents"]))
+                    )
+                    output_tokens = usage.get(
+                        "candidatesTokenCount", estimate_tokens(content)
+                    )
+                    return {
+                        "success": True,
+                        "content": content,
+                        "tokens": usage.get("totalTokenCount", input_tokens + output_tokens),
+                        "usage": {
+                            "input_tokens": input_tokens,
+                            "output_tokens": output_tokens,
+                            # Part of input_tokens served from the context cache
+                            "cached_tokens": usage.get("cachedContentTokenCount", 0),
+                        },
+                    }, None
+                else:
+                    error_text = await response.text()
+                    print(
+                        f"❌ {self.name}: API Error {response.status}: {error_text}"
+                    )
+                    return {
+                        "success": False,
+                        "content": f"API Error {response.status}: {error_text}",
+                        "status": response.status,
+                        # Rate limits and server errors may pass on a retry
+                        "retryable": response.status == 429
+                        or response.status >= 500,
+                        "overloaded": response.status in (429, 503, 504),
+                    }, _retry_after(response, error_text)
         except Exception as e:
             print(f"💥 {self.name}: Error querying Gemini: {e}")
-            return {"success": False, "content": f"Request Error: {str(e)}"}
+            return {
+                "success": False,
+                "content": f"Request Error: {str(e)}",
+                "retryable": True,
+                "overloaded": isinstance(e, asyncio.TimeoutError),
+            }, None
+
+    async def _read_stream(self, response: aiohttp.ClientResponse, on_delta):
+        """Collect a streamed answer, passing string field deltas to on_delta"""
+        parser = PartialJSONParser()
+        parts = []
+        usage = {}
+        async for line in response.content:
+            line = line.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            chunk = json.loads(line[len("data:"):])
+            usage = chunk.get("usageMetadata", usage)
+            candidates = chunk.get("candidates") or [{}]
+            text = "".join(
+                part.get("text", "")
+                for part in candidates[0].get("content", {}).get("parts", [])
+            )
+            parts.append(text)
+            for event, field, value in parser.feed(text):
+                if event == "delta":
+                    await on_delta(field, value)
+        return "".join(parts), usage
+
+    def cache_result(self, result: dict):
+        """Store an answer the agent has validated in the response cache"""
+        cache = get_response_cache()
+        if cache is not None and result.get("cache_key") is not None:
+            cache.put(result["cache_key"], result["content"])
+
+    def parse_model(self, content: str, model: Type[BaseModel], **fields) -> BaseModel:
+        """Validate a JSON answer into ``model``; ``fields`` are the values the
+        agent sets itself (a dict value fills in fields of a nested object).
+        Slightly malformed or truncated JSON is repaired rather than
+        re-requested. Raises ValueError if the answer doesn't fit."""
+        data = self._repair(content)
+        if not isinstance(data, dict):
+            raise ValueError("LLM answer is not a JSON object")
+        for name, value in fields.items():
+            if isinstance(value, dict) and isinstance(data.get(name), dict):
+                value = {**data[name], **value}
+            data[name] = value
+        return model.model_validate(data)
 
     def parse_json_response(self, content: str) -> Dict:
-        """Parse JSON response from LLM, handling markdown formatting"""
+        """Parse JSON response from LLM, handling markdown formatting and
+        repairing malformed JSON where possible"""
         try:
-            # Remove markdown code blocks if present
-            content = re.sub(
-                r"^```json\s*|```$", "", content.strip(), flags=re.MULTILINE
-            )
-            content = content.strip()
-            return json.loads(content)
-        except (json.JSONDecodeError, KeyError) as e:
+            return self._repair(content)
+        except ValueError as e:
             print(f"❌ {self.name}: JSON parsing error: {e}")
             return {}
+
+    def _repair(self, content: str):
+        data, repaired = repair_json(content)
+        if repaired:
+            print(f"🩹 {self.name}: Repaired JSON fields: {', '.join(repaired)}")
+        return data
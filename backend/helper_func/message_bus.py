@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+from uagents import Agent
+from uagents_core.models import Model
+
+
+class BusContext:
+    """Stand-in for the uAgents Context handed to handlers run by the bus.
+
+    Handlers in this project only use ``ctx.logger`` and ``ctx.send``, so
+    that's what the bus provides.
+    """
+
+    def __init__(self, bus: "LocalMessageBus", agent: Agent):
+        self._bus = bus
+        self._agent = agent
+
+    @property
+    def logger(self) -> logging.Logger:
+        return self._agent._logger
+
+    async def send(self, destination: str, message: BaseModel, timeout: int = None):
+        await self._bus.send(self._agent, destination, message)
+
+
+class LocalMessageBus:
+    """In-process transport for agents that run in the same process.
+
+    Messages go straight into the destination agent's asyncio queue as model
+    objects and are handled by the agent's existing Protocol handlers, which
+    skips envelope signing, the JSON round trip and schema validation of the
+    uAgents dispatcher path. Destinations that are not on the bus (e.g.
+    agents deployed on their own) are still reached through uAgents.
+    """
+
+    def __init__(self, workers_per_agent: int = 16):
+        self.workers_per_agent = workers_per_agent
+        self._agents: Dict[str, Agent] = {}
+        self._handlers: Dict[str, Dict[str, object]] = {}  # address -> digest -> handler
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._digests: Dict[type, str] = {}
+        self.delivered = 0
+        self.forwarded = 0
+
+    def attach(self, agent: Agent):
+        """Put an agent on the bus (its handlers are looked up once here)"""
+        handlers = {}
+        for protocol in agent.protocols.values():
+            handlers.update(protocol.signed_message_handlers)
+            handlers.update(protocol.unsigned_message_handlers)
+
+        self._agents[agent.address] = agent
+        self._handlers[agent.address] = handlers
+        self._queues[agent.address] = asyncio.Queue()
+
+    def context_for(self, agent: Agent) -> BusContext:
+        """Context for sending messages on behalf of an attached agent"""
+        return BusContext(self, agent)
+
+    def _digest(self, message: BaseModel) -> str:
+        model_class = type(message)
+        if model_class not in self._digests:
+            self._digests[model_class] = Model.build_schema_digest(model_class)
+        return self._digests[model_class]
+
+    async def send(self, sender: Agent, destination: str, message: BaseModel):
+        """Queue a message for an attached agent, or forward it through uAgents"""
+        queue = self._queues.get(destination)
+        if queue is None:
+            self.forwarded += 1
+            await sender._build_context().send(destination, message)
+            return
+        queue.put_nowait((sender.address, message))
+
+    async def _worker(self, address: str):
+        """Hand queued messages to the agent's handlers, one at a time"""
+        agent = self._agents[address]
+        handlers = self._handlers[address]
+        queue = self._queues[address]
+        ctx = self.context_for(agent)
+
+        while True:
+            sender, message = await queue.get()
+            handler = handlers.get(self._digest(message))
+            if handler is None:
+                agent._logger.warning(
+                    f"No handler for {type(message).__name__} on {agent.name}"
+                )
+                continue
+
+            self.delivered += 1
+            try:
+                await handler(ctx, sender, message)
+            except Exception as ex:
+                agent._logger.exception(f"Exception in message handler: {ex}")
+
+    async def start(self):
+        """Run the agents' startup handlers and start the delivery workers"""
+        for address, agent in self._agents.items():
+            await agent.run_startup_tasks()
+            for _ in range(self.workers_per_agent):
+                self._tasks.append(asyncio.create_task(self._worker(address)))
+
+    async def stop(self):
+        """Cancel the delivery workers"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def pending(self, address: Optional[str] = None) -> int:
+        """Number of queued, not yet handled messages (for one agent or all)"""
+        if address is not None:
+            return self._queues[address].qsize()
+        return sum(queue.qsize() for queue in self._queues.values())
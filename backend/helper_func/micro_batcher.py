@@ -0,0 +1,255 @@
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from helper_func.json_repair import repair_json
+from helper_func.response_schema import response_schema
+
+BATCH_INSTRUCTIONS = """Answer each of the {count} requests below on its own, as if it were the only one: never mix up their contents.
+Return "answers" with exactly one answer per request, in the same order, each with "request" set to the number of the request it answers."""
+
+
+class _BatchItem:
+    """One caller waiting for its share of a batch"""
+
+    def __init__(self, agent, prompt: str, max_output_tokens: int):
+        self.agent = agent
+        self.prompt = prompt
+        self.max_output_tokens = max_output_tokens
+        self.future = asyncio.get_running_loop().create_future()
+
+    def resolve(self, result: dict):
+        """Hand the result to the caller, unless it gave up waiting"""
+        if not self.future.done():
+            self.future.set_result(result)
+
+
+class _BatchGroup:
+    """Compatible calls collected during one window"""
+
+    def __init__(self, stage: Optional[str], response_model: Type[BaseModel], agent_fields: Tuple[str, ...]):
+        self.stage = stage
+        self.response_model = response_model
+        self.agent_fields = agent_fields
+        self.items: List[_BatchItem] = []
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(item.max_output_tokens for item in self.items)
+
+
+def batch_schema(item_schema: Dict) -> Dict:
+    """responseSchema of a batch: the answers to its requests, each tagged
+    with the number of the request it answers"""
+    item = {
+        **item_schema,
+        "properties": {"request": {"type": "INTEGER"}, **item_schema["properties"]},
+        "required": ["request", *item_schema["required"]],
+        "propertyOrdering": ["request", *item_schema["propertyOrdering"]],
+    }
+    return {
+        "type": "OBJECT",
+        "properties": {"answers": {"type": "ARRAY", "items": item}},
+        "required": ["answers"],
+        "propertyOrdering": ["answers"],
+    }
+
+
+def batch_prompt(prompts: List[str]) -> str:
+    """One prompt asking for the answers to all ``prompts``"""
+    sections = [BATCH_INSTRUCTIONS.format(count=len(prompts))]
+    for number, prompt in enumerate(prompts, start=1):
+        sections.append(f"### Request {number}\n{prompt.strip()}")
+    return "\n\n".join(sections)
+
+
+def split_answers(content: str, count: int) -> List[Optional[Dict]]:
+    """Answer of each request of a batch (None where it is missing).
+
+    Only an answer tagged with a valid request number that no other answer
+    claims is used; an untagged answer, or two answers for one request,
+    can't be matched to a caller safely, so those requests get None.
+    """
+    data, _ = repair_json(content)
+    answers = data.get("answers") if isinstance(data, dict) else None
+    if not isinstance(answers, list):
+        raise ValueError("Batch answer has no answers list")
+
+    tagged: Dict[int, List[Dict]] = {}
+    for answer in answers:
+        if not isinstance(answer, dict):
+            continue
+        number = answer.pop("request", None)
+        if isinstance(number, int) and 1 <= number <= count:
+            tagged.setdefault(number, []).append(answer)
+
+    split: List[Optional[Dict]] = [None] * count
+    for number, matches in tagged.items():
+        if len(matches) == 1:
+            split[number - 1] = matches[0]
+    return split
+
+
+def _fits(model: Type[BaseModel], answer: Dict, agent_fields: Tuple[str, ...]) -> bool:
+    """Whether ``answer`` validates as ``model``, apart from the fields the
+    agent fills in itself"""
+    try:
+        model.model_validate(answer)
+    except ValidationError as e:
+        return all(
+            error["type"] == "missing"
+            and ".".join(str(part) for part in error["loc"]) in agent_fields
+            for error in e.errors()
+        )
+    return True
+
+
+class PromptBatcher:
+    """Packs compatible LLM calls made at about the same time into one.
+
+    Calls for the same stage and response model that arrive within
+    ``window`` seconds of the first are sent as a single prompt listing
+    every request, with a response schema asking for one answer per
+    request; each caller gets its own answer back. Under load (e.g. twenty
+    resume parses at once) this trades a little latency for far fewer
+    requests against the rate limit. A batch is sent early once it holds
+    ``max_items`` calls or their answers would pass ``max_output_tokens``.
+    A batch of one is sent as a normal call. A caller whose answer is
+    missing, ambiguous or doesn't fit the response model is retried on
+    its own.
+    """
+
+    def __init__(self, window: float = 0.05, max_items: int = 8, max_output_tokens: int = 4096):
+        self.window = window
+        self.max_items = max_items
+        self.max_output_tokens = max_output_tokens
+        self._groups: Dict[tuple, _BatchGroup] = {}
+        self._tasks = set()  # keeps the send tasks from being garbage collected
+
+        # Metrics
+        self.batches = 0
+        self.batched_calls = 0
+        self.single_calls = 0
+        self.fallbacks = 0
+
+    async def submit(
+        self,
+        agent,
+        prompt: str,
+        response_model: Type[BaseModel],
+        agent_fields: Tuple[str, ...],
+        max_output_tokens: int,
+        stage: Optional[str],
+    ) -> dict:
+        """Result of ``agent.query_llm`` for this prompt, possibly answered
+        as part of a batch"""
+        key = (stage, response_model, tuple(agent_fields))
+        group = self._groups.get(key)
+        if group is not None and group.output_tokens + max_output_tokens > self.max_output_tokens:
+            self._send(key)
+            group = None
+        if group is None:
+            group = self._groups[key] = _BatchGroup(stage, response_model, tuple(agent_fields))
+            self._spawn(self._send_after_window(key, group))
+
+        item = _BatchItem(agent, prompt, max_output_tokens)
+        group.items.append(item)
+        if len(group.items) >= self.max_items:
+            self._send(key)
+        return await item.future
+
+    async def _send_after_window(self, key: tuple, group: _BatchGroup):
+        await asyncio.sleep(self.window)
+        if self._groups.get(key) is group:
+            self._send(key)
+
+    def _send(self, key: tuple):
+        group = self._groups.pop(key)
+        self._spawn(self._run(group))
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group: _BatchGroup):
+        try:
+            if len(group.items) == 1:
+                self.single_calls += 1
+                await self._run_single(group, group.items[0])
+            else:
+                await self._run_batch(group)
+        except Exception as e:
+            for item in group.items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+
+    async def _run_single(self, group: _BatchGroup, item: _BatchItem):
+        result = await item.agent.query_llm(
+            item.prompt,
+            use_cache=False,
+            response_model=group.response_model,
+            agent_fields=group.agent_fields,
+            max_output_tokens=item.max_output_tokens,
+            stage=group.stage,
+            batch=False,
+        )
+        item.resolve(result)
+
+    async def _run_batch(self, group: _BatchGroup):
+        items = group.items
+        agent = items[0].agent
+        print(f"📦 {agent.name}: Sending {len(items)} {group.stage or 'LLM'} calls as one batch")
+        self.batches += 1
+        self.batched_calls += len(items)
+
+        result = await agent.query_llm(
+            batch_prompt([item.prompt for item in items]),
+            use_cache=False,
+            schema=batch_schema(response_schema(group.response_model, group.agent_fields)),
+            max_output_tokens=group.output_tokens,
+            stage=group.stage,
+            batch=False,
+            # Batches are slower than single calls; kept apart so neither
+            # skews the other's latency baseline
+            latency_key=f"{group.stage or 'default'}:batch",
+        )
+        if not result["success"]:
+            # query_llm already retried; every caller shares the failure
+            for item in items:
+                item.resolve(result)
+            return
+
+        try:
+            answers = split_answers(result["content"], len(items))
+        except ValueError as e:
+            print(f"⚠️ {agent.name}: Could not split batch answer ({e}), sending calls one by one")
+            answers = [None] * len(items)
+
+        # Each caller is billed an even share of the batch's tokens
+        usage = result.get("usage", {})
+        share = {name: count // len(items) for name, count in usage.items()}
+        retry = []
+        for item, answer in zip(items, answers):
+            if answer is None or not _fits(group.response_model, answer, group.agent_fields):
+                retry.append(item)
+            else:
+                item.resolve({"success": True, "content": json.dumps(answer), "usage": share})
+
+        if retry:
+            self.fallbacks += len(retry)
+            await asyncio.gather(*(self._run_single(group, item) for item in retry))
+
+    def snapshot(self) -> Dict:
+        """Batch counts, for health checks"""
+        return {
+            "window_ms": self.window * 1000,
+            "max_items": self.max_items,
+            "batches": self.batches,
+            "batched_calls": self.batched_calls,
+            "single_calls": self.single_calls,
+            "fallbacks": self.fallbacks,
+            "pending": sum(len(group.items) for group in self._groups.values()),
+        }
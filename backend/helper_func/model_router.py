@@ -0,0 +1,183 @@
+import os
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+from helper_func.circuit_breaker import CircuitBreaker
+from helper_func.context_cache import split_model_url
+
+# Route of each pipeline stage: extraction is simple structured output, the
+# intersection and decision need the stronger model
+STAGE_ROUTES = {
+    "job_parse": "extraction",
+    "resume_parse": "extraction",
+    "intersection": "reasoning",
+    "debate": "debate",
+    "decision": "reasoning",
+    "fused": "reasoning",
+}
+
+# USD per million (input, output) tokens, for cost reporting; a model not
+# listed here is reported without a cost
+MODEL_PRICES = {
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+class _ModelStats:
+    """Calls, latency and tokens of one model on one route"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=200)
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def snapshot(self, model: str) -> Dict:
+        ordered = sorted(self.latencies)
+        prices = MODEL_PRICES.get(model)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "avg_latency": sum(ordered) / len(ordered) if ordered else None,
+            "p95_latency": ordered[int(0.95 * (len(ordered) - 1))] if ordered else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": (
+                (self.input_tokens * prices[0] + self.output_tokens * prices[1]) / 1e6
+                if prices
+                else None
+            ),
+        }
+
+
+class ModelRoute:
+    """Ordered models serving one route: the first is preferred, the others
+    are fallbacks.
+
+    Every model has its own circuit breaker. Failed calls, and calls slower
+    than ``slow_after`` seconds, count against it, so a model that keeps
+    erroring or stalling is skipped until its breaker lets a trial call
+    through again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        models: Sequence[str],
+        api_url: str,
+        slow_after: float = 20.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+    ):
+        self.name = name
+        self.models = list(models)
+        self.slow_after = slow_after
+        self._urls = {model: _model_url(api_url, model) for model in self.models}
+        self._breakers = {
+            model: CircuitBreaker(failure_threshold, reset_timeout) for model in self.models
+        }
+        self._stats = {model: _ModelStats() for model in self.models}
+        self.fallbacks = 0
+
+    @property
+    def primary_url(self) -> str:
+        return self._urls[self.models[0]]
+
+    def pick(self, exclude: Sequence[str] = ()) -> str:
+        """Model for the next call: the first healthy one not in ``exclude``
+        (models that already failed this call), else the primary"""
+        for model in self.models:
+            if model not in exclude and self._breakers[model].allow():
+                if model != self.models[0]:
+                    self.fallbacks += 1
+                return model
+        return self.models[0]
+
+    def url(self, model: str) -> str:
+        return self._urls[model]
+
+    def record(self, model: str, latency: float, result: dict):
+        """How a call to ``model`` went"""
+        stats = self._stats[model]
+        stats.calls += 1
+        if result["success"]:
+            stats.latencies.append(latency)
+            usage = result.get("usage", {})
+            stats.input_tokens += usage.get("input_tokens", 0)
+            stats.output_tokens += usage.get("output_tokens", 0)
+        else:
+            stats.failures += 1
+
+        breaker = self._breakers[model]
+        if result.get("status") == 429:
+            # Quota on our side, not a failing model: left to the key pool
+            breaker.record_neutral()
+            return
+
+        if result["success"] and latency <= self.slow_after:
+            breaker.record_success()
+        elif result["success"] or result.get("retryable", False):
+            # Slow, or failing in a way another model might not (a 400 would
+            # fail on any model)
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def snapshot(self) -> Dict:
+        """Per-model health, latency, tokens and cost, for health checks"""
+        return {
+            "fallbacks": self.fallbacks,
+            "models": {
+                model: {
+                    "state": self._breakers[model].state,
+                    **self._stats[model].snapshot(model),
+                }
+                for model in self.models
+            },
+        }
+
+
+def _model_url(api_url: str, model: str) -> str:
+    """``api_url`` with its model replaced by ``model``"""
+    parts = split_model_url(api_url)
+    if parts is None:
+        return api_url
+    return f"{parts[0]}/models/{model}:generateContent"
+
+
+class ModelRouter:
+    """Routes each pipeline stage to the models configured for it.
+
+    LLM_MODELS_<ROUTE> (e.g. LLM_MODELS_EXTRACTION="gemini-2.0-flash-lite,
+    gemini-2.0-flash") lists a route's models, preferred first. A route
+    without models, and any call without a stage, uses the model of
+    GEMINI_API_URL.
+    """
+
+    def __init__(self, api_url: str, slow_after: float = 20.0):
+        parts = split_model_url(api_url)
+        default_model = parts[1][len("models/"):] if parts else "default"
+        self.default = ModelRoute("default", [default_model], api_url, slow_after)
+        self.routes: Dict[str, ModelRoute] = {}
+        for route in sorted(set(STAGE_ROUTES.values())):
+            models = _env_models(f"LLM_MODELS_{route.upper()}")
+            if models and parts:
+                self.routes[route] = ModelRoute(route, models, api_url, slow_after)
+
+    def route(self, stage: Optional[str]) -> ModelRoute:
+        return self.routes.get(STAGE_ROUTES.get(stage), self.default)
+
+    def snapshot(self) -> Dict:
+        return {
+            name: route.snapshot()
+            for name, route in [("default", self.default), *self.routes.items()]
+        }
+
+
+def _env_models(name: str) -> List[str]:
+    return [model.strip() for model in os.getenv(name, "").split(",") if model.strip()]
@@ -0,0 +1,151 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class PartialJSONParser:
+    """Incremental parser for a JSON object that arrives in chunks.
+
+    Only the top level is tracked: ``feed`` returns
+    ("delta", key, text) for new characters of a top-level string value as
+    they arrive, and ("field", key, value) once a top-level value is
+    complete. Anything before the opening brace (e.g. a ```json fence) is
+    skipped.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.started = False
+        self.done = False
+
+        self._depth = 0
+        self._expect = "key"  # key, colon, value, in_value, comma
+        self._key = None
+        self._token: List[str] = []  # raw text of the current key or value
+
+        self._in_string = False
+        self._escape = False
+        self._unicode = None  # hex digits of a pending \uXXXX escape
+        self._reading_key = False
+        self._streaming = False  # current string is a top-level value
+        self._delta: List[str] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        events = []
+        for char in chunk:
+            self._step(char, events)
+        self._flush(events)
+        return events
+
+    def _flush(self, events: list):
+        if self._delta:
+            events.append(("delta", self._key, "".join(self._delta)))
+            self._delta = []
+
+    def _complete(self, events: list):
+        raw = "".join(self._token).strip()
+        self._token = []
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        self.fields[self._key] = value
+        events.append(("field", self._key, value))
+
+    def _step(self, char: str, events: list):
+        if self.done:
+            return
+        if not self.started:
+            if char == "{":
+                self.started = True
+                self._depth = 1
+            return
+
+        if self._in_string:
+            self._string_char(char, events)
+            return
+
+        if self._expect == "key":
+            if char == '"':
+                self._in_string = True
+                self._reading_key = True
+                self._token = [char]
+            elif char == "}":
+                self.done = True
+        elif self._expect == "colon":
+            if char == ":":
+                self._expect = "value"
+        elif self._expect == "value":
+            if char.isspace():
+                return
+            self._token = [char]
+            self._expect = "in_value"
+            if char == '"':
+                self._in_string = True
+                self._streaming = True
+            elif char in "{[":
+                self._depth += 1
+        elif self._expect == "in_value":
+            if self._depth == 1 and char in ",}":
+                # End of a number, true/false or null
+                self._complete(events)
+                self._expect = "key"
+                self.done = char == "}"
+                return
+            self._token.append(char)
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._complete(events)
+                    self._expect = "comma"
+        elif self._expect == "comma":
+            if char == ",":
+                self._expect = "key"
+            elif char == "}":
+                self.done = True
+
+    def _string_char(self, char: str, events: list):
+        self._token.append(char)
+
+        if self._unicode is not None:
+            self._unicode += char
+            if len(self._unicode) == 4:
+                if self._streaming:
+                    try:
+                        self._delta.append(chr(int(self._unicode, 16)))
+                    except ValueError:
+                        pass
+                self._unicode = None
+            return
+        if self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode = ""
+            elif self._streaming:
+                self._delta.append(_ESCAPES.get(char, char))
+            return
+        if char == "\\":
+            self._escape = True
+            return
+
+        if char == '"':
+            self._in_string = False
+            if self._reading_key:
+                self._reading_key = False
+                self._key = json.loads("".join(self._token))
+                self._token = []
+                self._expect = "colon"
+            elif self._streaming:
+                self._streaming = False
+                self._flush(events)
+                self._complete(events)
+                self._expect = "comma"
+            return
+
+        if self._streaming:
+            self._delta.append(char)
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+
+class StageFailed(Exception):
+    """A stage raised an error or ran past its timeout"""
+
+    def __init__(self, stage: str, error: BaseException):
+        self.stage = stage
+        self.error = error
+        detail = "timed out" if isinstance(error, asyncio.TimeoutError) else str(error)
+        super().__init__(f"Stage '{stage}' failed: {detail}")
+
+
+class Stage:
+    """One step of a pipeline.
+
+    Args:
+        name: Unique stage name (also the key of its result and timing)
+        run: Coroutine function called with the arguments given to
+            Pipeline.run; its return value is stored as the stage result
+        depends_on: Stages that must finish (or be skipped) first
+        timeout: Seconds the stage may run, None for no limit; or a function
+            (same arguments as ``run``) returning them, for stages whose
+            length depends on the run
+        concurrency: How many runs of this stage may execute at once across
+            all pipeline runs, None for no limit
+        when: Optional predicate (same arguments as ``run``); the stage is
+            skipped when it returns False
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[..., Awaitable],
+        depends_on: Iterable[str] = (),
+        timeout: Union[float, Callable[..., Optional[float]], None] = None,
+        concurrency: Optional[int] = None,
+        when: Optional[Callable[..., bool]] = None,
+    ):
+        self.name = name
+        self.run = run
+        self.depends_on = list(depends_on)
+        self.timeout = timeout
+        self.when = when
+        self.semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+
+class PipelineRun:
+    """Results and per-stage timings of one pipeline run"""
+
+    def __init__(self):
+        self.results: Dict[str, object] = {}
+        self.timings: Dict[str, float] = {}  # seconds spent running each stage
+        self.waits: Dict[str, float] = {}  # seconds spent waiting for a slot
+        self.skipped: List[str] = []
+
+
+class Pipeline:
+    """Runs stages as a DAG: every stage starts as soon as all of its
+    dependencies are done, so independent stages run in parallel.
+    """
+
+    def __init__(self, stages: Iterable[Stage] = ()):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: Stage):
+        """Add a stage (its dependencies must already be in the pipeline)"""
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage '{stage.name}'")
+        for dependency in stage.depends_on:
+            if dependency not in self.stages:
+                raise ValueError(
+                    f"Stage '{stage.name}' depends on unknown stage '{dependency}'"
+                )
+        self.stages[stage.name] = stage
+
+    async def _run_stage(self, stage: Stage, run: PipelineRun, args) -> None:
+        if stage.when is not None and not stage.when(*args):
+            run.skipped.append(stage.name)
+            return
+
+        queued = time.perf_counter()
+        if stage.semaphore is not None:
+            await stage.semaphore.acquire()
+        started = time.perf_counter()
+        run.waits[stage.name] = started - queued
+        timeout = stage.timeout(*args) if callable(stage.timeout) else stage.timeout
+        try:
+            run.results[stage.name] = await asyncio.wait_for(
+                stage.run(*args), timeout=timeout
+            )
+        except Exception as e:
+            raise StageFailed(stage.name, e) from e
+        finally:
+            run.timings[stage.name] = time.perf_counter() - started
+            if stage.semaphore is not None:
+                stage.semaphore.release()
+
+    async def run(self, *args) -> PipelineRun:
+        """Run all stages; the first failing stage cancels the others and raises"""
+        run = PipelineRun()
+        remaining = dict(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+        done = set()
+
+        try:
+            while remaining or running:
+                for name, stage in list(remaining.items()):
+                    if all(dependency in done for dependency in stage.depends_on):
+                        del remaining[name]
+                        task = asyncio.create_task(self._run_stage(stage, run, args))
+                        running[task] = name
+
+                finished, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    name = running.pop(task)
+                    task.result()  # re-raise the stage's error
+                    done.add(name)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return run
@@ -0,0 +1,78 @@
+from typing import List, Tuple
+
+from helper_func.token_budget import STAGE_BUDGETS, fit_sections
+
+# Tokens the job and resume analyses may take; they are the whole input of
+# the intersection stage
+ANALYSES_CONTEXT_TOKENS = STAGE_BUDGETS["intersection"].input_tokens
+# Tokens the intersection analysis may take; it can't be longer than the
+# intersection stage's answer, so it is only cut if that cap is raised
+INTERSECTION_CONTEXT_TOKENS = STAGE_BUDGETS["intersection"].output_tokens
+
+
+def analyses_context(job_analysis, resume_analysis) -> Tuple[str, List[str]]:
+    """The job and resume analyses the intersection prompt starts with.
+
+    The debate and decision context (see evaluation_context) starts with
+    exactly the same text, so all of an evaluation's calls after parsing
+    share a prefix. The skill lists drive the evaluation; the prose is cut
+    first. Returns the text and the names of the sections that were cut to
+    fit ANALYSES_CONTEXT_TOKENS.
+    """
+    fitted, truncated = fit_sections(
+        {
+            "job_analysis": (job_analysis.analysis, 1),
+            "key_requirements": ("; ".join(job_analysis.key_requirements), 1),
+            "resume_analysis": (resume_analysis.analysis, 1),
+            "key_achievements": ("; ".join(resume_analysis.key_achievements), 1),
+            "required_skills": (", ".join(job_analysis.required_skills), 2),
+            "preferred_skills": (", ".join(job_analysis.preferred_skills), 2),
+            "skills": (", ".join(resume_analysis.skills), 2),
+        },
+        ANALYSES_CONTEXT_TOKENS,
+    )
+    text = (
+        "Job Analysis:\n"
+        f"{fitted['job_analysis']}\n"
+        f"Required Skills: {fitted['required_skills']}\n"
+        f"Preferred Skills: {fitted['preferred_skills']}\n"
+        f"Experience Level: {job_analysis.experience_level}\n"
+        f"Key Requirements: {fitted['key_requirements']}\n"
+        "\n"
+        "Resume Analysis:\n"
+        f"{fitted['resume_analysis']}\n"
+        f"Skills: {fitted['skills']}\n"
+        f"Experience: {resume_analysis.experience_years} years ({resume_analysis.experience_level})\n"
+        f"Key Achievements: {fitted['key_achievements']}"
+    )
+    return text, truncated
+
+
+def evaluation_context(job_analysis, resume_analysis, intersection) -> Tuple[str, List[str]]:
+    """The analyses the debate and decision prompts start with.
+
+    Every debate turn and the decision of an evaluation get exactly the same
+    text, so it can be passed to query_llm as ``context`` and cached once per
+    evaluation: the job and resume analyses followed by the intersection
+    analysis, which together usually reach the size Gemini will cache.
+    Returns the text and the names of the sections that were cut.
+    """
+    analyses, truncated = analyses_context(job_analysis, resume_analysis)
+    fitted, cut = fit_sections(
+        {
+            "analysis": (intersection.analysis, 1),
+            "skill_matches": (", ".join(intersection.skill_matches), None),
+            "skill_gaps": (", ".join(intersection.skill_gaps), None),
+        },
+        INTERSECTION_CONTEXT_TOKENS,
+    )
+    text = (
+        f"{analyses}\n"
+        "\n"
+        "Intersection Analysis:\n"
+        f"{fitted['analysis']}\n"
+        f"Overall Compatibility: {intersection.overall_compatibility}\n"
+        f"Skill Matches: {fitted['skill_matches']}\n"
+        f"Skill Gaps: {fitted['skill_gaps']}"
+    )
+    return text, truncated + cut
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class _Bucket:
+    """Token bucket refilled continuously up to ``capacity`` per minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0  # refill per second
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 if it already is)"""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget shared by all callers.
+
+    Callers wait in one FIFO queue (asyncio.Lock wakes waiters in order), so
+    under load every request is served in arrival order instead of failing
+    with a 429. A limit of None or 0 disables that budget.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.requests = _Bucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = _Bucket(tokens_per_minute) if tokens_per_minute else None
+
+        self._lock = None
+        self._lock_loop = None
+
+        # Metrics
+        self.acquired = 0
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _queue(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Wait until one request with ``tokens`` fits the budget; returns seconds waited"""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._queue():
+                while True:
+                    now = time.monotonic()
+                    delay = 0.0
+                    for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                        if bucket is not None:
+                            bucket.refill(now)
+                            delay = max(delay, bucket.wait_time(amount))
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+
+                if self.requests is not None:
+                    self.requests.level -= 1
+                if self.tokens is not None:
+                    self.tokens.level -= min(tokens, self.tokens.capacity)
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """Take budget for one request only if nobody is queued and it fits now"""
+        if self.waiting or (self._lock is not None and self._lock.locked()):
+            return False
+        now = time.monotonic()
+        for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                if bucket.wait_time(amount) > 0:
+                    return False
+
+        if self.requests is not None:
+            self.requests.level -= 1
+        if self.tokens is not None:
+            self.tokens.level -= min(tokens, self.tokens.capacity)
+        self.acquired += 1
+        return True
+
+    def adjust_tokens(self, delta: int):
+        """Charge (or refund, if negative) tokens once the real usage is known"""
+        if self.tokens is not None:
+            self.tokens.refill(time.monotonic())
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level - delta)
+
+    def snapshot(self) -> Dict:
+        """Budgets and queue wait metrics, for health checks"""
+        return {
+            "requests_per_minute": self.requests.capacity if self.requests else None,
+            "tokens_per_minute": self.tokens.capacity if self.tokens else None,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait": self.max_wait,
+        }
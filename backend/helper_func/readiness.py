@@ -0,0 +1,24 @@
+from uagents import Context, Protocol
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.models import ReadinessCheck, ReadinessAck
+
+
+def create_readiness_protocol(agent_name: str) -> Protocol:
+    """Protocol that answers the coordinator's readiness handshake.
+
+    An agent only replies once its message loop is running, so an ack means
+    the agent can take work (this replaces fixed startup sleeps).
+    """
+    protocol = Protocol(name=f"{agent_name}_readiness_protocol", version="1.0")
+
+    @protocol.on_message(model=ReadinessCheck, replies=ReadinessAck)
+    async def handle_readiness_check(ctx: Context, sender: str, msg: ReadinessCheck):
+        """Acknowledge a readiness check"""
+        await ctx.send(sender, ReadinessAck(agent_name=agent_name, nonce=msg.nonce))
+
+    return protocol
@@ -0,0 +1,72 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple, Type
+
+from pydantic import BaseModel
+
+# Set by the agents and coordinator, never by the LLM
+ENVELOPE_FIELDS = ("evaluation_id", "error", "usage")
+
+
+def response_schema(model: Type[BaseModel], exclude: Tuple[str, ...] = ()) -> Dict:
+    """Gemini responseSchema for the fields of ``model`` the LLM fills in.
+
+    ``exclude`` names the fields the agent sets itself (e.g. job_title, or
+    "job_analysis.job_title" for a field of a nested model); the envelope
+    fields are always left out, at every level.
+    """
+    return _response_schema(model, tuple(exclude))
+
+
+@lru_cache(maxsize=None)
+def _response_schema(model: Type[BaseModel], exclude: Tuple[str, ...]) -> Dict:
+    schema = model.model_json_schema()
+    converted = _convert(schema, schema.get("$defs", {}))
+    for path in exclude:
+        _drop(converted, path.split("."))
+    return converted
+
+
+def _drop(node: Dict, path: List[str]):
+    """Remove the field at ``path`` from a converted object schema"""
+    for name in path[:-1]:
+        node = node.get("properties", {}).get(name, {})
+    name = path[-1]
+    if name in node.get("properties", {}):
+        del node["properties"][name]
+        node["required"] = [field for field in node["required"] if field != name]
+        node["propertyOrdering"] = [field for field in node["propertyOrdering"] if field != name]
+
+
+def _convert(node: Dict, defs: Dict) -> Dict:
+    """Translate a pydantic JSON schema node to Gemini's OpenAPI subset"""
+    if "$ref" in node:
+        return _convert(defs[node["$ref"].split("/")[-1]], defs)
+
+    nullable = False
+    if "anyOf" in node:
+        variants = [v for v in node["anyOf"] if v.get("type") != "null"]
+        nullable = len(variants) < len(node["anyOf"])
+        node = {**variants[0], **{k: v for k, v in node.items() if k != "anyOf"}}
+        if "$ref" in node:
+            node = {**_convert(defs[node.pop("$ref").split("/")[-1]], defs), **node}
+
+    out = {"type": node["type"].upper()}
+    if nullable:
+        out["nullable"] = True
+    for key in ("description", "enum"):
+        if key in node:
+            out[key] = node[key]
+
+    if node["type"] == "object":
+        properties = {
+            name: field
+            for name, field in node.get("properties", {}).items()
+            if name not in ENVELOPE_FIELDS
+        }
+        out["properties"] = {name: _convert(field, defs) for name, field in properties.items()}
+        out["required"] = [name for name in node.get("required", []) if name in properties]
+        # Keep the model's field order (e.g. so a debate argument streams first)
+        out["propertyOrdering"] = list(properties)
+    elif node["type"] == "array":
+        out["items"] = _convert(node["items"], defs)
+    return out
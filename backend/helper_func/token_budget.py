@@ -0,0 +1,88 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARK = " …[truncated]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class StageBudget:
+    """Token caps of one pipeline stage: ``input_tokens`` for the variable
+    content of its prompt, ``output_tokens`` for the answer"""
+
+    def __init__(self, input_tokens: int, output_tokens: int):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+def _budget(stage: str, input_tokens: int, output_tokens: int) -> StageBudget:
+    """Default caps, overridable with LLM_BUDGET_<STAGE>="<input>,<output>" """
+    override = os.getenv(f"LLM_BUDGET_{stage.upper()}")
+    if override:
+        input_tokens, output_tokens = (int(value) for value in override.split(","))
+    return StageBudget(input_tokens, output_tokens)
+
+
+# Output caps leave room for the longest answer each response model allows;
+# the schema keeps answers from rambling past them
+STAGE_BUDGETS: Dict[str, StageBudget] = {
+    "job_parse": _budget("job_parse", 3000, 1000),
+    "resume_parse": _budget("resume_parse", 4000, 1000),
+    "intersection": _budget("intersection", 2000, 1000),
+    # The analyses shared by the debate turns and the decision are budgeted
+    # on their own (see helper_func.prompt_context)
+    "debate": _budget("debate", 1000, 700),
+    "decision": _budget("decision", 3500, 1500),
+    # Job description and resume in, every analysis and the decision out
+    "fused": _budget("fused", 7000, 3500),
+}
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens``, at a word boundary where possible"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARK)
+    if limit <= 0:
+        return ""
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    if space > limit * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+def fit_sections(
+    sections: Dict[str, Tuple[str, Optional[int]]], max_tokens: int
+) -> Tuple[Dict[str, str], List[str]]:
+    """Shrink prompt sections so together they fit ``max_tokens``.
+
+    ``sections`` maps a name to (text, priority). Lower priorities are cut
+    first; sections of the same priority give up tokens in proportion to
+    their size, and a priority of None is never cut. Returns the fitted
+    texts by name and the names of the sections that were cut.
+    """
+    tokens = {name: estimate_tokens(text) for name, (text, _) in sections.items()}
+    excess = sum(tokens.values()) - max_tokens
+    fitted = {name: text for name, (text, _) in sections.items()}
+    if excess <= 0:
+        return fitted, []
+
+    truncated = []
+    priorities = sorted({p for _, p in sections.values() if p is not None})
+    for priority in priorities:
+        group = [name for name, (_, p) in sections.items() if p == priority]
+        group_tokens = sum(tokens[name] for name in group)
+        cut = min(excess, group_tokens)
+        for name in group:
+            share = -(-cut * tokens[name] // group_tokens)  # round up
+            fitted[name] = truncate_to_tokens(fitted[name], tokens[name] - share)
+            truncated.append(name)
+        excess -= cut
+        if excess <= 0:
+            break
+    return fitted, truncated
@@ -3,24 +3,28 @@ from uagents import Agent, Context, Protocol
 from datetime import datetime, UTC
 import sys
 import os
+from typing import Optional
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.models import DebateRequest, DebateResponse
+from models.models import DebateRequest, DebateResponse, StageError, StreamDelta, TokenUsage
 
 # Import from helper-func directory
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helper-func'))
 from helper_func.llm_client import SimpleLLMAgent
+from helper_func.token_budget import STAGE_BUDGETS, fit_sections
+from helper_func.prompt_context import evaluation_context
+from helper_func.readiness import create_readiness_protocol
 
 
-def create_anti_hire_agent(port=8005):
+def create_anti_hire_agent(port=8005, seed="anti_hire_seed"):
     """Factory function to create an anti-hire advocate agent"""
 
     # ALWAYS use descriptive names and unique seeds
     agent = Agent(
         name="anti_hire_advocate",
-        seed="anti_hire_seed",
+        seed=seed,
         port=port,
         endpoint=[f"http://localhost:{port}/submit"],
         mailbox=False  # Local development
@@ -44,6 +48,18 @@ def create_anti_hire_agent(port=8005):
         """Agent shutdown handler"""
         ctx.logger.info(f"🛑 {agent.name} shutting down...")
 
+    def _failed_response(msg: DebateRequest, error: StageError) -> DebateResponse:
+        """Empty response carrying the error, so no made-up data reaches later stages"""
+        return DebateResponse(
+            evaluation_id=msg.evaluation_id,
+            round_number=msg.round_number,
+            position="anti",
+            argument="",
+            confidence=0.0,
+            key_points=[],
+            error=error,
+        )
+
     @protocol.on_message(model=DebateRequest, replies=DebateResponse)
     async def handle_debate(ctx: Context, sender: str, msg: DebateRequest):
         """Handle incoming debate requests and build anti-hire arguments"""
@@ -51,82 +67,104 @@ def create_anti_hire_agent(port=8005):
             f"❌ {agent.name}: Building anti-hire argument (round {msg.round_number})"
         )
 
+        # The analyses are the same for every debate turn, so they go first
+        # as the (cacheable) context; the argument to rebut has the input
+        # budget to itself
+        budget = STAGE_BUDGETS["debate"]
+        context, truncated = evaluation_context(
+            msg.job_analysis, msg.resume_analysis, msg.intersection_analysis
+        )
+        fitted, cut = fit_sections(
+            {"previous_argument": (msg.previous_argument, 1)}, budget.input_tokens
+        )
+        truncated += cut
+        if truncated:
+            ctx.logger.info(
+                f"✂️ {agent.name}: Cut {', '.join(truncated)} to fit {budget.input_tokens} tokens"
+            )
+
         prompt = f"""
         You are an anti-hire advocate. Build a compelling argument against hiring this candidate.
 
-        Intersection Analysis:
-        {msg.intersection_analysis.analysis}
-        Overall Compatibility: {msg.intersection_analysis.overall_compatibility}
-        Skill Matches: {', '.join(msg.intersection_analysis.skill_matches)}
-        Skill Gaps: {', '.join(msg.intersection_analysis.skill_gaps)}
-
-        Previous Pro-Hire Argument: {msg.previous_argument}
+        Previous Pro-Hire Argument: {fitted["previous_argument"]}
 
         Build a strong anti-hire argument for round {msg.round_number}.
         Focus on the candidate's weaknesses and potential risks.
-
-        Respond with ONLY a JSON object in this exact format:
-        {{
-            "argument": "<your anti-hire argument>",
-            "confidence": <0.0 to 1.0>,
-            "key_points": ["point1", "point2", "point3"]
-        }}
         """
 
-        result = await llm_agent.query_llm(prompt)
+        async def forward_delta(field: str, text: Optional[str]):
+            """Stream the argument to the coordinator while it is written"""
+            if field == "argument":
+                await ctx.send(
+                    sender,
+                    StreamDelta(
+                        position="anti",
+                        field=field,
+                        text=text or "",
+                        round_number=msg.round_number,
+                        evaluation_id=msg.evaluation_id,
+                        reset=text is None,
+                    ),
+                )
+
+        result = await llm_agent.query_llm(
+            prompt,
+            use_cache=msg.attempt == 0,
+            on_delta=forward_delta if msg.stream else None,
+            response_model=DebateResponse,
+            agent_fields=("position", "round_number"),
+            max_output_tokens=budget.output_tokens,
+            stage="debate",
+            context=context,
+        )
 
         if result["success"]:
             try:
-                analysis = llm_agent.parse_json_response(result["content"])
-
-                if analysis:
-                    response = DebateResponse(
-                        position="anti",
-                        argument=analysis.get(
-                            "argument", "Candidate has significant skill gaps"
-                        ),
-                        confidence=analysis.get("confidence", 0.6),
-                        key_points=analysis.get(
-                            "key_points", ["Missing skills", "Experience concerns"]
-                        ),
-                    )
-                else:
-                    response = DebateResponse(
-                        position="anti",
-                        argument="Candidate has significant skill gaps",
-                        confidence=0.6,
-                        key_points=["Missing skills", "Experience concerns"],
-                    )
-
+                response = llm_agent.parse_model(
+                    result["content"],
+                    DebateResponse,
+                    evaluation_id=msg.evaluation_id,
+                    usage=TokenUsage(**result.get("usage", {})),
+                    position="anti",
+                    round_number=msg.round_number,
+                )
+                llm_agent.cache_result(result)
                 ctx.logger.info(f"❌ {agent.name}: Anti-hire argument complete")
-                await ctx.send(sender, response)
-
+            except ValueError as e:
+                ctx.logger.error(f"❌ {agent.name}: Invalid LLM response: {e}")
+                response = _failed_response(
+                    msg,
+                    StageError(
+                        kind="parse_error",
+                        message=f"Invalid LLM response: {e}",
+                        retryable=True,
+                    ),
+                )
             except Exception as e:
                 ctx.logger.error(f"❌ {agent.name}: Error processing response: {e}")
-                response = DebateResponse(
-                    position="anti",
-                    argument="Candidate has significant skill gaps",
-                    confidence=0.6,
-                    key_points=["Missing skills", "Experience concerns"],
+                response = _failed_response(
+                    msg, StageError(kind="processing_error", message=str(e))
                 )
-                await ctx.send(sender, response)
+            await ctx.send(sender, response)
         else:
-            response = DebateResponse(
-                position="anti",
-                argument="Candidate has significant skill gaps",
-                confidence=0.6,
-                key_points=["Missing skills", "Experience concerns"],
+            response = _failed_response(
+                msg,
+                StageError(
+                    kind="api_error",
+                    message=result["content"],
+                    retryable=result.get("retryable", False),
+                ),
             )
             await ctx.send(sender, response)
 
     # Include the protocol in the agent
     agent.include(protocol, publish_manifest=True)
+    agent.include(create_readiness_protocol(agent.name))
 
     return agent
 
-# Create default instance for direct use
-anti_hire_agent = create_anti_hire_agent()
-
-
 if __name__ == "__main__":
+    # Create default instance for direct use (not at import time, so importing
+    # the factory doesn't register a second agent under the same address)
+    anti_hire_agent = create_anti_hire_agent()
     anti_hire_agent.run()
@@ -1,9 +1,10 @@
-
 from uagents import Agent, Context, Protocol
 from datetime import datetime, UTC
 import asyncio
+import hashlib
 import sys
 import os
+import uuid
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,22 +20,244 @@ from models.models import (
     DebateResponse,
     DecisionRequest,
     DecisionResponse,
+    FusedEvaluationRequest,
+    FusedEvaluationResponse,
+    Reasoning,
+    EvaluationOptions,
+    ReadinessCheck,
+    ReadinessAck,
+    StageError,
+    StreamDelta,
+    TokenUsage,
 )
+from db.supabase_client import HiringEvaluationsClient
+from hiring_agents.decision_agent import qualifies_as_top_candidate, save_top_candidate
+from helper_func.debate_convergence import DebateConvergenceDetector
+from helper_func.pipeline import Pipeline, Stage, StageFailed
+from helper_func.llm_client import circuit_breaker
+
+# Seconds each pipeline stage may take before the evaluation fails
+STAGE_TIMEOUTS = {
+    "job_parse": 45,
+    "resume_parse": 45,
+    "intersection": 45,
+    "decision": 45,
+    "fused": 60,
+}
+# The debate stage gets this many seconds per round it may run
+DEBATE_ROUND_TIMEOUT = 30
+
+# Agent label and step of the progress events for streamed text, by position
+STREAM_SOURCES = {
+    "evaluation": ("Intersection Evaluator", "evaluation"),
+    "pro": ("Pro-Hire Advocate", "debate"),
+    "anti": ("Anti-Hire Advocate", "debate"),
+}
+# Position of the streamed text of each stage ("pro:<round>" -> "pro")
+STREAM_POSITIONS = {"intersection": "evaluation", "pro": "pro", "anti": "anti"}
+
+# Response model of each stage (debate stages are keyed "pro:<round>" and
+# "anti:<round>"), used to restore checkpointed responses
+STAGE_RESPONSES = {
+    "job_parse": JobParseResponse,
+    "resume_parse": ResumeParseResponse,
+    "intersection": IntersectionResponse,
+    "pro": DebateResponse,
+    "anti": DebateResponse,
+    "decision": DecisionResponse,
+    "fused": FusedEvaluationResponse,
+}
+
+
+class StageResponseError(Exception):
+    """A worker agent answered a stage request with an error"""
+
+    def __init__(self, stage: str, error: StageError):
+        self.stage = stage
+        self.error = error
+        super().__init__(f"{stage} returned {error.kind}: {error.message}")
+
+
+def debate_timeout(options: EvaluationOptions) -> float:
+    """Seconds the debate stage may take, which grows with max_debate_rounds"""
+    return DEBATE_ROUND_TIMEOUT * options.max_debate_rounds
+
+
+class EvaluationSession:
+    """State of a single evaluation, keyed by its evaluation_id"""
+
+    def __init__(
+        self,
+        evaluation_id: str,
+        resume_content: str,
+        job_description: str,
+        candidate_name: str,
+        job_title: str,
+        event_emitter=None,
+        options: EvaluationOptions = None,
+    ):
+        self.evaluation_id = evaluation_id
+        self.options = options or EvaluationOptions()
+
+        # Store event emitter for real-time updates of this evaluation
+        self.event_emitter = event_emitter
+
+        # Store initial data
+        self.resume_content = resume_content
+        self.job_description = job_description
+        self.candidate_name = candidate_name
+        self.job_title = job_title
+
+        # Store results
+        self.job_analysis = None
+        self.resume_analysis = None
+        self.intersection_analysis = None
+        self.pro_arguments = []
+        self.anti_arguments = []
+        self.final_decision = None
+
+        # Set by the triage stage: "reject"/"accept" skips the debate
+        self.triage_verdict = None
+        # Seconds spent in each pipeline stage
+        self.stage_timings = {}
+        # LLM tokens used by each pipeline stage (debate rounds add up)
+        self.stage_tokens = {}
+        # Stage responses saved by an earlier attempt of this evaluation
+        # (stage key -> response dict), reused instead of asking the agent again
+        self.checkpoints = {}
+
+        # One future per stage response (e.g. "job_parse" or "pro:2"), set
+        # by the message handlers and awaited by the evaluation driver
+        self.stages = {}
+        # Resolved with the final decision, or None if the evaluation stopped
+        self.done = asyncio.get_running_loop().create_future()
+        self.task = None
+
+    def record_usage(self, stage: str, usage: TokenUsage):
+        """Add a stage response's token usage to its pipeline stage"""
+        if usage is None:
+            return
+        name = "debate" if stage.split(":")[0] in ("pro", "anti") else stage
+        total = self.stage_tokens.setdefault(name, TokenUsage())
+        total.input_tokens += usage.input_tokens
+        total.output_tokens += usage.output_tokens
+        total.cached_tokens += usage.cached_tokens
+
+    @property
+    def decision_complete(self) -> bool:
+        return self.done.done()
+
+    def expect(self, stage: str) -> asyncio.Future:
+        """Future for the response of ``stage``"""
+        if stage not in self.stages:
+            self.stages[stage] = asyncio.get_running_loop().create_future()
+        return self.stages[stage]
+
+    def resolve(self, stage: str, msg) -> bool:
+        """Hand a stage response to whoever awaits it; False for duplicates"""
+        future = self.expect(stage)
+        if future.done():
+            return False
+        future.set_result(msg)
+        return True
+
+    def fingerprint(self) -> str:
+        """Hash of the inputs and options, so checkpoints are only reused for
+        the same evaluation run the same way"""
+        # Streaming only changes how progress is reported, not the stages
+        options = self.options.model_dump_json(exclude={"stream_output"})
+        inputs = "\0".join(
+            [
+                self.resume_content,
+                self.job_description,
+                self.candidate_name,
+                self.job_title,
+                options,
+            ]
+        )
+        return hashlib.sha256(inputs.encode()).hexdigest()
+
+    def finish(self, decision=None):
+        """Mark the evaluation as complete (decision is None on failure)"""
+        if not self.done.done():
+            self.done.set_result(decision)
+
+    async def emit(self, *args):
+        """Forward an event to this evaluation's emitter, if it has one"""
+        if self.event_emitter:
+            await self.event_emitter(*args)
+
+
+def triage_decision(session: EvaluationSession, verdict: str) -> DecisionResponse:
+    """Rule-based decision for a triaged candidate (no LLM call)"""
+    intersection = session.intersection_analysis
+    score = intersection.overall_compatibility
+    hire = verdict == "accept"
+    return DecisionResponse(
+        decision="hire" if hire else "no_hire",
+        confidence=score if hire else 1.0 - score,
+        reasoning=Reasoning(
+            summary=(
+                f"Decided at triage without a debate: overall compatibility "
+                f"{score:.2f} is clearly {'above' if hire else 'below'} the bar. "
+                f"{intersection.analysis}"
+            ),
+            pros=intersection.skill_matches,
+            cons=intersection.skill_gaps,
+        ),
+        key_factors=[
+            f"Overall compatibility {score:.2f}",
+            f"Experience match: {intersection.experience_match}",
+        ],
+        evaluation_id=session.evaluation_id,
+    )
 
 
-def create_coordinator_agent(port=8007, event_emitter=None):
-    """Factory function to create a hiring coordinator agent"""
+async def save_triage_decision(
+    db_client, agent_name: str, session: EvaluationSession, decision: DecisionResponse
+):
+    """Save a candidate decided at triage to top_candidates, with the same
+    bar as the decision agent (a triage reject never qualifies)"""
+    if not qualifies_as_top_candidate(decision):
+        return
+    await save_top_candidate(
+        db_client,
+        agent_name,
+        session.candidate_name,
+        session.job_title,
+        session.intersection_analysis,
+        decision,
+        decision.confidence * 100,
+        decision.reasoning.pros,
+        decision.reasoning.cons,
+    )
+
+
+def create_coordinator_agent(
+    port=8007,
+    seed="coordinator_seed",
+    event_emitter=None,
+    stage_concurrency=None,
+    checkpoint_store=None,
+):
+    """Factory function to create a hiring coordinator agent
+
+    stage_concurrency optionally caps how many evaluations may run a stage at
+    once, e.g. {"debate": 8}. With a checkpoint_store (db.checkpoint_store),
+    every completed stage is saved so a failed or timed out evaluation can be
+    resumed under the same evaluation_id.
+    """
 
     # ALWAYS use descriptive names and unique seeds
     agent = Agent(
         name="hiring_coordinator",
-        seed="coordinator_seed",
+        seed=seed,
         port=port,
         endpoint=[f"http://localhost:{port}/submit"],
         mailbox=False  # Local development
     )
 
-    # Store event emitter for real-time updates
+    # Default event emitter for sessions started without their own
     agent.event_emitter = event_emitter
 
     # Store agent addresses
@@ -44,138 +267,533 @@ def create_coordinator_agent(port=8007, event_emitter=None):
     agent.pro_hire_address = None
     agent.anti_hire_address = None
     agent.decision_address = None
+    agent.fused_address = None
+
+    # Per-evaluation state, keyed by evaluation_id
+    agent.sessions = {}
+
+    # Saves candidates decided at triage without the decision agent
+    db_client = HiringEvaluationsClient()
 
-    # Store results
-    agent.job_analysis = None
-    agent.resume_analysis = None
-    agent.intersection_analysis = None
-    agent.pro_arguments = []
-    agent.anti_arguments = []
-    agent.final_decision = None
-
-    # Add completion flags
-    agent.job_complete = False
-    agent.resume_complete = False
-    agent.intersection_complete = False
-    agent.debate_complete = False
-    agent.decision_complete = False
-
-    # Add failure tracking
-    agent.api_failure_count = 0
-    agent.max_api_failures = 3  # Stop process after 3 API failures
-
-    # Add flag to prevent duplicate requests
-    agent.initial_requests_sent = False
-
-    # Store initial data
-    agent.resume_content = None
-    agent.job_description = None
-    agent.candidate_name = None
-    agent.job_title = None
+    # Completed stage responses, so a failed evaluation can be resumed
+    agent.checkpoint_store = checkpoint_store
+    # Gemini circuit breaker shared with the agents in this process
+    agent.circuit_breaker = circuit_breaker
+
+    # How often a stage request is resent after a retryable error response
+    agent.max_stage_retries = 1
+
+    # Readiness handshake state (nonce -> future resolved by the ack)
+    agent.ready = False
+    agent.pending_readiness = {}
 
     # ALWAYS version your protocols
     protocol = Protocol(name="coordinator_protocol", version="1.0")
 
-    async def _handle_api_failure_shutdown(ctx: Context):
-        """Handle shutdown due to API failures"""
-        print("🚨 API failure shutdown initiated")
-        if agent.event_emitter:
-            await agent.event_emitter(
-                "System",
-                "Process stopped due to API rate limit. Please try again later.",
-                "error"
+    def _get_session(ctx: Context, evaluation_id: str):
+        """Look up the session a response belongs to"""
+        session = agent.sessions.get(evaluation_id)
+        if session is None or session.decision_complete:
+            # Late response of a finished, timed out or unknown evaluation
+            ctx.logger.warning(
+                f"⚠️ Ignoring response for inactive evaluation '{evaluation_id}'"
             )
-        # Mark process as complete to prevent further execution
-        agent.decision_complete = True
-
-    async def _check_and_proceed(ctx: Context):
-        """Check if we have both job and resume analysis, then proceed to intersection"""
-        if agent.job_complete and agent.resume_complete:
-            print(f"\n🔍 STEP 2: Evaluating Intersection")
-
-            # Emit step transition event
-            if agent.event_emitter:
-                await agent.event_emitter(
-                    "System", "Starting intersection evaluation", "intersection"
-                )
-
-            request = IntersectionRequest(
-                job_analysis=agent.job_analysis,
-                resume_analysis=agent.resume_analysis
+            return None
+        return session
+
+    def _worker_addresses():
+        return {
+            "job_parser": agent.job_parser_address,
+            "resume_parser": agent.resume_parser_address,
+            "intersection_evaluator": agent.intersection_address,
+            "pro_hire_advocate": agent.pro_hire_address,
+            "anti_hire_advocate": agent.anti_hire_address,
+            "decision_maker": agent.decision_address,
+            "fused_evaluator": agent.fused_address,
+        }
+
+    async def wait_until_ready(ctx: Context, timeout: float = 30.0):
+        """Readiness handshake: wait until every worker agent acknowledges a check"""
+        if agent.ready:
+            return
+
+        checks = {}  # nonce -> agent name
+        for name, address in _worker_addresses().items():
+            nonce = uuid.uuid4().hex
+            checks[nonce] = name
+            agent.pending_readiness[nonce] = asyncio.get_running_loop().create_future()
+            await ctx.send(address, ReadinessCheck(nonce=nonce))
+
+        futures = [agent.pending_readiness[nonce] for nonce in checks]
+        try:
+            await asyncio.wait(futures, timeout=timeout)
+        finally:
+            missing = [
+                name
+                for nonce, name in checks.items()
+                if not agent.pending_readiness.pop(nonce).done()
+            ]
+
+        if missing:
+            raise TimeoutError(f"Agents not ready after {timeout}s: {', '.join(missing)}")
+
+        agent.ready = True
+        print("✅ All hiring agents are ready")
+
+    async def _await_response(
+        ctx: Context, session: EvaluationSession, stage: str, address: str, request
+    ):
+        """Send a stage request and await its response, resending it on a
+        retryable error; raises StageResponseError if the stage still fails
+        """
+        saved = session.checkpoints.get(stage)
+        if saved is not None:
+            print(f"♻️ {stage} restored from checkpoint")
+            return STAGE_RESPONSES[stage.split(":")[0]](**saved)
+
+        if agent.circuit_breaker.state == "open":
+            # Don't queue work the agents would only fail on
+            raise StageResponseError(
+                stage,
+                StageError(
+                    kind="api_error",
+                    message=f"Gemini circuit open, retry in {agent.circuit_breaker.retry_in():.0f}s",
+                ),
             )
-            await ctx.send(agent.intersection_address, request)
 
-    async def _start_debate(ctx: Context):
-        """Start the debate between pro and anti hire agents"""
-        print(f"\n⚖️ STEP 3: Conducting Debate")
+        for attempt in range(agent.max_stage_retries + 1):
+            if attempt:
+                session.stages.pop(stage, None)
+                print(f"🔁 Retrying {stage} (attempt {attempt + 1})")
+                # Ask for a fresh answer rather than a cached one
+                request = request.model_copy(update={"attempt": attempt})
+                if getattr(request, "stream", False):
+                    # The retry streams its answer from the start
+                    position = STREAM_POSITIONS[stage.split(":")[0]]
+                    agent_label, step = STREAM_SOURCES[position]
+                    await session.emit(agent_label, "", step, position, "agent_reset")
+            await ctx.send(address, request)
+            msg = await session.expect(stage)
+            session.record_usage(stage, msg.usage)
+            if msg.error is None:
+                if agent.checkpoint_store is not None:
+                    agent.checkpoint_store.save(
+                        session.evaluation_id, stage, msg.model_dump()
+                    )
+                return msg
+            print(f"⚠️ {stage} failed ({msg.error.kind}): {msg.error.message}")
+            if not msg.error.retryable:
+                break
+        raise StageResponseError(stage, msg.error)
+
+    async def _request_argument(
+        ctx: Context,
+        session: EvaluationSession,
+        position: str,
+        round_num: int,
+        previous_arg: str,
+    ) -> DebateResponse:
+        """Ask the pro or anti advocate for its argument of one round"""
+        address = agent.pro_hire_address if position == "pro" else agent.anti_hire_address
+        request = DebateRequest(
+            job_analysis=session.job_analysis,
+            resume_analysis=session.resume_analysis,
+            intersection_analysis=session.intersection_analysis,
+            round_number=round_num,
+            previous_argument=previous_arg,
+            evaluation_id=session.evaluation_id,
+            stream=session.options.stream_output,
+        )
+        return await _await_response(
+            ctx, session, f"{position}:{round_num}", address, request
+        )
 
-        # Emit step transition event
-        if agent.event_emitter:
-            await agent.event_emitter("System", "Starting debate phase", "debate")
+    async def _record_argument(session: EvaluationSession, msg: DebateResponse):
+        """Store and emit a debate argument"""
+        if msg.position == "pro":
+            session.pro_arguments.append(msg)
+            print(f"Pro-Hire Round {len(session.pro_arguments)}: {msg.argument}")
 
-        # Start with pro-hire argument
-        pro_request = DebateRequest(
-            intersection_analysis=agent.intersection_analysis,
-            round_number=1
-        )
-        await ctx.send(agent.pro_hire_address, pro_request)
+            # Emit WebSocket event
+            await session.emit("Pro-Hire Advocate", msg.argument, "debate", "pro")
+        else:
+            session.anti_arguments.append(msg)
+            print(f"Anti-Hire Round {len(session.anti_arguments)}: {msg.argument}")
 
-    async def _continue_debate(ctx: Context):
-        """Continue the debate or end it and make decision"""
-        total_rounds = len(agent.pro_arguments) + len(agent.anti_arguments)
-        print(
-            f"🔄 Continue debate check: Pro={len(agent.pro_arguments)}, Anti={len(agent.anti_arguments)}, Total={total_rounds}"
-        )
+            # Emit WebSocket event
+            await session.emit("Anti-Hire Advocate", msg.argument, "debate", "anti")
+
+    async def _run_debate(ctx: Context, session: EvaluationSession):
+        """Run the pro/anti debate"""
+        print(f"\n⚖️ STEP 3: Conducting Debate ({session.options.debate_mode})")
+
+        # Emit step transition event
+        await session.emit("System", "Starting debate phase", "debate")
 
-        # Strict bounds checking to prevent extra rounds
-        if (
-            total_rounds < 6
-            and len(agent.pro_arguments) <= 3
-            and len(agent.anti_arguments) <= 3
-        ):
-            # Continue debate
-            if len(agent.pro_arguments) > len(agent.anti_arguments):
-                # Anti-hire's turn
-                round_num = len(agent.anti_arguments) + 1
-                previous_arg = agent.pro_arguments[-1].argument
-
-                anti_request = DebateRequest(
-                    intersection_analysis=agent.intersection_analysis,
-                    round_number=round_num,
-                    previous_argument=previous_arg,
+        detector = DebateConvergenceDetector(
+            min_rounds=session.options.min_debate_rounds,
+            max_rounds=session.options.max_debate_rounds,
+        )
+        last_pro, last_anti = "", ""
+        for round_num in range(1, detector.max_rounds + 1):
+            if session.options.debate_mode == "parallel":
+                # Both sides argue round N at once, each answering the other
+                # side's round N-1 argument
+                pro_msg, anti_msg = await asyncio.gather(
+                    _request_argument(ctx, session, "pro", round_num, last_anti),
+                    _request_argument(ctx, session, "anti", round_num, last_pro),
                 )
-                await ctx.send(agent.anti_hire_address, anti_request)
+                for msg in (pro_msg, anti_msg):
+                    await _record_argument(session, msg)
             else:
-                # Pro-hire's turn
-                round_num = len(agent.pro_arguments) + 1
-                previous_arg = (
-                    agent.anti_arguments[-1].argument if agent.anti_arguments else ""
+                # Sequential: pro and anti take turns, each answering the
+                # latest argument
+                pro_msg = await _request_argument(
+                    ctx, session, "pro", round_num, last_anti
                 )
-
-                pro_request = DebateRequest(
-                    intersection_analysis=agent.intersection_analysis,
-                    round_number=round_num,
-                    previous_argument=previous_arg,
+                await _record_argument(session, pro_msg)
+                anti_msg = await _request_argument(
+                    ctx, session, "anti", round_num, pro_msg.argument
                 )
-                await ctx.send(agent.pro_hire_address, pro_request)
+                await _record_argument(session, anti_msg)
+            last_pro, last_anti = pro_msg.argument, anti_msg.argument
+
+            reason = detector.stop_reason(session.pro_arguments, session.anti_arguments)
+            if reason:
+                if round_num < detector.max_rounds:
+                    print(f"⏹️ Ending debate after round {round_num}: {reason}")
+                    await session.emit(
+                        "System",
+                        f"Debate ended after {round_num} rounds: {reason}",
+                        "debate",
+                    )
+                break
+
+    def _triage(session: EvaluationSession):
+        """"reject"/"accept" for clear-cut candidates, None if the panel should debate"""
+        options = session.options
+        score = session.intersection_analysis.overall_compatibility
+        if options.triage_reject_below is not None and score < options.triage_reject_below:
+            return "reject"
+        if options.triage_accept_above is not None and score > options.triage_accept_above:
+            return "accept"
+        return None
+
+    async def _job_parse_stage(ctx: Context, session: EvaluationSession):
+        """Parse the job description"""
+        job_request = JobParseRequest(
+            job_description=session.job_description,
+            job_title=session.job_title,
+            evaluation_id=session.evaluation_id,
+        )
+        msg = await _await_response(
+            ctx, session, "job_parse", agent.job_parser_address, job_request
+        )
+        session.job_analysis = msg
+        print(f"Job Analysis: {msg.analysis}")
+        await session.emit("Job Parser Agent", msg.analysis, "parsing")
+        return msg
+
+    async def _resume_parse_stage(ctx: Context, session: EvaluationSession):
+        """Parse the resume"""
+        resume_request = ResumeParseRequest(
+            resume_content=session.resume_content,
+            candidate_name=session.candidate_name,
+            evaluation_id=session.evaluation_id,
+        )
+        msg = await _await_response(
+            ctx, session, "resume_parse", agent.resume_parser_address, resume_request
+        )
+        session.resume_analysis = msg
+        print(f"Resume Analysis: {msg.analysis}")
+        await session.emit("Resume Parser Agent", msg.analysis, "parsing")
+        return msg
+
+    async def _intersection_stage(ctx: Context, session: EvaluationSession):
+        """Evaluate how the parsed resume fits the parsed job"""
+        print(f"\n🔍 STEP 2: Evaluating Intersection")
+
+        # Emit step transition event
+        await session.emit("System", "Starting intersection evaluation", "intersection")
+
+        request = IntersectionRequest(
+            job_analysis=session.job_analysis,
+            resume_analysis=session.resume_analysis,
+            evaluation_id=session.evaluation_id,
+            stream=session.options.stream_output,
+        )
+        msg = await _await_response(
+            ctx, session, "intersection", agent.intersection_address, request
+        )
+        session.intersection_analysis = msg
+        print(f"Intersection Analysis: {msg.analysis}")
+        print(f"Overall Compatibility: {msg.overall_compatibility:.2f}")
+
+        # Emit WebSocket event
+        await session.emit(
+            "Intersection Evaluator", msg.analysis, "evaluation", "evaluation"
+        )
+        return msg
+
+    async def _triage_stage(ctx: Context, session: EvaluationSession):
+        """Decide whether the candidate is clear-cut enough to skip the debate"""
+        session.triage_verdict = _triage(session)
+        if session.triage_verdict:
+            score = session.intersection_analysis.overall_compatibility
+            triage_note = f"Triage: compatibility {score:.2f} is a clear {session.triage_verdict}, skipping debate"
+            print(f"🚦 {triage_note}")
+            await session.emit("System", triage_note, "debate")
+        return session.triage_verdict
+
+    async def _debate_stage(ctx: Context, session: EvaluationSession):
+        """Run the pro/anti debate"""
+        await _run_debate(ctx, session)
+
+    async def _decision_stage(ctx: Context, session: EvaluationSession):
+        """Make the final hiring decision"""
+        print(f"\n🎯 STEP 4: Making Final Decision")
+
+        # Emit step transition event
+        await session.emit("System", "Making final hiring decision", "decision")
+
+        verdict = session.triage_verdict
+        if verdict and session.options.triage_decision == "deterministic":
+            msg = triage_decision(session, verdict)
+            await save_triage_decision(db_client, agent.name, session, msg)
         else:
-            # Debate complete, make decision
-            print(f"\n🎯 STEP 4: Making Final Decision")
+            decision_request = DecisionRequest(
+                pro_arguments=session.pro_arguments,
+                anti_arguments=session.anti_arguments,
+                job_analysis=session.job_analysis,
+                resume_analysis=session.resume_analysis,
+                intersection_analysis=session.intersection_analysis,
+                candidate_name=session.candidate_name,
+                job_title=session.job_title,
+                evaluation_id=session.evaluation_id,
+            )
+            msg = await _await_response(
+                ctx, session, "decision", agent.decision_address, decision_request
+            )
+        await _report_decision(session, msg)
+        return msg
+
+    async def _report_decision(session: EvaluationSession, msg: DecisionResponse):
+        """Store, print and emit the final decision"""
+        session.final_decision = msg
+        print("\n" + "=" * 60)
+        print("FINAL HIRING DECISION")
+        print("=" * 60)
+        print(f"Decision: {msg.decision.upper()}")
+        print(f"Confidence: {msg.confidence:.2f}")
+        print(f"Reasoning: {msg.reasoning}")
+        print(f"Key Factors: {', '.join(msg.key_factors)}")
+        print("=" * 60)
+
+        # Emit WebSocket event
+        decision_summary = f"Decision: {msg.decision.upper()}\nConfidence: {msg.confidence:.2f}\nReasoning: {msg.reasoning}"
+        await session.emit("Decision Agent", decision_summary, "decision", "decision")
+
+    async def _fused_stage(ctx: Context, session: EvaluationSession):
+        """Parse, evaluate and decide in a single LLM call (no debate)"""
+        print(f"\n⚡ Fused evaluation: parsing, evaluating and deciding in one call")
+        await session.emit("System", "Starting fused evaluation", "parsing")
+
+        request = FusedEvaluationRequest(
+            job_description=session.job_description,
+            job_title=session.job_title,
+            resume_content=session.resume_content,
+            candidate_name=session.candidate_name,
+            evaluation_id=session.evaluation_id,
+        )
+        msg = await _await_response(
+            ctx, session, "fused", agent.fused_address, request
+        )
+
+        # Report each part as its own stage would have
+        session.job_analysis = msg.job_analysis
+        session.resume_analysis = msg.resume_analysis
+        session.intersection_analysis = msg.intersection_analysis
+        print(f"Job Analysis: {msg.job_analysis.analysis}")
+        await session.emit("Job Parser Agent", msg.job_analysis.analysis, "parsing")
+        print(f"Resume Analysis: {msg.resume_analysis.analysis}")
+        await session.emit("Resume Parser Agent", msg.resume_analysis.analysis, "parsing")
+        print(f"Intersection Analysis: {msg.intersection_analysis.analysis}")
+        print(f"Overall Compatibility: {msg.intersection_analysis.overall_compatibility:.2f}")
+        await session.emit(
+            "Intersection Evaluator",
+            msg.intersection_analysis.analysis,
+            "evaluation",
+            "evaluation",
+        )
+        await _report_decision(session, msg.decision)
+        return msg
+
+    # The evaluation pipeline: independent stages (the two parsers) run in
+    # parallel, every other stage starts as soon as its dependencies are done.
+    # More stages can be added with agent.pipeline.add(Stage(...)).
+    limits = stage_concurrency or {}
+    agent.pipeline = Pipeline(
+        [
+            Stage(
+                "job_parse",
+                _job_parse_stage,
+                timeout=STAGE_TIMEOUTS["job_parse"],
+                concurrency=limits.get("job_parse"),
+            ),
+            Stage(
+                "resume_parse",
+                _resume_parse_stage,
+                timeout=STAGE_TIMEOUTS["resume_parse"],
+                concurrency=limits.get("resume_parse"),
+            ),
+            Stage(
+                "intersection",
+                _intersection_stage,
+                depends_on=["job_parse", "resume_parse"],
+                timeout=STAGE_TIMEOUTS["intersection"],
+                concurrency=limits.get("intersection"),
+            ),
+            Stage("triage", _triage_stage, depends_on=["intersection"]),
+            Stage(
+                "debate",
+                _debate_stage,
+                depends_on=["triage"],
+                timeout=lambda ctx, session: debate_timeout(session.options),
+                concurrency=limits.get("debate"),
+                when=lambda ctx, session: session.triage_verdict is None,
+            ),
+            Stage(
+                "decision",
+                _decision_stage,
+                depends_on=["debate"],
+                timeout=STAGE_TIMEOUTS["decision"],
+                concurrency=limits.get("decision"),
+            ),
+        ]
+    )
+
+    # Fused mode (EvaluationOptions.mode="fused"): one stage, one LLM call
+    agent.fused_pipeline = Pipeline(
+        [
+            Stage(
+                "fused",
+                _fused_stage,
+                timeout=STAGE_TIMEOUTS["fused"],
+                concurrency=limits.get("fused"),
+            ),
+        ]
+    )
+
+    async def _run_evaluation(ctx: Context, session: EvaluationSession):
+        """Drive one evaluation through the pipeline"""
+        try:
+            await wait_until_ready(ctx)
+
+            print(f"🤖 Starting Hiring Evaluation Process ({session.evaluation_id})")
+            print("=" * 60)
+
+            if session.options.mode == "fused":
+                pipeline = agent.fused_pipeline
+            else:
+                pipeline = agent.pipeline
+                print("\n📋 STEP 1: Parsing Job and Resume")
 
-            # Emit step transition event
-            if agent.event_emitter:
-                await agent.event_emitter(
-                    "System", "Making final hiring decision", "decision"
+            run = await pipeline.run(ctx, session)
+            session.stage_timings = run.timings
+            print(
+                "⏱️ Stage timings: "
+                + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in run.timings.items())
+            )
+            print(
+                "🔢 Stage tokens (in/out, cached): "
+                + ", ".join(
+                    f"{name} {usage.input_tokens}/{usage.output_tokens} ({usage.cached_tokens})"
+                    for name, usage in session.stage_tokens.items()
                 )
+            )
 
-            decision_request = DecisionRequest(
-                pro_arguments=agent.pro_arguments,
-                anti_arguments=agent.anti_arguments,
-                intersection_analysis=agent.intersection_analysis,
-                candidate_name=agent.candidate_name,
-                job_title=agent.job_title,
+            session.finish(session.final_decision)
+            if agent.checkpoint_store is not None:
+                agent.checkpoint_store.delete(session.evaluation_id)
+
+        except asyncio.CancelledError:
+            session.finish(None)
+            raise
+        except StageFailed as e:
+            # Stop at the failing stage instead of running the remaining
+            # stages on data the agents could not produce
+            print(f"🛑 Evaluation {session.evaluation_id} stopped: {e}")
+            if isinstance(e.error, StageResponseError) and e.error.error.kind == "api_error":
+                message = f"Process stopped due to an API error at the {e.stage} stage. Please try again later."
+            else:
+                message = f"Error: {str(e)}"
+            await session.emit("System", message, "error")
+            session.finish(None)
+        except Exception as e:
+            print(f"❌ Error in evaluation {session.evaluation_id}: {e}")
+            await session.emit("System", f"Error: {str(e)}", "error")
+            session.finish(None)
+
+    def _load_checkpoints(session: EvaluationSession):
+        """Pick up the stages an earlier attempt of this evaluation completed"""
+        store = agent.checkpoint_store
+        saved = store.load(session.evaluation_id)
+        fingerprint = session.fingerprint()
+
+        if saved.get("inputs", {}).get("fingerprint") != fingerprint:
+            # New evaluation, or the ID was reused for different inputs
+            store.delete(session.evaluation_id)
+            store.save(session.evaluation_id, "inputs", {"fingerprint": fingerprint})
+            return
+
+        session.checkpoints = {
+            stage: payload for stage, payload in saved.items() if stage != "inputs"
+        }
+        if session.checkpoints:
+            print(
+                f"♻️ Resuming evaluation {session.evaluation_id} from "
+                f"{len(session.checkpoints)} checkpointed stages"
             )
-            await ctx.send(agent.decision_address, decision_request)
+
+    async def start_evaluation(
+        ctx: Context,
+        evaluation_id: str,
+        resume_content: str,
+        job_description: str,
+        candidate_name: str,
+        job_title: str,
+        event_emitter=None,
+        options: EvaluationOptions = None,
+    ) -> EvaluationSession:
+        """Register a new evaluation session and start driving it"""
+        if evaluation_id in agent.sessions:
+            raise ValueError(f"Evaluation '{evaluation_id}' is already running")
+
+        session = EvaluationSession(
+            evaluation_id,
+            resume_content,
+            job_description,
+            candidate_name,
+            job_title,
+            event_emitter or agent.event_emitter,
+            options,
+        )
+        if agent.checkpoint_store is not None:
+            _load_checkpoints(session)
+        agent.sessions[evaluation_id] = session
+        session.task = asyncio.create_task(_run_evaluation(ctx, session))
+        return session
+
+    def end_evaluation(evaluation_id: str):
+        """Drop a session once its result has been collected (or it timed out)"""
+        session = agent.sessions.pop(evaluation_id, None)
+        if session is not None and session.task and not session.task.done():
+            session.task.cancel()
+        return session
+
+    agent.wait_until_ready = wait_until_ready
+    agent.start_evaluation = start_evaluation
+    agent.end_evaluation = end_evaluation
 
     @agent.on_event("startup")
     async def startup(ctx: Context):
@@ -189,151 +807,73 @@ def create_coordinator_agent(port=8007, event_emitter=None):
         """Agent shutdown handler"""
         ctx.logger.info(f"🛑 {agent.name} shutting down...")
 
-    # Timer to send initial requests after startup
-    @agent.on_interval(period=3.0)
-    async def send_initial_requests(ctx: Context):
-        """Send initial parsing requests when ready"""
-        if (
-            not agent.initial_requests_sent
-            and agent.job_description
-            and agent.resume_content
-        ):
-            print("🤖 Starting Hiring Evaluation Process")
-            print("=" * 60)
-            print("\n📋 STEP 1: Parsing Job and Resume")
-
-            # Send initial requests
-            job_request = JobParseRequest(
-                job_description=agent.job_description,
-                job_title=agent.job_title
-            )
-            await ctx.send(agent.job_parser_address, job_request)
-
-            resume_request = ResumeParseRequest(
-                resume_content=agent.resume_content,
-                candidate_name=agent.candidate_name,
-            )
-            await ctx.send(agent.resume_parser_address, resume_request)
-
-            # Mark as sent to prevent duplicates
-            agent.initial_requests_sent = True
+    @protocol.on_message(model=ReadinessAck)
+    async def handle_readiness_ack(ctx: Context, sender: str, msg: ReadinessAck):
+        """Handle a worker agent's readiness acknowledgement"""
+        future = agent.pending_readiness.get(msg.nonce)
+        if future is not None and not future.done():
+            ctx.logger.info(f"✅ {msg.agent_name} is ready")
+            future.set_result(msg)
 
     @protocol.on_message(model=JobParseResponse)
     async def handle_job_response(ctx: Context, sender: str, msg: JobParseResponse):
         """Handle job parsing response"""
-        agent.job_analysis = msg
-        agent.job_complete = True
-        print(f"Job Analysis: {msg.analysis}")
-
-        # Emit WebSocket event
-        if agent.event_emitter:
-            await agent.event_emitter("Job Parser Agent", msg.analysis, "parsing")
-
-        await _check_and_proceed(ctx)
+        session = _get_session(ctx, msg.evaluation_id)
+        if session is not None:
+            session.resolve("job_parse", msg)
 
     @protocol.on_message(model=ResumeParseResponse)
     async def handle_resume_response(ctx: Context, sender: str, msg: ResumeParseResponse):
         """Handle resume parsing response"""
-        agent.resume_analysis = msg
-        agent.resume_complete = True
-        print(f"Resume Analysis: {msg.analysis}")
-
-        # Emit WebSocket event
-        if agent.event_emitter:
-            await agent.event_emitter("Resume Parser Agent", msg.analysis, "parsing")
-
-        await _check_and_proceed(ctx)
+        session = _get_session(ctx, msg.evaluation_id)
+        if session is not None:
+            session.resolve("resume_parse", msg)
 
     @protocol.on_message(model=IntersectionResponse)
     async def handle_intersection_response(ctx: Context, sender: str, msg: IntersectionResponse):
         """Handle intersection evaluation response"""
-        agent.intersection_analysis = msg
-        agent.intersection_complete = True
-        print(f"\n🔍 STEP 2: Evaluating Intersection")
-        print(f"Intersection Analysis: {msg.analysis}")
-        print(f"Overall Compatibility: {msg.overall_compatibility:.2f}")
-
-        # Emit WebSocket event
-        if agent.event_emitter:
-            await agent.event_emitter(
-                "Intersection Evaluator", msg.analysis, "evaluation", "evaluation"
-            )
-
-        await _start_debate(ctx)
+        session = _get_session(ctx, msg.evaluation_id)
+        if session is not None:
+            session.resolve("intersection", msg)
 
     @protocol.on_message(model=DebateResponse)
     async def handle_debate_response(ctx: Context, sender: str, msg: DebateResponse):
         """Handle debate response from pro/anti hire agents"""
-        # Check for API failure responses (generic fallback responses)
-        if (
-            msg.argument
-            == "Candidate has strong technical skills and relevant experience"
-        ):
-            agent.api_failure_count += 1
-            print(
-                f"⚠️ Detected API failure response (count: {agent.api_failure_count})"
-            )
-
-            if agent.api_failure_count >= agent.max_api_failures:
-                print(
-                    f"🛑 Stopping process due to {agent.api_failure_count} API failures"
-                )
-                # Send error decision immediately
-                await _handle_api_failure_shutdown(ctx)
-                return
-
-        if msg.position == "pro":
-            agent.pro_arguments.append(msg)
-            print(f"Pro-Hire Round {len(agent.pro_arguments)}: {msg.argument}")
-
-            # Emit WebSocket event
-            if agent.event_emitter:
-                await agent.event_emitter(
-                    "Pro-Hire Advocate", msg.argument, "debate", "pro"
-                )
-        else:
-            agent.anti_arguments.append(msg)
-            print(f"Anti-Hire Round {len(agent.anti_arguments)}: {msg.argument}")
-
-            # Emit WebSocket event
-            if agent.event_emitter:
-                await agent.event_emitter(
-                    "Anti-Hire Advocate", msg.argument, "debate", "anti"
-                )
-
-        await _continue_debate(ctx)
+        session = _get_session(ctx, msg.evaluation_id)
+        if session is not None:
+            session.resolve(f"{msg.position}:{msg.round_number}", msg)
+
+    @protocol.on_message(model=StreamDelta)
+    async def handle_stream_delta(ctx: Context, sender: str, msg: StreamDelta):
+        """Forward text an agent is still writing to the progress events"""
+        session = _get_session(ctx, msg.evaluation_id)
+        if session is not None and msg.position in STREAM_SOURCES:
+            agent_label, step = STREAM_SOURCES[msg.position]
+            event_type = "agent_reset" if msg.reset else "agent_delta"
+            await session.emit(agent_label, msg.text, step, msg.position, event_type)
 
     @protocol.on_message(model=DecisionResponse)
     async def handle_decision_response(ctx: Context, sender: str, msg: DecisionResponse):
         """Handle final decision response"""
-        agent.final_decision = msg
-        print(f"\n🎯 STEP 4: Making Final Decision")
-        print("\n" + "=" * 60)
-        print("FINAL HIRING DECISION")
-        print("=" * 60)
-        print(f"Decision: {msg.decision.upper()}")
-        print(f"Confidence: {msg.confidence:.2f}")
-        print(f"Reasoning: {msg.reasoning}")
-        print(f"Key Factors: {', '.join(msg.key_factors)}")
-        print("=" * 60)
+        session = _get_session(ctx, msg.evaluation_id)
+        if session is not None:
+            session.resolve("decision", msg)
 
-        # Emit WebSocket event
-        if agent.event_emitter:
-            decision_summary = f"Decision: {msg.decision.upper()}\nConfidence: {msg.confidence:.2f}\nReasoning: {msg.reasoning}"
-            await agent.event_emitter(
-                "Decision Agent", decision_summary, "decision", "decision"
-            )
-
-        agent.decision_complete = True
+    @protocol.on_message(model=FusedEvaluationResponse)
+    async def handle_fused_response(ctx: Context, sender: str, msg: FusedEvaluationResponse):
+        """Handle fused evaluation response"""
+        session = _get_session(ctx, msg.evaluation_id)
+        if session is not None:
+            session.resolve("fused", msg)
 
     # Include the protocol in the agent
     agent.include(protocol, publish_manifest=True)
 
     return agent
 
-# Create default instance for direct use
-coordinator_agent = create_coordinator_agent()
-
 
 if __name__ == "__main__":
+    # Create default instance for direct use (not at import time, so importing
+    # the factory doesn't register a second agent under the same address)
+    coordinator_agent = create_coordinator_agent()
     coordinator_agent.run()
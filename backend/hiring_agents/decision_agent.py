@@ -3,25 +3,117 @@ from uagents import Agent, Context, Protocol
 from datetime import datetime, UTC
 import sys
 import os
+from typing import List, Optional
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.models import DecisionRequest, DecisionResponse, Reasoning
+from models.models import (
+    DecisionRequest,
+    DecisionResponse,
+    IntersectionResponse,
+    Reasoning,
+    StageError,
+    TokenUsage,
+)
 from db.supabase_client import HiringEvaluationsClient
 
 # Import from helper-func directory
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helper-func'))
 from helper_func.llm_client import SimpleLLMAgent
+from helper_func.token_budget import STAGE_BUDGETS, fit_sections
+from helper_func.prompt_context import evaluation_context
+from helper_func.readiness import create_readiness_protocol
 
 
-def create_decision_agent(port=8006):
+# Confidence (in %) a hire needs to be saved to top_candidates
+TOP_CANDIDATE_CONFIDENCE = 85.0
+
+
+def qualifies_as_top_candidate(decision: DecisionResponse) -> bool:
+    """Whether a decision belongs in top_candidates: a hire with at least
+    TOP_CANDIDATE_CONFIDENCE% confidence (a confident no_hire never does)"""
+    return (
+        decision.decision == "hire"
+        and decision.confidence * 100 >= TOP_CANDIDATE_CONFIDENCE
+    )
+
+
+async def save_top_candidate(
+    db_client: HiringEvaluationsClient,
+    agent_name: str,
+    candidate_name: Optional[str],
+    job_title: Optional[str],
+    intersection: IntersectionResponse,
+    response: DecisionResponse,
+    confidence_percentage: float,
+    strengths: List[str],
+    concerns: List[str],
+):
+    """Save high-scoring candidates to the top_candidates table"""
+    print(f"🔄 {agent_name}: Starting save_top_candidate")
+    try:
+        candidate_name = candidate_name or "Unknown Candidate"
+        job_title = job_title or "Unknown Position"
+
+        print(f"📝 {agent_name}: Candidate: {candidate_name}, Job: {job_title}")
+
+        # Create summary from reasoning
+        summary = response.reasoning.summary
+
+        # Check if candidate already exists to avoid duplicates
+        print(f"🔍 {agent_name}: Checking if candidate already exists...")
+        exists = await db_client.candidate_exists_for_job(
+            candidate_name, job_title
+        )
+        print(f"🔍 {agent_name}: Candidate exists check result: {exists}")
+        if exists:
+            print(
+                f"🔄 Candidate {candidate_name} already exists for {job_title}, skipping..."
+            )
+            return
+
+        # Create the top candidate record
+        top_candidate_data = {
+            "resume_id": None,  # TODO: Pass resume_id from coordinator
+            "evaluation_id": None,  # TODO: Pass evaluation_id from coordinator
+            "job_id": None,  # TODO: Pass job_id from coordinator
+            "candidate_name": candidate_name,
+            "job_title": job_title,
+            "position": job_title,  # Using job_title as position for now
+            "overall_score": confidence_percentage,
+            "confidence": response.confidence,
+            "decision": response.decision.upper(),
+            "summary": summary,
+            "strengths": strengths,
+            "concerns": concerns,
+            "key_factors": response.key_factors,
+            "skill_matches": intersection.skill_matches,
+            "skill_gaps": intersection.skill_gaps,
+            "experience_match": intersection.experience_match,
+            "analysis": intersection.analysis,
+        }
+
+        print(f"💾 {agent_name}: Attempting to save to database...")
+        print(f"💾 {agent_name}: Data keys: {list(top_candidate_data.keys())}")
+        result = await db_client.create_top_candidate(**top_candidate_data)
+        print(f"💾 {agent_name}: Database save result: {result}")
+        print(
+            f"✅ Saved top candidate: {candidate_name} with score {confidence_percentage}%"
+        )
+
+    except Exception as e:
+        print(f"❌ Error saving top candidate: {e}")
+        # Don't fail the main decision process if saving fails
+
+
+def create_decision_agent(port=8006, seed="decision_seed"):
     """Factory function to create a decision-making agent"""
 
     # ALWAYS use descriptive names and unique seeds
     agent = Agent(
         name="decision_maker",
-        seed="decision_seed",
+        seed=seed,
         port=port,
         endpoint=[f"http://localhost:{port}/submit"],
         mailbox=False  # Local development
@@ -46,109 +138,61 @@ def create_decision_agent(port=8006):
         """Agent shutdown handler"""
         ctx.logger.info(f"🛑 {agent.name} shutting down...")
 
-    async def _save_top_candidate(
-        request: DecisionRequest,
-        response: DecisionResponse,
-        confidence_percentage: float,
-    ):
-        """Save high-scoring candidates to the top_candidates table"""
-        print(f"🔄 {agent.name}: Starting _save_top_candidate method")
-        try:
-            # Extract data from the intersection analysis and decision
-            intersection = request.intersection_analysis
-            resume_analysis = (
-                intersection.analysis if hasattr(intersection, "analysis") else ""
-            )
-
-            # Get candidate name and job title from the request
-            candidate_name = request.candidate_name or "Unknown Candidate"
-            job_title = request.job_title or "Unknown Position"
-
-            print(f"📝 {agent.name}: Candidate: {candidate_name}, Job: {job_title}")
-
-            # Extract strengths and concerns from pro/anti arguments
-            strengths = []
-            concerns = []
-
-            for arg in request.pro_arguments:
-                strengths.extend(arg.key_points)
-
-            for arg in request.anti_arguments:
-                concerns.extend(arg.key_points)
-
-            # Create summary from reasoning
-            summary = response.reasoning.summary
-
-            # Check if candidate already exists to avoid duplicates
-            print(f"🔍 {agent.name}: Checking if candidate already exists...")
-            exists = await db_client.candidate_exists_for_job(
-                candidate_name, job_title
-            )
-            print(f"🔍 {agent.name}: Candidate exists check result: {exists}")
-            if exists:
-                print(
-                    f"🔄 Candidate {candidate_name} already exists for {job_title}, skipping..."
-                )
-                return
-
-            # Create the top candidate record
-            top_candidate_data = {
-                "resume_id": None,  # TODO: Pass resume_id from coordinator
-                "evaluation_id": None,  # TODO: Pass evaluation_id from coordinator
-                "job_id": None,  # TODO: Pass job_id from coordinator
-                "candidate_name": candidate_name,
-                "job_title": job_title,
-                "position": job_title,  # Using job_title as position for now
-                "overall_score": confidence_percentage,
-                "confidence": response.confidence,
-                "decision": response.decision.upper(),
-                "summary": summary,
-                "strengths": strengths,
-                "concerns": concerns,
-                "key_factors": response.key_factors,
-                "skill_matches": intersection.skill_matches,
-                "skill_gaps": intersection.skill_gaps,
-                "experience_match": intersection.experience_match,
-                "analysis": intersection.analysis,
-            }
-
-            print(f"💾 {agent.name}: Attempting to save to database...")
-            print(f"💾 {agent.name}: Data keys: {list(top_candidate_data.keys())}")
-            result = await db_client.create_top_candidate(**top_candidate_data)
-            print(f"💾 {agent.name}: Database save result: {result}")
-            print(
-                f"✅ Saved top candidate: {candidate_name} with score {confidence_percentage}%"
-            )
-
-        except Exception as e:
-            print(f"❌ Error saving top candidate: {e}")
-            # Don't fail the main decision process if saving fails
+    def _failed_response(msg: DecisionRequest, error: StageError) -> DecisionResponse:
+        """Empty response carrying the error, so no made-up decision is reported"""
+        return DecisionResponse(
+            evaluation_id=msg.evaluation_id,
+            decision="no_hire",
+            confidence=0.0,
+            reasoning=Reasoning(summary=f"Decision failed: {error.message}", pros=[], cons=[]),
+            key_factors=[],
+            error=error,
+        )
 
     @protocol.on_message(model=DecisionRequest, replies=DecisionResponse)
     async def handle_decision(ctx: Context, sender: str, msg: DecisionRequest):
         """Handle incoming decision requests and make final hiring decision"""
         ctx.logger.info(f"🎯 {agent.name}: Making final hiring decision")
 
+        # The analyses go first as the context shared with the debate turns.
+        # Under the input budget, earlier debate rounds are cut first; each
+        # side's final argument is cut last
+        budget = STAGE_BUDGETS["decision"]
+        context, truncated = evaluation_context(
+            msg.job_analysis, msg.resume_analysis, msg.intersection_analysis
+        )
+        sections = {}
+        for side, arguments in (("pro", msg.pro_arguments), ("anti", msg.anti_arguments)):
+            for i, arg in enumerate(arguments):
+                priority = 2 if i == len(arguments) - 1 else 1
+                sections[f"{side}_{i + 1}"] = (arg.argument, priority)
+        fitted, cut = fit_sections(sections, budget.input_tokens)
+        truncated += cut
+        if truncated:
+            ctx.logger.info(
+                f"✂️ {agent.name}: Cut {', '.join(truncated)} to fit {budget.input_tokens} tokens"
+            )
+
         # Format debate arguments for the prompt
         pro_args = "\n".join(
             [
-                f"Round {i+1}: {arg.argument}"
-                for i, arg in enumerate(msg.pro_arguments)
+                f"Round {i+1}: {fitted[f'pro_{i + 1}']}"
+                for i in range(len(msg.pro_arguments))
             ]
         )
         anti_args = "\n".join(
             [
-                f"Round {i+1}: {arg.argument}"
-                for i, arg in enumerate(msg.anti_arguments)
+                f"Round {i+1}: {fitted[f'anti_{i + 1}']}"
+                for i in range(len(msg.anti_arguments))
             ]
         )
 
-        prompt = f"""
-        You are the final decision maker for a hiring decision. Evaluate all the arguments and make a final, well-reasoned decision. Your reasoning should be comprehensive.
+        # Triage skips the debate for clear-cut candidates
+        if not msg.pro_arguments and not msg.anti_arguments:
+            pro_args = anti_args = "None (debate skipped at triage, decide from the intersection analysis)"
 
-        Intersection Analysis:
-        {msg.intersection_analysis.analysis}
-        Overall Compatibility: {msg.intersection_analysis.overall_compatibility}
+        prompt = f"""
+        You are the final decision maker for a hiring decision. Evaluate all the arguments and make a final, well-reasoned decision based on the analyses above. Your reasoning should be comprehensive.
 
         Pro-Hire Arguments:
         {pro_args}
@@ -156,114 +200,101 @@ def create_decision_agent(port=8006):
         Anti-Hire Arguments:
         {anti_args}
 
-        Evaluate the strength of each side's arguments and make a final, well-reasoned decision. Your reasoning should be comprehensive.
-
-        Respond with ONLY a JSON object in this exact format. The reasoning MUST be broken down into a detailed summary, and comprehensive lists of pros and cons.
-        {{
-            "decision": "<hire/no_hire>",
-            "confidence": <0.0 to 1.0>,
-            "reasoning": {{
-                "summary": "<A detailed, 2-3 sentence summary explaining the final verdict and its context.>",
-                "pros": ["<A comprehensive list of all key strengths and pro-hire arguments. Include at least 2-3 points.>", "<...more pros>"],
-                "cons": ["<A comprehensive list of all key weaknesses and anti-hire arguments. Include at least 2-3 points.>", "<...more cons>"]
-            }},
-            "key_factors": ["<The most important factors that drove the decision.>", "<...more factors>"]
-        }}
+        Evaluate the strength of each side's arguments and make a final, well-reasoned decision. Your reasoning should be comprehensive, with a detailed summary and comprehensive lists of pros and cons.
         """
 
-        result = await llm_agent.query_llm(prompt)
+        result = await llm_agent.query_llm(
+            prompt,
+            use_cache=msg.attempt == 0,
+            response_model=DecisionResponse,
+            max_output_tokens=budget.output_tokens,
+            stage="decision",
+            context=context,
+        )
 
         if result["success"]:
             try:
-                analysis = llm_agent.parse_json_response(result["content"])
-
-                if analysis:
-                    reasoning_data = analysis.get("reasoning", {})
-                    response = DecisionResponse(
-                        decision=analysis.get("decision", "no_hire"),
-                        confidence=analysis.get("confidence", 0.7),
-                        reasoning=Reasoning(
-                            summary=reasoning_data.get(
-                                "summary", "Analysis incomplete."
-                            ),
-                            pros=reasoning_data.get("pros", []),
-                            cons=reasoning_data.get("cons", []),
-                        ),
-                        key_factors=analysis.get("key_factors", ["N/A"]),
-                    )
-                else:
-                    # Default response if parsing fails
-                    response = DecisionResponse(
-                        decision="no_hire",
-                        confidence=0.0,
-                        reasoning=Reasoning(
-                            summary="Failed to parse LLM response.",
-                            pros=[],
-                            cons=["Could not generate analysis from AI."],
-                        ),
-                        key_factors=["Parsing Error"],
-                    )
+                response = llm_agent.parse_model(
+                    result["content"],
+                    DecisionResponse,
+                    evaluation_id=msg.evaluation_id,
+                    usage=TokenUsage(**result.get("usage", {})),
+                )
+                llm_agent.cache_result(result)
+            except ValueError as e:
+                ctx.logger.error(f"❌ {agent.name}: Invalid LLM response: {e}")
+                response = _failed_response(
+                    msg,
+                    StageError(
+                        kind="parse_error",
+                        message=f"Invalid LLM response: {e}",
+                        retryable=True,
+                    ),
+                )
+                await ctx.send(sender, response)
+                return
 
+            try:
                 ctx.logger.info(f"🎯 {agent.name}: Decision made")
 
                 # Save high-scoring candidates to database (85% or higher)
-                confidence_score = analysis.get("confidence", 0.7)
-                confidence_percentage = confidence_score * 100
+                confidence_percentage = response.confidence * 100
 
                 ctx.logger.info(
-                    f"🎯 {agent.name}: Confidence score: {confidence_score} ({confidence_percentage}%)"
+                    f"🎯 {agent.name}: Confidence score: {response.confidence} ({confidence_percentage}%)"
                 )
 
-                if confidence_percentage >= 85.0:
+                if qualifies_as_top_candidate(response):
                     ctx.logger.info(
-                        f"✅ {agent.name}: Candidate qualifies for top_candidates (≥85%)"
+                        f"✅ {agent.name}: Candidate qualifies for top_candidates (hire, ≥85%)"
                     )
-                    await _save_top_candidate(
-                        msg, response, confidence_percentage
+                    # Strengths and concerns are the key points of each side
+                    await save_top_candidate(
+                        db_client,
+                        agent.name,
+                        msg.candidate_name,
+                        msg.job_title,
+                        msg.intersection_analysis,
+                        response,
+                        confidence_percentage,
+                        [point for arg in msg.pro_arguments for point in arg.key_points],
+                        [point for arg in msg.anti_arguments for point in arg.key_points],
                     )
                 else:
                     ctx.logger.info(
-                        f"❌ {agent.name}: Candidate doesn't qualify for top_candidates ({confidence_percentage}% < 85%)"
+                        f"❌ {agent.name}: Candidate doesn't qualify for top_candidates ({response.decision}, {confidence_percentage}%)"
                     )
 
                 await ctx.send(sender, response)
 
             except Exception as e:
                 ctx.logger.error(f"❌ {agent.name}: Error processing response: {e}")
-                response = DecisionResponse(
-                    decision="no_hire",
-                    confidence=0.0,
-                    reasoning=Reasoning(
-                        summary="An exception occurred while processing the response.",
-                        pros=[],
-                        cons=[str(e)],
-                    ),
-                    key_factors=["Processing Error"],
+                response = _failed_response(
+                    msg, StageError(kind="processing_error", message=str(e))
                 )
                 await ctx.send(sender, response)
         else:
-            # Default response if API call fails
-            response = DecisionResponse(
-                decision="no_hire",
-                confidence=0.0,
-                reasoning=Reasoning(
-                    summary="API Error.",
-                    pros=[],
-                    cons=[f"API Error: {result['content']}"],
+            response = _failed_response(
+                msg,
+                StageError(
+                    kind="api_error",
+                    message=result["content"],
+                    retryable=result.get("retryable", False),
                 ),
-                key_factors=["API Error"],
             )
             await ctx.send(sender, response)
 
     # Include the protocol in the agent
     agent.include(protocol, publish_manifest=True)
+    agent.include(create_readiness_protocol(agent.name))
 
     return agent
 
-# Create default instance for direct use
-decision_agent = create_decision_agent()
-
 if __name__ == "__main__":
+    # Create default instance for direct use (not at import time, so importing
+    # the factory doesn't register a second agent under the same address)
+    decision_agent = create_decision_agent()
+
     print("""
 🤖 Starting Decision Maker Agent...
 
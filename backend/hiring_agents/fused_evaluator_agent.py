@@ -0,0 +1,222 @@
+from uagents import Agent, Context, Protocol
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.models import (
+    FusedEvaluationRequest,
+    FusedEvaluationResponse,
+    JobParseResponse,
+    ResumeParseResponse,
+    IntersectionResponse,
+    DecisionResponse,
+    Reasoning,
+    StageError,
+    TokenUsage,
+)
+from db.supabase_client import HiringEvaluationsClient
+from hiring_agents.decision_agent import qualifies_as_top_candidate, save_top_candidate
+
+# Import from helper-func directory
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helper-func'))
+from helper_func.llm_client import SimpleLLMAgent
+from helper_func.token_budget import STAGE_BUDGETS, fit_sections
+from helper_func.readiness import create_readiness_protocol
+
+
+def create_fused_evaluator_agent(port=8008, seed="fused_evaluator_seed"):
+    """Factory function to create a fused evaluator agent, which parses,
+    evaluates and decides on a candidate in a single LLM call"""
+
+    # ALWAYS use descriptive names and unique seeds
+    agent = Agent(
+        name="fused_evaluator",
+        seed=seed,
+        port=port,
+        endpoint=[f"http://localhost:{port}/submit"],
+        mailbox=False  # Local development
+    )
+
+    # Initialize LLM client and database client
+    llm_agent = SimpleLLMAgent("fused_evaluator")
+    db_client = HiringEvaluationsClient()
+
+    # ALWAYS version your protocols
+    protocol = Protocol(name="fused_evaluator_protocol", version="1.0")
+
+    @agent.on_event("startup")
+    async def startup(ctx: Context):
+        """Agent startup handler"""
+        ctx.logger.info(f"🚀 {agent.name} started successfully!")
+        ctx.logger.info(f"📍 Agent address: {agent.address}")
+        ctx.logger.info(f"⚡ Ready to screen candidates in one pass")
+
+    @agent.on_event("shutdown")
+    async def shutdown(ctx: Context):
+        """Agent shutdown handler"""
+        ctx.logger.info(f"🛑 {agent.name} shutting down...")
+
+    def _failed_response(msg: FusedEvaluationRequest, error: StageError) -> FusedEvaluationResponse:
+        """Empty response carrying the error, so no made-up data is reported"""
+        failed = f"Fused evaluation failed: {error.message}"
+        return FusedEvaluationResponse(
+            job_analysis=JobParseResponse(
+                job_title=msg.job_title,
+                required_skills=[],
+                preferred_skills=[],
+                experience_level="Unknown",
+                key_requirements=[],
+                analysis=failed,
+            ),
+            resume_analysis=ResumeParseResponse(
+                candidate_name=msg.candidate_name,
+                skills=[],
+                experience_years=0,
+                experience_level="Unknown",
+                key_achievements=[],
+                analysis=failed,
+            ),
+            intersection_analysis=IntersectionResponse(
+                analysis=failed,
+                overall_compatibility=0.0,
+                skill_matches=[],
+                skill_gaps=[],
+                experience_match="poor",
+            ),
+            decision=DecisionResponse(
+                decision="no_hire",
+                confidence=0.0,
+                reasoning=Reasoning(summary=failed, pros=[], cons=[]),
+                key_factors=[],
+            ),
+            evaluation_id=msg.evaluation_id,
+            error=error,
+        )
+
+    @protocol.on_message(model=FusedEvaluationRequest, replies=FusedEvaluationResponse)
+    async def handle_fused_evaluation(ctx: Context, sender: str, msg: FusedEvaluationRequest):
+        """Handle incoming fused evaluation requests"""
+        ctx.logger.info(f"⚡ {agent.name}: Screening {msg.candidate_name} for {msg.job_title}")
+
+        # The job description is cut before the resume
+        budget = STAGE_BUDGETS["fused"]
+        fitted, truncated = fit_sections(
+            {
+                "description": (msg.job_description, 1),
+                "resume": (msg.resume_content, 2),
+            },
+            budget.input_tokens,
+        )
+        if truncated:
+            ctx.logger.info(
+                f"✂️ {agent.name}: Cut {', '.join(truncated)} to fit {budget.input_tokens} tokens"
+            )
+
+        prompt = f"""
+        Screen a candidate for a job in one pass.
+
+        Job Title: {msg.job_title}
+        Job Description:
+        {fitted["description"]}
+
+        Candidate Name: {msg.candidate_name}
+        Resume Content:
+        {fitted["resume"]}
+
+        Produce, in order:
+        1. job_analysis: the required and preferred skills, experience level and key requirements of the job
+        2. resume_analysis: the candidate's skills, years and level of experience and key achievements
+        3. intersection_analysis: skill matches and gaps, experience compatibility and an overall compatibility score (0.0 to 1.0)
+        4. decision: weigh the strengths against the weaknesses and make a final, well-reasoned hiring decision, with a detailed summary and lists of pros and cons
+        """
+
+        result = await llm_agent.query_llm(
+            prompt,
+            use_cache=msg.attempt == 0,
+            response_model=FusedEvaluationResponse,
+            agent_fields=("job_analysis.job_title", "resume_analysis.candidate_name"),
+            max_output_tokens=budget.output_tokens,
+            stage="fused",
+        )
+
+        if result["success"]:
+            try:
+                nested = {"evaluation_id": msg.evaluation_id}
+                response = llm_agent.parse_model(
+                    result["content"],
+                    FusedEvaluationResponse,
+                    evaluation_id=msg.evaluation_id,
+                    usage=TokenUsage(**result.get("usage", {})),
+                    job_analysis={**nested, "job_title": msg.job_title},
+                    resume_analysis={**nested, "candidate_name": msg.candidate_name},
+                    intersection_analysis=nested,
+                    decision=nested,
+                )
+                llm_agent.cache_result(result)
+            except ValueError as e:
+                ctx.logger.error(f"❌ {agent.name}: Invalid LLM response: {e}")
+                response = _failed_response(
+                    msg,
+                    StageError(
+                        kind="parse_error",
+                        message=f"Invalid LLM response: {e}",
+                        retryable=True,
+                    ),
+                )
+                await ctx.send(sender, response)
+                return
+
+            try:
+                decision = response.decision
+                ctx.logger.info(
+                    f"⚡ {agent.name}: Screening complete ({decision.decision}, {decision.confidence:.2f})"
+                )
+
+                # Same bar for top_candidates as the decision agent; with no
+                # debate, strengths and concerns come from the reasoning
+                if qualifies_as_top_candidate(decision):
+                    await save_top_candidate(
+                        db_client,
+                        agent.name,
+                        msg.candidate_name,
+                        msg.job_title,
+                        response.intersection_analysis,
+                        decision,
+                        decision.confidence * 100,
+                        decision.reasoning.pros,
+                        decision.reasoning.cons,
+                    )
+
+                await ctx.send(sender, response)
+
+            except Exception as e:
+                ctx.logger.error(f"❌ {agent.name}: Error processing response: {e}")
+                response = _failed_response(
+                    msg, StageError(kind="processing_error", message=str(e))
+                )
+                await ctx.send(sender, response)
+        else:
+            response = _failed_response(
+                msg,
+                StageError(
+                    kind="api_error",
+                    message=result["content"],
+                    retryable=result.get("retryable", False),
+                ),
+            )
+            await ctx.send(sender, response)
+
+    # Include the protocol in the agent
+    agent.include(protocol, publish_manifest=True)
+    agent.include(create_readiness_protocol(agent.name))
+
+    return agent
+
+
+if __name__ == "__main__":
+    # Create default instance for direct use (not at import time, so importing
+    # the factory doesn't register a second agent under the same address)
+    fused_evaluator_agent = create_fused_evaluator_agent()
+    fused_evaluator_agent.run()
@@ -3,24 +3,28 @@ from uagents import Agent, Context, Protocol
 from datetime import datetime, UTC
 import sys
 import os
+from typing import Optional
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.models import IntersectionRequest, IntersectionResponse
+from models.models import IntersectionRequest, IntersectionResponse, StageError, StreamDelta, TokenUsage
 
 # Import from helper-func directory
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helper-func'))
 from helper_func.llm_client import SimpleLLMAgent
+from helper_func.prompt_context import analyses_context
+from helper_func.token_budget import STAGE_BUDGETS
+from helper_func.readiness import create_readiness_protocol
 
 
-def create_intersection_agent(port=8003):
+def create_intersection_agent(port=8003, seed="intersection_seed"):
     """Factory function to create an intersection evaluation agent"""
 
     # ALWAYS use descriptive names and unique seeds
     agent = Agent(
         name="intersection_evaluator",
-        seed="intersection_seed",
+        seed=seed,
         port=port,
         endpoint=[f"http://localhost:{port}/submit"],
         mailbox=False  # Local development
@@ -44,102 +48,111 @@ def create_intersection_agent(port=8003):
         """Agent shutdown handler"""
         ctx.logger.info(f"🛑 {agent.name} shutting down...")
 
+    def _failed_response(msg: IntersectionRequest, error: StageError) -> IntersectionResponse:
+        """Empty response carrying the error, so no made-up data reaches later stages"""
+        return IntersectionResponse(
+            evaluation_id=msg.evaluation_id,
+            analysis=f"Intersection evaluation failed: {error.message}",
+            overall_compatibility=0.0,
+            skill_matches=[],
+            skill_gaps=[],
+            experience_match="unknown",
+            error=error,
+        )
+
     @protocol.on_message(model=IntersectionRequest, replies=IntersectionResponse)
     async def handle_intersection(ctx: Context, sender: str, msg: IntersectionRequest):
         """Handle incoming intersection evaluation requests"""
         ctx.logger.info(f"🔍 {agent.name}: Evaluating intersection")
 
-        prompt = f"""
-        Evaluate the intersection between job requirements and candidate profile.
-
-        Job Analysis:
-        {msg.job_analysis.analysis}
-        Required Skills: {', '.join(msg.job_analysis.required_skills)}
-        Preferred Skills: {', '.join(msg.job_analysis.preferred_skills)}
-        Experience Level: {msg.job_analysis.experience_level}
+        # The analyses go first, as the same text the debate and decision
+        # context starts with, so those calls share a prefix with this one
+        budget = STAGE_BUDGETS["intersection"]
+        analyses, truncated = analyses_context(msg.job_analysis, msg.resume_analysis)
+        if truncated:
+            ctx.logger.info(
+                f"✂️ {agent.name}: Cut {', '.join(truncated)} to fit {budget.input_tokens} tokens"
+            )
 
-        Resume Analysis:
-        {msg.resume_analysis.analysis}
-        Skills: {', '.join(msg.resume_analysis.skills)}
-        Experience: {msg.resume_analysis.experience_years} years ({msg.resume_analysis.experience_level})
+        prompt = f"""{analyses}
 
-        Evaluate:
+        Evaluate the intersection between the job requirements and the candidate profile above:
         1. Skill matches and gaps
         2. Experience level compatibility
         3. Overall compatibility score (0.0 to 1.0)
-
-        Respond with ONLY a JSON object in this exact format:
-        {{
-            "analysis": "<detailed analysis of the intersection>",
-            "overall_compatibility": <0.0 to 1.0>,
-            "skill_matches": ["match1", "match2"],
-            "skill_gaps": ["gap1", "gap2"],
-            "experience_match": "<excellent/good/fair/poor>"
-        }}
         """
 
-        result = await llm_agent.query_llm(prompt)
+        async def forward_delta(field: str, text: Optional[str]):
+            """Stream the analysis to the coordinator while it is written"""
+            if field == "analysis":
+                await ctx.send(
+                    sender,
+                    StreamDelta(
+                        position="evaluation",
+                        field=field,
+                        text=text or "",
+                        evaluation_id=msg.evaluation_id,
+                        reset=text is None,
+                    ),
+                )
+
+        result = await llm_agent.query_llm(
+            prompt,
+            use_cache=msg.attempt == 0,
+            on_delta=forward_delta if msg.stream else None,
+            response_model=IntersectionResponse,
+            max_output_tokens=budget.output_tokens,
+            stage="intersection",
+        )
 
         if result["success"]:
             try:
-                analysis = llm_agent.parse_json_response(result["content"])
-
-                if analysis:
-                    response = IntersectionResponse(
-                        analysis=analysis.get(
-                            "analysis", "Intersection analysis completed"
-                        ),
-                        overall_compatibility=analysis.get(
-                            "overall_compatibility", 0.7
-                        ),
-                        skill_matches=analysis.get(
-                            "skill_matches", ["python", "javascript"]
-                        ),
-                        skill_gaps=analysis.get("skill_gaps", ["microservices"]),
-                        experience_match=analysis.get("experience_match", "good"),
-                    )
-                else:
-                    response = IntersectionResponse(
-                        analysis="Default intersection analysis",
-                        overall_compatibility=0.7,
-                        skill_matches=["python", "javascript"],
-                        skill_gaps=["microservices"],
-                        experience_match="good",
-                    )
-
+                response = llm_agent.parse_model(
+                    result["content"],
+                    IntersectionResponse,
+                    evaluation_id=msg.evaluation_id,
+                    usage=TokenUsage(**result.get("usage", {})),
+                )
+                llm_agent.cache_result(result)
                 ctx.logger.info(f"🔍 {agent.name}: Intersection evaluation complete")
-                await ctx.send(sender, response)
-
+            except ValueError as e:
+                ctx.logger.error(f"❌ {agent.name}: Invalid LLM response: {e}")
+                response = _failed_response(
+                    msg,
+                    StageError(
+                        kind="parse_error",
+                        message=f"Invalid LLM response: {e}",
+                        retryable=True,
+                    ),
+                )
             except Exception as e:
                 ctx.logger.error(f"❌ {agent.name}: Error processing response: {e}")
-                response = IntersectionResponse(
-                    analysis="Error processing response, using defaults",
-                    overall_compatibility=0.7,
-                    skill_matches=["python", "javascript"],
-                    skill_gaps=["microservices"],
-                    experience_match="good",
+                response = _failed_response(
+                    msg, StageError(kind="processing_error", message=str(e))
                 )
-                await ctx.send(sender, response)
+            await ctx.send(sender, response)
         else:
-            response = IntersectionResponse(
-                analysis=f"API Error: {result['content']}",
-                overall_compatibility=0.7,
-                skill_matches=["python", "javascript"],
-                skill_gaps=["microservices"],
-                experience_match="good",
+            response = _failed_response(
+                msg,
+                StageError(
+                    kind="api_error",
+                    message=result["content"],
+                    retryable=result.get("retryable", False),
+                ),
             )
             await ctx.send(sender, response)
 
     # Include the protocol in the agent
     agent.include(protocol, publish_manifest=True)
+    agent.include(create_readiness_protocol(agent.name))
 
     return agent
 
-# Create default instance for direct use
-intersection_agent = create_intersection_agent()
-
-
 if __name__ == "__main__":
+    # Create default instance for direct use (not at import time, so importing
+    # the factory doesn't register a second agent under the same address)
+    intersection_agent = create_intersection_agent()
+
     print("""
 🤖 Starting Intersection Evaluator Agent...
 
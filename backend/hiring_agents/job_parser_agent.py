@@ -8,21 +8,23 @@ import json
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.models import JobParseRequest, JobParseResponse
+from models.models import JobParseRequest, JobParseResponse, StageError, TokenUsage
 
 # Import from helper-func directory
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helper-func'))
 
 from helper_func.llm_client import SimpleLLMAgent
+from helper_func.token_budget import STAGE_BUDGETS, fit_sections
+from helper_func.readiness import create_readiness_protocol
 
 
-def create_job_parser_agent(port=8001):
+def create_job_parser_agent(port=8001, seed="job_parser_seed"):
     """Factory function to create a job parser agent"""
 
     # ALWAYS use descriptive names and unique seeds
     agent = Agent(
         name="job_parser",
-        seed="job_parser_seed",
+        seed=seed,
         port=port,
         endpoint=[f"http://localhost:{port}/submit"],
         mailbox=False  # Local development
@@ -46,100 +48,102 @@ def create_job_parser_agent(port=8001):
         """Agent shutdown handler"""
         ctx.logger.info(f"🛑 {agent.name} shutting down...")
 
+    def _failed_response(msg: JobParseRequest, error: StageError) -> JobParseResponse:
+        """Empty response carrying the error, so no made-up data reaches later stages"""
+        return JobParseResponse(
+            evaluation_id=msg.evaluation_id,
+            job_title=msg.job_title,
+            required_skills=[],
+            preferred_skills=[],
+            experience_level="Unknown",
+            key_requirements=[],
+            analysis=f"Job parsing failed: {error.message}",
+            error=error,
+        )
+
     @protocol.on_message(model=JobParseRequest, replies=JobParseResponse)
     async def handle_job_parse(ctx: Context, sender: str, msg: JobParseRequest):
         """Handle incoming job parsing requests"""
         ctx.logger.info(f"💼 {agent.name}: Parsing job description for {msg.job_title}")
 
+        budget = STAGE_BUDGETS["job_parse"]
+        fitted, truncated = fit_sections(
+            {"description": (msg.job_description, 1)}, budget.input_tokens
+        )
+        if truncated:
+            ctx.logger.info(
+                f"✂️ {agent.name}: Job description cut to fit {budget.input_tokens} tokens"
+            )
+
         prompt = f"""
         Analyze the following job description and extract key information.
 
         Job Title: {msg.job_title}
         Job Description:
-        {msg.job_description}
+        {fitted["description"]}
 
         Extract and analyze:
         1. Required skills (must-have technical skills)
         2. Preferred skills (nice-to-have skills)
         3. Experience level (Junior, Mid-level, Senior)
         4. Key requirements and responsibilities
-
-        Respond with ONLY a JSON object in this exact format:
-        {{
-            "required_skills": ["skill1", "skill2"],
-            "preferred_skills": ["skill3", "skill4"],
-            "experience_level": "<Junior/Mid-level/Senior>",
-            "key_requirements": ["req1", "req2"],
-            "analysis": "<brief analysis of the job requirements>"
-        }}
         """
 
-        result = await llm_agent.query_llm(prompt)
+        result = await llm_agent.query_llm(
+            prompt,
+            use_cache=msg.attempt == 0,
+            response_model=JobParseResponse,
+            agent_fields=("job_title",),
+            max_output_tokens=budget.output_tokens,
+            stage="job_parse",
+        )
 
         if result["success"]:
             try:
-                analysis = llm_agent.parse_json_response(result["content"])
-
-                if analysis:
-                    response = JobParseResponse(
-                        job_title=msg.job_title,
-                        required_skills=analysis.get(
-                            "required_skills", ["python", "javascript"]
-                        ),
-                        preferred_skills=analysis.get(
-                            "preferred_skills", ["react"]
-                        ),
-                        experience_level=analysis.get(
-                            "experience_level", "Mid-level"
-                        ),
-                        key_requirements=analysis.get(
-                            "key_requirements", ["web development"]
-                        ),
-                        analysis=analysis.get("analysis", "Job analysis completed"),
-                    )
-                else:
-                    response = JobParseResponse(
-                        job_title=msg.job_title,
-                        required_skills=["python", "javascript"],
-                        preferred_skills=["react"],
-                        experience_level="Mid-level",
-                        key_requirements=["web development"],
-                        analysis="Failed to parse LLM response, using defaults",
-                    )
-
+                response = llm_agent.parse_model(
+                    result["content"],
+                    JobParseResponse,
+                    evaluation_id=msg.evaluation_id,
+                    usage=TokenUsage(**result.get("usage", {})),
+                    job_title=msg.job_title,
+                )
+                llm_agent.cache_result(result)
                 ctx.logger.info(f"💼 {agent.name}: Job parsing complete")
-                await ctx.send(sender, response)
-
+            except ValueError as e:
+                ctx.logger.error(f"❌ {agent.name}: Invalid LLM response: {e}")
+                response = _failed_response(
+                    msg,
+                    StageError(
+                        kind="parse_error",
+                        message=f"Invalid LLM response: {e}",
+                        retryable=True,
+                    ),
+                )
             except Exception as e:
                 ctx.logger.error(f"❌ {agent.name}: Error processing response: {e}")
-                response = JobParseResponse(
-                    job_title=msg.job_title,
-                    required_skills=["python", "javascript"],
-                    preferred_skills=["react"],
-                    experience_level="Mid-level",
-                    key_requirements=["web development"],
-                    analysis="Error processing response, using defaults",
+                response = _failed_response(
+                    msg, StageError(kind="processing_error", message=str(e))
                 )
-                await ctx.send(sender, response)
+            await ctx.send(sender, response)
         else:
-            response = JobParseResponse(
-                job_title=msg.job_title,
-                required_skills=["python", "javascript"],
-                preferred_skills=["react"],
-                experience_level="Mid-level",
-                key_requirements=["web development"],
-                analysis=f"API Error: {result['content']}",
+            response = _failed_response(
+                msg,
+                StageError(
+                    kind="api_error",
+                    message=result["content"],
+                    retryable=result.get("retryable", False),
+                ),
             )
             await ctx.send(sender, response)
 
     # Include the protocol in the agent
     agent.include(protocol, publish_manifest=True)
+    agent.include(create_readiness_protocol(agent.name))
 
     return agent
 
-# Create default instance for direct use
-job_parser_agent = create_job_parser_agent()
-
-
 if __name__ == "__main__":
+    # Create default instance for direct use (not at import time, so importing
+    # the factory doesn't register a second agent under the same address)
+    job_parser_agent = create_job_parser_agent()
     job_parser_agent.run()
@@ -3,23 +3,27 @@ from uagents import Agent, Context, Protocol
 from datetime import datetime, UTC
 import sys
 import os
+from typing import Optional
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.models import DebateRequest, DebateResponse
+from models.models import DebateRequest, DebateResponse, StageError, StreamDelta, TokenUsage
 
 # Import from helper-func directory
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helper-func'))
 from helper_func.llm_client import SimpleLLMAgent
+from helper_func.token_budget import STAGE_BUDGETS, fit_sections
+from helper_func.prompt_context import evaluation_context
+from helper_func.readiness import create_readiness_protocol
 
-def create_pro_hire_agent(port=8004):
+def create_pro_hire_agent(port=8004, seed="pro_hire_seed"):
     """Factory function to create a pro-hire advocate agent"""
 
     # ALWAYS use descriptive names and unique seeds
     agent = Agent(
         name="pro_hire_advocate",
-        seed="pro_hire_seed",
+        seed=seed,
         port=port,
         endpoint=[f"http://localhost:{port}/submit"],
         mailbox=False  # Local development
@@ -43,6 +47,18 @@ def create_pro_hire_agent(port=8004):
         """Agent shutdown handler"""
         ctx.logger.info(f"🛑 {agent.name} shutting down...")
 
+    def _failed_response(msg: DebateRequest, error: StageError) -> DebateResponse:
+        """Empty response carrying the error, so no made-up data reaches later stages"""
+        return DebateResponse(
+            evaluation_id=msg.evaluation_id,
+            round_number=msg.round_number,
+            position="pro",
+            argument="",
+            confidence=0.0,
+            key_points=[],
+            error=error,
+        )
+
     @protocol.on_message(model=DebateRequest, replies=DebateResponse)
     async def handle_debate(ctx: Context, sender: str, msg: DebateRequest):
         """Handle incoming debate requests and build pro-hire arguments"""
@@ -50,83 +66,104 @@ def create_pro_hire_agent(port=8004):
             f"✅ {agent.name}: Building pro-hire argument (round {msg.round_number})"
         )
 
+        # The analyses are the same for every debate turn, so they go first
+        # as the (cacheable) context; the argument to rebut has the input
+        # budget to itself
+        budget = STAGE_BUDGETS["debate"]
+        context, truncated = evaluation_context(
+            msg.job_analysis, msg.resume_analysis, msg.intersection_analysis
+        )
+        fitted, cut = fit_sections(
+            {"previous_argument": (msg.previous_argument, 1)}, budget.input_tokens
+        )
+        truncated += cut
+        if truncated:
+            ctx.logger.info(
+                f"✂️ {agent.name}: Cut {', '.join(truncated)} to fit {budget.input_tokens} tokens"
+            )
+
         prompt = f"""
         You are a pro-hire advocate. Build a compelling argument for hiring this candidate.
 
-        Intersection Analysis:
-        {msg.intersection_analysis.analysis}
-        Overall Compatibility: {msg.intersection_analysis.overall_compatibility}
-        Skill Matches: {', '.join(msg.intersection_analysis.skill_matches)}
-        Skill Gaps: {', '.join(msg.intersection_analysis.skill_gaps)}
-
-        Previous Anti-Hire Argument: {msg.previous_argument}
+        Previous Anti-Hire Argument: {fitted["previous_argument"]}
 
         Build a strong pro-hire argument for round {msg.round_number}.
         Focus on the candidate's strengths and how they outweigh any concerns.
-
-        Respond with ONLY a JSON object in this exact format:
-        {{
-            "argument": "<your pro-hire argument>",
-            "confidence": <0.0 to 1.0>,
-            "key_points": ["point1", "point2", "point3"]
-        }}
         """
 
-        result = await llm_agent.query_llm(prompt)
+        async def forward_delta(field: str, text: Optional[str]):
+            """Stream the argument to the coordinator while it is written"""
+            if field == "argument":
+                await ctx.send(
+                    sender,
+                    StreamDelta(
+                        position="pro",
+                        field=field,
+                        text=text or "",
+                        round_number=msg.round_number,
+                        evaluation_id=msg.evaluation_id,
+                        reset=text is None,
+                    ),
+                )
+
+        result = await llm_agent.query_llm(
+            prompt,
+            use_cache=msg.attempt == 0,
+            on_delta=forward_delta if msg.stream else None,
+            response_model=DebateResponse,
+            agent_fields=("position", "round_number"),
+            max_output_tokens=budget.output_tokens,
+            stage="debate",
+            context=context,
+        )
 
         if result["success"]:
             try:
-                analysis = llm_agent.parse_json_response(result["content"])
-
-                if analysis:
-                    response = DebateResponse(
-                        position="pro",
-                        argument=analysis.get(
-                            "argument",
-                            "Candidate has strong technical skills and relevant experience",
-                        ),
-                        confidence=analysis.get("confidence", 0.8),
-                        key_points=analysis.get(
-                            "key_points", ["Technical skills", "Experience level"]
-                        ),
-                    )
-                else:
-                    response = DebateResponse(
-                        position="pro",
-                        argument="Candidate has strong technical skills and relevant experience",
-                        confidence=0.8,
-                        key_points=["Technical skills", "Experience level"],
-                    )
-
+                response = llm_agent.parse_model(
+                    result["content"],
+                    DebateResponse,
+                    evaluation_id=msg.evaluation_id,
+                    usage=TokenUsage(**result.get("usage", {})),
+                    position="pro",
+                    round_number=msg.round_number,
+                )
+                llm_agent.cache_result(result)
                 ctx.logger.info(f"✅ {agent.name}: Pro-hire argument complete")
-                await ctx.send(sender, response)
-
+            except ValueError as e:
+                ctx.logger.error(f"❌ {agent.name}: Invalid LLM response: {e}")
+                response = _failed_response(
+                    msg,
+                    StageError(
+                        kind="parse_error",
+                        message=f"Invalid LLM response: {e}",
+                        retryable=True,
+                    ),
+                )
             except Exception as e:
                 ctx.logger.error(f"❌ {agent.name}: Error processing response: {e}")
-                response = DebateResponse(
-                    position="pro",
-                    argument="Candidate has strong technical skills and relevant experience",
-                    confidence=0.8,
-                    key_points=["Technical skills", "Experience level"],
+                response = _failed_response(
+                    msg, StageError(kind="processing_error", message=str(e))
                 )
-                await ctx.send(sender, response)
+            await ctx.send(sender, response)
         else:
-            response = DebateResponse(
-                position="pro",
-                argument="Candidate has strong technical skills and relevant experience",
-                confidence=0.8,
-                key_points=["Technical skills", "Experience level"],
+            response = _failed_response(
+                msg,
+                StageError(
+                    kind="api_error",
+                    message=result["content"],
+                    retryable=result.get("retryable", False),
+                ),
             )
             await ctx.send(sender, response)
 
     # Include the protocol in the agent
     agent.include(protocol, publish_manifest=True)
+    agent.include(create_readiness_protocol(agent.name))
 
     return agent
 
-# Create default instance for direct use
-pro_hire_agent = create_pro_hire_agent()
-
-
 if __name__ == "__main__":
+    # Create default instance for direct use (not at import time, so importing
+    # the factory doesn't register a second agent under the same address)
+    pro_hire_agent = create_pro_hire_agent()
     pro_hire_agent.run()
@@ -7,20 +7,22 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.models import ResumeParseRequest, ResumeParseResponse
+from models.models import ResumeParseRequest, ResumeParseResponse, StageError, TokenUsage
 
 # Import from helper-func directory
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helper-func'))
 from helper_func.llm_client import SimpleLLMAgent
+from helper_func.token_budget import STAGE_BUDGETS, fit_sections
+from helper_func.readiness import create_readiness_protocol
 
 
-def create_resume_parser_agent(port=8002):
+def create_resume_parser_agent(port=8002, seed="resume_parser_seed"):
     """Factory function to create a resume parser agent"""
 
     # ALWAYS use descriptive names and unique seeds
     agent = Agent(
         name="resume_parser",
-        seed="resume_parser_seed",
+        seed=seed,
         port=port,
         endpoint=[f"http://localhost:{port}/submit"],
         mailbox=False  # Local development
@@ -44,95 +46,98 @@ def create_resume_parser_agent(port=8002):
         """Agent shutdown handler"""
         ctx.logger.info(f"🛑 {agent.name} shutting down...")
 
+    def _failed_response(msg: ResumeParseRequest, error: StageError) -> ResumeParseResponse:
+        """Empty response carrying the error, so no made-up data reaches later stages"""
+        return ResumeParseResponse(
+            evaluation_id=msg.evaluation_id,
+            candidate_name=msg.candidate_name,
+            skills=[],
+            experience_years=0,
+            experience_level="Unknown",
+            key_achievements=[],
+            analysis=f"Resume parsing failed: {error.message}",
+            error=error,
+        )
+
     @protocol.on_message(model=ResumeParseRequest, replies=ResumeParseResponse)
     async def handle_resume_parse(ctx: Context, sender: str, msg: ResumeParseRequest):
         """Handle incoming resume parsing requests"""
         ctx.logger.info(f"📄 {agent.name}: Parsing resume for {msg.candidate_name}")
 
+        budget = STAGE_BUDGETS["resume_parse"]
+        fitted, truncated = fit_sections(
+            {"resume": (msg.resume_content, 1)}, budget.input_tokens
+        )
+        if truncated:
+            ctx.logger.info(
+                f"✂️ {agent.name}: Resume cut to fit {budget.input_tokens} tokens"
+            )
+
         # The content and rules for the LLM (Protocol)
         prompt = f"""
         Analyze the following resume and extract key information.
 
         Candidate Name: {msg.candidate_name}
         Resume Content:
-        {msg.resume_content}
+        {fitted["resume"]}
 
         Extract and analyze:
         1. Technical skills (programming languages, frameworks, tools)
         2. Years of experience
         3. Experience level (Junior, Mid-level, Senior)
         4. Key achievements and accomplishments
-
-        Respond with ONLY a JSON object in this exact format:
-        {{
-            "skills": ["skill1", "skill2", "skill3"],
-            "experience_years": <number>,
-            "experience_level": "<Junior/Mid-level/Senior>",
-            "key_achievements": ["achievement1", "achievement2"],
-            "analysis": "<brief analysis of the candidate's profile>"
-        }}
         """
 
-        result = await llm_agent.query_llm(prompt)
+        result = await llm_agent.query_llm(
+            prompt,
+            use_cache=msg.attempt == 0,
+            response_model=ResumeParseResponse,
+            agent_fields=("candidate_name",),
+            max_output_tokens=budget.output_tokens,
+            stage="resume_parse",
+        )
 
         if result["success"]:
             try:
-                analysis = llm_agent.parse_json_response(result["content"])
-
-                if analysis:
-                    response = ResumeParseResponse(
-                        candidate_name=msg.candidate_name,
-                        skills=analysis.get(
-                            "skills", ["python", "javascript", "react"]
-                        ),
-                        experience_years=analysis.get("experience_years", 3),
-                        experience_level=analysis.get(
-                            "experience_level", "Mid-level"
-                        ),
-                        key_achievements=analysis.get(
-                            "key_achievements", ["Led development team"]
-                        ),
-                        analysis=analysis.get(
-                            "analysis", "Resume analysis completed"
-                        ),
-                    )
-                else:
-                    response = ResumeParseResponse(
-                        candidate_name=msg.candidate_name,
-                        skills=["python", "javascript", "react"],
-                        experience_years=3,
-                        experience_level="Mid-level",
-                        key_achievements=["Led development team"],
-                        analysis="Failed to parse LLM response, using defaults",
-                    )
-
+                response = llm_agent.parse_model(
+                    result["content"],
+                    ResumeParseResponse,
+                    evaluation_id=msg.evaluation_id,
+                    usage=TokenUsage(**result.get("usage", {})),
+                    candidate_name=msg.candidate_name,
+                )
+                llm_agent.cache_result(result)
                 ctx.logger.info(f"📄 {agent.name}: Resume parsing complete")
-                await ctx.send(sender, response)
-
+            except ValueError as e:
+                ctx.logger.error(f"❌ {agent.name}: Invalid LLM response: {e}")
+                response = _failed_response(
+                    msg,
+                    StageError(
+                        kind="parse_error",
+                        message=f"Invalid LLM response: {e}",
+                        retryable=True,
+                    ),
+                )
             except Exception as e:
                 ctx.logger.error(f"❌ {agent.name}: Error processing response: {e}")
-                response = ResumeParseResponse(
-                    candidate_name=msg.candidate_name,
-                    skills=["python", "javascript", "react"],
-                    experience_years=3,
-                    experience_level="Mid-level",
-                    key_achievements=["Led development team"],
-                    analysis="Error processing response, using defaults",
+                response = _failed_response(
+                    msg, StageError(kind="processing_error", message=str(e))
                 )
-                await ctx.send(sender, response)
+            await ctx.send(sender, response)
         else:
-            response = ResumeParseResponse(
-                candidate_name=msg.candidate_name,
-                skills=["python", "javascript", "react"],
-                experience_years=3,
-                experience_level="Mid-level",
-                key_achievements=["Led development team"],
-                analysis=f"API Error: {result['content']}",
+            response = _failed_response(
+                msg,
+                StageError(
+                    kind="api_error",
+                    message=result["content"],
+                    retryable=result.get("retryable", False),
+                ),
             )
             await ctx.send(sender, response)
 
     # Include the protocol in the agent
     agent.include(protocol, publish_manifest=True)
+    agent.include(create_readiness_protocol(agent.name))
 
     return agent
 
@@ -144,9 +149,8 @@ class ResumeParserAgent:
         return create_resume_parser_agent(port)
 
 
-# Create default instance for direct use
-resume_parser_agent = create_resume_parser_agent()
-
-
 if __name__ == "__main__":
+    # Create default instance for direct use (not at import time, so importing
+    # the factory doesn't register a second agent under the same address)
+    resume_parser_agent = create_resume_parser_agent()
     resume_parser_agent.run()
@@ -3,7 +3,8 @@ import asyncio
 import sys
 import os
 import logging
-from uagents import Agent, Context, Protocol
+import uuid
+from uagents.dispatch import dispatcher
 
 # Suppress uAgents network errors (we run in local mode)
 logging.getLogger("uagents.network").setLevel(logging.CRITICAL)
@@ -18,266 +19,333 @@ from hiring_agents.intersection_agent import create_intersection_agent
 from hiring_agents.pro_hire_agent import create_pro_hire_agent
 from hiring_agents.anti_hire_agent import create_anti_hire_agent
 from hiring_agents.decision_agent import create_decision_agent
-
-
-from models.models import (
-    JobParseRequest,
-    ResumeParseRequest,
-    IntersectionRequest,
-    DebateRequest,
-    DecisionRequest,
-    JobParseResponse,
-    ResumeParseResponse,
-    IntersectionResponse,
-    DebateResponse,
-    DecisionResponse,
-    TranscriptEntry,
-    FinalResult,
+from hiring_agents.fused_evaluator_agent import create_fused_evaluator_agent
+from hiring_agents.coordinator_agent import (
+    create_coordinator_agent,
+    debate_timeout,
+    EvaluationSession,
 )
+from helper_func.message_bus import LocalMessageBus
+from helper_func.llm_client import close_http_session
+from db.checkpoint_store import CheckpointStore
 
 
-# Main Coordinator
-class HiringCoordinator(Agent):
-    def __init__(self, event_emitter=None, base_port=8007):
-        super().__init__("hiring_coordinator", base_port, "coordinator_seed")
-        # fund_agent_if_low(self.wallet.address())  # Disabled for local operation
-
-        # Store event emitter for real-time updates
-        self.event_emitter = event_emitter
-
-        # Store agent addresses
-        self.job_parser_address = None
-        self.resume_parser_address = None
-        self.intersection_address = None
-        self.pro_hire_address = None
-        self.anti_hire_address = None
-        self.decision_address = None
-
-        # Store results
-        self.job_analysis = None
-        self.resume_analysis = None
-        self.intersection_analysis = None
-        self.pro_arguments = []
-        self.anti_arguments = []
-        self.final_decision = None
-
-        # Add completion flags
-        self.job_complete = False
-        self.resume_complete = False
-        self.intersection_complete = False
-        self.debate_complete = False
-        self.decision_complete = False
-
-        # Add flag to prevent duplicate requests
-        self.initial_requests_sent = False
-
-        # Store initial data
-        self.resume_content = None
-        self.job_description = None
-        self.candidate_name = None
-        self.job_title = None
-
-        self.protocol = Protocol()
-
-        # Timer to send initial requests after startup
-        @self.on_interval(period=3.0)
-        async def send_initial_requests(ctx: Context):
-            if (
-                not self.initial_requests_sent
-                and self.job_description
-                and self.resume_content
-            ):
-                print("🤖 Starting Hiring Evaluation Process")
-                print("=" * 60)
-                print("\n📋 STEP 1: Parsing Job and Resume")
-
-                # Send initial requests
-                job_request = JobParseRequest(
-                    job_description=self.job_description, job_title=self.job_title
-                )
-                await ctx.send(self.job_parser_address, job_request)
+from models.models import EvaluationOptions, TranscriptEntry, FinalResult
 
-                resume_request = ResumeParseRequest(
-                    resume_content=self.resume_content,
-                    candidate_name=self.candidate_name,
-                )
-                await ctx.send(self.resume_parser_address, resume_request)
-
-                # Mark as sent to prevent duplicates
-                self.initial_requests_sent = True
-
-        # Handle responses from each agent
-        @self.protocol.on_message(model=JobParseResponse)
-        async def handle_job_response(ctx: Context, sender: str, msg: JobParseResponse):
-            self.job_analysis = msg
-            self.job_complete = True
-            print(f"Job Analysis: {msg.analysis}")
-
-            # Emit WebSocket event
-            if self.event_emitter:
-                await self.event_emitter("Job Parser Agent", msg.analysis, "parsing")
-
-            await self._check_and_proceed(ctx)
-
-        @self.protocol.on_message(model=ResumeParseResponse)
-        async def handle_resume_response(
-            ctx: Context, sender: str, msg: ResumeParseResponse
-        ):
-            self.resume_analysis = msg
-            self.resume_complete = True
-            print(f"Resume Analysis: {msg.analysis}")
-
-            # Emit WebSocket event
-            if self.event_emitter:
-                await self.event_emitter("Resume Parser Agent", msg.analysis, "parsing")
-
-            await self._check_and_proceed(ctx)
-
-        @self.protocol.on_message(model=IntersectionResponse)
-        async def handle_intersection_response(
-            ctx: Context, sender: str, msg: IntersectionResponse
-        ):
-            self.intersection_analysis = msg
-            self.intersection_complete = True
-            print(f"\n🔍 STEP 2: Evaluating Intersection")
-            print(f"Intersection Analysis: {msg.analysis}")
-            print(f"Overall Compatibility: {msg.overall_compatibility:.2f}")
-
-            # Emit WebSocket event
-            if self.event_emitter:
-                await self.event_emitter(
-                    "Intersection Evaluator", msg.analysis, "evaluation", "evaluation"
-                )
 
-            await self._start_debate(ctx)
+def _build_final_result(session: EvaluationSession):
+    """Assemble the FinalResult (including the transcript) from a finished session"""
+    # Construct the full transcript
+    transcript = []
 
-        @self.protocol.on_message(model=DebateResponse)
-        async def handle_debate_response(
-            ctx: Context, sender: str, msg: DebateResponse
-        ):
-            if msg.position == "pro":
-                self.pro_arguments.append(msg)
-                print(f"Pro-Hire Round {len(self.pro_arguments)}: {msg.argument}")
-
-                # Emit WebSocket event
-                if self.event_emitter:
-                    await self.event_emitter(
-                        "Pro-Hire Advocate", msg.argument, "debate", "pro"
-                    )
-            else:
-                self.anti_arguments.append(msg)
-                print(f"Anti-Hire Round {len(self.anti_arguments)}: {msg.argument}")
-
-                # Emit WebSocket event
-                if self.event_emitter:
-                    await self.event_emitter(
-                        "Anti-Hire Advocate", msg.argument, "debate", "anti"
-                    )
+    # 1. Add Intersection Agent's output
+    if session.intersection_analysis:
+        transcript.append(
+            TranscriptEntry(
+                agent_name="Intersection Evaluator",
+                position="evaluation",
+                content=session.intersection_analysis.analysis,
+                details=session.intersection_analysis.model_dump(),
+            )
+        )
 
-            await self._continue_debate(ctx)
-
-        @self.protocol.on_message(model=DecisionResponse)
-        async def handle_decision_response(
-            ctx: Context, sender: str, msg: DecisionResponse
-        ):
-            self.final_decision = msg
-            print(f"\n🎯 STEP 4: Making Final Decision")
-            print("\n" + "=" * 60)
-            print("FINAL HIRING DECISION")
-            print("=" * 60)
-            print(f"Decision: {msg.decision.upper()}")
-            print(f"Confidence: {msg.confidence:.2f}")
-            print(f"Reasoning: {msg.reasoning}")
-            print(f"Key Factors: {', '.join(msg.key_factors)}")
-            print("=" * 60)
-
-            # Emit WebSocket event
-            if self.event_emitter:
-                decision_summary = f"Decision: {msg.decision.upper()}\nConfidence: {msg.confidence:.2f}\nReasoning: {msg.reasoning}"
-                await self.event_emitter(
-                    "Decision Agent", decision_summary, "decision", "decision"
+    # 2. Add Debate arguments
+    pro_idx, anti_idx = 0, 0
+    num_pro = len(session.pro_arguments)
+    num_anti = len(session.anti_arguments)
+    while pro_idx < num_pro or anti_idx < num_anti:
+        if pro_idx < num_pro:
+            arg = session.pro_arguments[pro_idx]
+            transcript.append(
+                TranscriptEntry(
+                    agent_name="Pro-Hire Advocate",
+                    position="pro",
+                    content=arg.argument,
+                    details=arg.model_dump(),
                 )
-
-            self.decision_complete = True
-
-        self.include(self.protocol)
-
-    async def _check_and_proceed(self, ctx: Context):
-        """Check if we have both job and resume analysis, then proceed to intersection"""
-        if self.job_complete and self.resume_complete:
-            print(f"\n🔍 STEP 2: Evaluating Intersection")
-
-            # Emit step transition event
-            if self.event_emitter:
-                await self.event_emitter(
-                    "System", "Starting intersection evaluation", "intersection"
+            )
+            pro_idx += 1
+        if anti_idx < num_anti:
+            arg = session.anti_arguments[anti_idx]
+            transcript.append(
+                TranscriptEntry(
+                    agent_name="Anti-Hire Advocate",
+                    position="anti",
+                    content=arg.argument,
+                    details=arg.model_dump(),
                 )
-
-            request = IntersectionRequest(
-                job_analysis=self.job_analysis, resume_analysis=self.resume_analysis
             )
-            await ctx.send(self.intersection_address, request)
+            anti_idx += 1
+
+    # Construct and return the final comprehensive result
+    if session.final_decision:
+        return FinalResult(
+            resume_analysis=session.resume_analysis,
+            job_analysis=session.job_analysis,
+            intersection_analysis=session.intersection_analysis,
+            decision=session.final_decision,
+            transcript=transcript,
+            stage_timings=session.stage_timings,
+            stage_tokens=session.stage_tokens,
+        )
+    return None
+
+
+class HiringAgentPool:
+    """Long-lived set of hiring agents that every evaluation is sent through.
+
+    The agents are created and started once (e.g. at API server startup), so
+    no per-request ports, HTTP servers or startup sleeps are needed. The
+    coordinator keeps one session per evaluation_id, so many evaluations can
+    run through the pool at the same time.
+
+    Transports:
+        "bus": messages are passed as objects through asyncio queues
+            (LocalMessageBus), the default.
+        "uagents": messages go through the uAgents dispatcher (signed
+            schema digests and a JSON round trip per message).
+
+    Completed stages are checkpointed (by default in agent_data/checkpoints.db),
+    so evaluating again with the evaluation_id of a failed or timed out
+    evaluation continues from its last finished stage. Pass
+    checkpoint_store=False to turn this off.
+    """
+
+    # Checkpoints of evaluations that were never resumed are dropped after
+    # this, checked every CHECKPOINT_PRUNE_INTERVAL seconds
+    CHECKPOINT_MAX_AGE = 24 * 60 * 60
+    CHECKPOINT_PRUNE_INTERVAL = 60 * 60
+
+    TRANSPORTS = ("bus", "uagents")
+
+    def __init__(
+        self,
+        max_timeout: int = 120,
+        workers_per_agent: int = 16,
+        transport: str = None,
+        checkpoint_store=None,
+    ):
+        self.max_timeout = max_timeout  # seconds an evaluation may take
+        # Messages an agent handles at once (each one is usually an LLM call)
+        self.workers_per_agent = workers_per_agent
+
+        self.transport = transport or os.getenv("HIRING_AGENT_TRANSPORT", "bus")
+        if self.transport not in self.TRANSPORTS:
+            raise ValueError(
+                f"Unknown transport '{self.transport}', expected one of {self.TRANSPORTS}"
+            )
+        self.bus = None
+
+        self.checkpoint_store = checkpoint_store
+
+        # Each pool derives its own seeds so two pools in one process never
+        # share agent addresses
+        self.seed_suffix = uuid.uuid4().hex
+
+        self.job_parser = None
+        self.resume_parser = None
+        self.intersection_evaluator = None
+        self.pro_hire = None
+        self.anti_hire = None
+        self.decision_maker = None
+        self.fused_evaluator = None
+        self.coordinator = None
+
+        self.tasks = []
+        self.started = False
+
+    @property
+    def agents(self):
+        return [
+            self.job_parser,
+            self.resume_parser,
+            self.intersection_evaluator,
+            self.pro_hire,
+            self.anti_hire,
+            self.decision_maker,
+            self.fused_evaluator,
+            self.coordinator,
+        ]
+
+    def _seed(self, name: str) -> str:
+        return f"{name}_seed_{self.seed_suffix}"
+
+    async def start(self):
+        """Create all agents and start their message loops"""
+        if self.started:
+            return
+
+        print("🚀 Starting uAgents Hiring Agent Pool")
+        print("=" * 60)
+
+        self.job_parser = create_job_parser_agent(seed=self._seed("job_parser"))
+        self.resume_parser = create_resume_parser_agent(
+            seed=self._seed("resume_parser")
+        )
+        self.intersection_evaluator = create_intersection_agent(
+            seed=self._seed("intersection")
+        )
+        self.pro_hire = create_pro_hire_agent(seed=self._seed("pro_hire"))
+        self.anti_hire = create_anti_hire_agent(seed=self._seed("anti_hire"))
+        self.decision_maker = create_decision_agent(seed=self._seed("decision"))
+        self.fused_evaluator = create_fused_evaluator_agent(
+            seed=self._seed("fused_evaluator")
+        )
+        if self.checkpoint_store is None:
+            self.checkpoint_store = CheckpointStore()
+        if self.checkpoint_store:
+            self._prune_checkpoints()
+            self.tasks.append(asyncio.create_task(self._prune_checkpoints_periodically()))
+        self.coordinator = create_coordinator_agent(
+            seed=self._seed("coordinator"),
+            checkpoint_store=self.checkpoint_store or None,
+        )
 
-    async def _start_debate(self, ctx: Context):
-        """Start the debate between pro and anti hire agents"""
-        print(f"\n⚖️ STEP 3: Conducting Debate")
+        # Store addresses
+        self.coordinator.job_parser_address = self.job_parser.address
+        self.coordinator.resume_parser_address = self.resume_parser.address
+        self.coordinator.intersection_address = self.intersection_evaluator.address
+        self.coordinator.pro_hire_address = self.pro_hire.address
+        self.coordinator.anti_hire_address = self.anti_hire.address
+        self.coordinator.decision_address = self.decision_maker.address
+        self.coordinator.fused_address = self.fused_evaluator.address
+
+        if self.transport == "bus":
+            self.bus = LocalMessageBus(self.workers_per_agent)
+            for agent in self.agents:
+                self.bus.attach(agent)
+            await self.bus.start()
+        else:
+            for agent in self.agents:
+                await agent.run_startup_tasks()
+                # All agents live in this process and messages between them
+                # are delivered by the local dispatcher, so only the message
+                # loop is needed (no HTTP server or almanac registration).
+                # Several loops share the agent's queue so one slow LLM call
+                # doesn't hold up every other evaluation.
+                for _ in range(self.workers_per_agent):
+                    self.tasks.append(
+                        asyncio.create_task(agent._process_message_queue())
+                    )
 
-        # Emit step transition event
-        if self.event_emitter:
-            await self.event_emitter("System", "Starting debate phase", "debate")
+        self.started = True
 
-        # Start with pro-hire argument
-        pro_request = DebateRequest(
-            intersection_analysis=self.intersection_analysis, round_number=1
+        # Readiness handshake instead of a fixed startup sleep
+        await self.coordinator.wait_until_ready(self._coordinator_context())
+        print(
+            f"✅ Agent pool ready with {len(self.agents)} agents ({self.transport} transport)"
         )
-        await ctx.send(self.pro_hire_address, pro_request)
-
-    async def _continue_debate(self, ctx: Context):
-        """Continue the debate or end it and make decision"""
-        total_rounds = len(self.pro_arguments) + len(self.anti_arguments)
-
-        if total_rounds < 6:  # 3 rounds each = 6 total
-            # Continue debate
-            if len(self.pro_arguments) > len(self.anti_arguments):
-                # Anti-hire's turn
-                round_num = len(self.anti_arguments) + 1
-                previous_arg = self.pro_arguments[-1].argument
-
-                anti_request = DebateRequest(
-                    intersection_analysis=self.intersection_analysis,
-                    round_number=round_num,
-                    previous_argument=previous_arg,
-                )
-                await ctx.send(self.anti_hire_address, anti_request)
-            else:
-                # Pro-hire's turn
-                round_num = len(self.pro_arguments) + 1
-                previous_arg = (
-                    self.anti_arguments[-1].argument if self.anti_arguments else ""
-                )
 
-                pro_request = DebateRequest(
-                    intersection_analysis=self.intersection_analysis,
-                    round_number=round_num,
-                    previous_argument=previous_arg,
-                )
-                await ctx.send(self.pro_hire_address, pro_request)
-        else:
-            # Debate complete, make decision
-            print(f"\n🎯 STEP 4: Making Final Decision")
+    def _prune_checkpoints(self):
+        pruned = self.checkpoint_store.prune(self.CHECKPOINT_MAX_AGE)
+        if pruned:
+            print(f"🧹 Dropped {pruned} stale stage checkpoints")
+
+    async def _prune_checkpoints_periodically(self):
+        """Keep dropping stale checkpoints while the pool runs"""
+        while True:
+            await asyncio.sleep(self.CHECKPOINT_PRUNE_INTERVAL)
+            try:
+                self._prune_checkpoints()
+            except Exception as e:
+                print(f"⚠️ Could not prune checkpoints: {e}")
+
+    def _coordinator_context(self):
+        """Context the coordinator sends its requests with"""
+        if self.bus is not None:
+            return self.bus.context_for(self.coordinator)
+        return self.coordinator._build_context()
+
+    async def stop(self):
+        """Stop the message loops and unregister the agents"""
+        if not self.started:
+            return
+
+        print("🧹 Stopping agent pool...")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        if self.bus is not None:
+            await self.bus.stop()
+            self.bus = None
+
+        for agent in self.agents:
+            dispatcher.unregister(agent.address, agent)
+
+        # Close the keep-alive connections to the LLM API
+        await close_http_session()
+
+        self.started = False
+        print("✅ Agent pool stopped")
+
+    async def evaluate(
+        self,
+        resume_content: str,
+        job_description: str,
+        candidate_name: str,
+        job_title: str,
+        event_emitter=None,
+        evaluation_id: str = None,
+        options: EvaluationOptions = None,
+    ):
+        """Run one candidate through the pool and return the FinalResult"""
+        if not self.started:
+            await self.start()
+
+        evaluation_id = evaluation_id or uuid.uuid4().hex
+        coordinator = self.coordinator
 
-            # Emit step transition event
-            if self.event_emitter:
-                await self.event_emitter(
-                    "System", "Making final hiring decision", "decision"
-                )
+        try:
+            session = await coordinator.start_evaluation(
+                self._coordinator_context(),
+                evaluation_id,
+                resume_content,
+                job_description,
+                candidate_name,
+                job_title,
+                event_emitter,
+                options,
+            )
+        except ValueError as e:
+            # e.g. an evaluation with this ID is already running; it is left alone
+            print(f"❌ Could not start evaluation {evaluation_id}: {e}")
+            if event_emitter:
+                await event_emitter("System", f"Error: {str(e)}", "error")
+            return None
 
-            decision_request = DecisionRequest(
-                pro_arguments=self.pro_arguments,
-                anti_arguments=self.anti_arguments,
-                intersection_analysis=self.intersection_analysis,
+        # max_timeout covers a debate of the default length; a longer one
+        # gets the time of its extra rounds on top
+        timeout = self.max_timeout
+        if session.options.mode != "fused":
+            timeout += max(
+                0, debate_timeout(session.options) - debate_timeout(EvaluationOptions())
             )
-            await ctx.send(self.decision_address, decision_request)
+
+        try:
+            # Wait for decision to complete with timeout
+            print(f"⏳ Waiting for hiring process {evaluation_id} to complete...")
+            try:
+                await asyncio.wait_for(asyncio.shield(session.done), timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Hiring process {evaluation_id} timed out")
+                if event_emitter:
+                    await event_emitter("System", "Process timed out", "error")
+                return None
+
+            print(f"✅ Hiring process {evaluation_id} finished.")
+            return _build_final_result(session)
+
+        except Exception as e:
+            print(f"❌ Error in hiring system: {e}")
+            if event_emitter:
+                await event_emitter("System", f"Error: {str(e)}", "error")
+            return None
+
+        finally:
+            # Late responses for this evaluation are ignored from now on
+            coordinator.end_evaluation(evaluation_id)
 
 
 # Main execution function
@@ -287,146 +355,38 @@ async def run_hiring_system(
     candidate_name: str,
     job_title: str,
     event_emitter=None,
+    pool: HiringAgentPool = None,
+    evaluation_id: str = None,
+    options: EvaluationOptions = None,
 ):
-    """Run the complete hiring system with uAgents"""
-    print("🚀 Starting uAgents Hiring System")
-    print("=" * 60)
-
-    # Use dynamic ports to avoid conflicts
-    import random
-
-    base_port = random.randint(9000, 9500)
-
-    # Create all agents with dynamic ports
-    job_parser = create_job_parser_agent(base_port + 1)
-    resume_parser = create_resume_parser_agent(base_port + 2)
-    intersection_evaluator = create_intersection_agent(base_port + 3)
-    pro_hire = create_pro_hire_agent(base_port + 4)
-    anti_hire = create_anti_hire_agent(base_port + 5)
-    decision_maker = create_decision_agent(base_port + 6)
-    coordinator = HiringCoordinator(event_emitter, base_port + 7)
-
-    # Start all agents in background tasks
-    tasks = []
-    try:
-        job_parser_task = asyncio.create_task(job_parser.run_async())
-        tasks.append(job_parser_task)
-        resume_parser_task = asyncio.create_task(resume_parser.run_async())
-        tasks.append(resume_parser_task)
-        intersection_task = asyncio.create_task(intersection_evaluator.run_async())
-        tasks.append(intersection_task)
-        pro_hire_task = asyncio.create_task(pro_hire.run_async())
-        tasks.append(pro_hire_task)
-        anti_hire_task = asyncio.create_task(anti_hire.run_async())
-        tasks.append(anti_hire_task)
-        decision_task = asyncio.create_task(decision_maker.run_async())
-        tasks.append(decision_task)
-        coordinator_task = asyncio.create_task(coordinator.run_async())
-        tasks.append(coordinator_task)
-
-        # Wait for initialization
-        print("⏳ Waiting for agents to initialize...")
-        await asyncio.sleep(5)
-
-        # Store addresses
-        coordinator.job_parser_address = job_parser.address
-        coordinator.resume_parser_address = resume_parser.address
-        coordinator.intersection_address = intersection_evaluator.address
-        coordinator.pro_hire_address = pro_hire.address
-        coordinator.anti_hire_address = anti_hire.address
-        coordinator.decision_address = decision_maker.address
-
-        # Store initial data
-        coordinator.resume_content = resume_content
-        coordinator.job_description = job_description
-        coordinator.candidate_name = candidate_name
-        coordinator.job_title = job_title
-
-        # Wait for decision to complete with timeout
-        print("⏳ Waiting for hiring process to complete...")
-        timeout_counter = 0
-        max_timeout = 120  # 2 minutes max
-
-        while not coordinator.decision_complete and timeout_counter < max_timeout:
-            await asyncio.sleep(1)
-            timeout_counter += 1
-
-        if timeout_counter >= max_timeout:
-            print("⚠️ Hiring process timed out")
-            if event_emitter:
-                await event_emitter("System", "Process timed out", "error")
-            return None
-
-        print("✅ Hiring process finished.")
-
-        # Construct the full transcript
-        transcript = []
-
-        # 1. Add Intersection Agent's output
-        if coordinator.intersection_analysis:
-            transcript.append(
-                TranscriptEntry(
-                    agent_name="Intersection Evaluator",
-                    position="evaluation",
-                    content=coordinator.intersection_analysis.analysis,
-                    details=coordinator.intersection_analysis.model_dump(),
-                )
-            )
-
-        # 2. Add Debate arguments
-        pro_idx, anti_idx = 0, 0
-        num_pro = len(coordinator.pro_arguments)
-        num_anti = len(coordinator.anti_arguments)
-        while pro_idx < num_pro or anti_idx < num_anti:
-            if pro_idx < num_pro:
-                arg = coordinator.pro_arguments[pro_idx]
-                transcript.append(
-                    TranscriptEntry(
-                        agent_name="Pro-Hire Advocate",
-                        position="pro",
-                        content=arg.argument,
-                        details=arg.model_dump(),
-                    )
-                )
-                pro_idx += 1
-            if anti_idx < num_anti:
-                arg = coordinator.anti_arguments[anti_idx]
-                transcript.append(
-                    TranscriptEntry(
-                        agent_name="Anti-Hire Advocate",
-                        position="anti",
-                        content=arg.argument,
-                        details=arg.model_dump(),
-                    )
-                )
-                anti_idx += 1
-
-        # Construct and return the final comprehensive result
-        if coordinator.final_decision:
-            return FinalResult(
-                resume_analysis=coordinator.resume_analysis,
-                job_analysis=coordinator.job_analysis,
-                intersection_analysis=coordinator.intersection_analysis,
-                decision=coordinator.final_decision,
-                transcript=transcript,
-            )
-        return None
-
-    except Exception as e:
-        print(f"❌ Error in hiring system: {e}")
-        if event_emitter:
-            await event_emitter("System", f"Error: {str(e)}", "error")
-        return None
+    """Run the complete hiring system with uAgents.
+
+    Evaluations are sent through ``pool`` when given (the API server keeps one
+    running for its whole lifetime); otherwise a temporary pool is started and
+    stopped around this single evaluation.
+    """
+    if pool is not None:
+        return await pool.evaluate(
+            resume_content,
+            job_description,
+            candidate_name,
+            job_title,
+            event_emitter,
+            evaluation_id,
+            options,
+        )
 
+    pool = HiringAgentPool()
+    await pool.start()
+    try:
+        return await pool.evaluate(
+            resume_content,
+            job_description,
+            candidate_name,
+            job_title,
+            event_emitter,
+            evaluation_id,
+            options,
+        )
     finally:
-        # Minimal cleanup that won't interfere with server
-        print("🧹 Cleaning up agents...")
-
-        # Don't actually wait for or cancel anything - just let them finish naturally
-        # This prevents any CancelledError from propagating to the server
-        try:
-            print(f"✅ Leaving {len(tasks)} agent tasks to finish naturally")
-        except:
-            pass
-
-        print("✅ Agent cleanup completed (non-blocking)")
+        await pool.stop()
@@ -1,58 +1,112 @@
 
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
 from uagents import Model
 
 
+class StageError(BaseModel):
+    """Why an agent could not produce a result for its stage.
+
+    Set on a response instead of filling it with made-up defaults, so the
+    coordinator can retry or stop at the failing stage.
+    """
+
+    kind: Literal["api_error", "parse_error", "processing_error"]
+    message: str
+    retryable: bool = False  # True if the same request may succeed when resent
+
+
+class TokenUsage(BaseModel):
+    """Tokens an agent's LLM call used (zero when answered from the cache)"""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0  # input tokens served from Gemini's context cache
+
+
 # Job-related models
 class JobParseRequest(BaseModel):
     job_description: str
     job_title: str
+    evaluation_id: str = ""  # correlates all messages of one evaluation
+    attempt: int = 0  # resends after an error; retries skip the response cache
 
 
+# Field descriptions (and enums) of the response models are sent to Gemini
+# as the response schema (see helper_func.response_schema), so they double
+# as instructions to the LLM
 class JobParseResponse(BaseModel):
     job_title: str
-    required_skills: List[str]
-    preferred_skills: List[str]
-    experience_level: str
-    key_requirements: List[str]
-    analysis: str
+    required_skills: List[str] = Field(description="Must-have technical skills")
+    preferred_skills: List[str] = Field(description="Nice-to-have skills")
+    experience_level: str = Field(json_schema_extra={"enum": ["Junior", "Mid-level", "Senior"]})
+    key_requirements: List[str] = Field(
+        description="Key requirements and responsibilities"
+    )
+    analysis: str = Field(description="Brief analysis of the job requirements")
+    evaluation_id: str = ""
+    error: Optional[StageError] = None
+    usage: Optional[TokenUsage] = None
 
 
 # Resume-related models
 class ResumeParseRequest(BaseModel):
     resume_content: str
     candidate_name: str
+    evaluation_id: str = ""
+    attempt: int = 0
 
 
 class ResumeParseResponse(BaseModel):
     candidate_name: str
-    skills: List[str]
-    experience_years: int
-    experience_level: str
-    key_achievements: List[str]
-    analysis: str
+    skills: List[str] = Field(
+        description="Technical skills (programming languages, frameworks, tools)"
+    )
+    experience_years: int = Field(description="Years of professional experience")
+    experience_level: str = Field(json_schema_extra={"enum": ["Junior", "Mid-level", "Senior"]})
+    key_achievements: List[str] = Field(
+        description="Key achievements and accomplishments"
+    )
+    analysis: str = Field(description="Brief analysis of the candidate's profile")
+    evaluation_id: str = ""
+    error: Optional[StageError] = None
+    usage: Optional[TokenUsage] = None
 
 
 # Intersection evaluation models
 class IntersectionRequest(BaseModel):
     job_analysis: JobParseResponse
     resume_analysis: ResumeParseResponse
+    evaluation_id: str = ""
+    attempt: int = 0
+    stream: bool = False  # send StreamDelta messages while writing the analysis
 
 
 class IntersectionResponse(BaseModel):
-    analysis: str
-    overall_compatibility: float
-    skill_matches: List[str]
-    skill_gaps: List[str]
-    experience_match: str
+    analysis: str = Field(description="Detailed analysis of how the candidate fits the job")
+    overall_compatibility: float = Field(
+        description="Overall compatibility score from 0.0 to 1.0"
+    )
+    skill_matches: List[str] = Field(description="Job skills the candidate has")
+    skill_gaps: List[str] = Field(description="Job skills the candidate lacks")
+    experience_match: str = Field(
+        json_schema_extra={"enum": ["excellent", "good", "fair", "poor"]}
+    )
+    evaluation_id: str = ""
+    error: Optional[StageError] = None
+    usage: Optional[TokenUsage] = None
 
 
 # Debate models - Use uagents.Model for inter-agent communication
 class DebateRequest(BaseModel):
+    job_analysis: JobParseResponse
+    resume_analysis: ResumeParseResponse
     intersection_analysis: IntersectionResponse
     round_number: int
     previous_argument: str = ""
+    evaluation_id: str = ""
+    attempt: int = 0
+    stream: bool = False  # send StreamDelta messages while writing the argument
 
     class Config:
         arbitrary_types_allowed = True
@@ -60,9 +114,13 @@ class DebateRequest(BaseModel):
 
 class DebateResponse(BaseModel):
     position: str  # "pro" or "anti"
-    argument: str
-    confidence: float
-    key_points: List[str]
+    argument: str = Field(description="Your argument for this round")
+    confidence: float = Field(description="Confidence in your position from 0.0 to 1.0")
+    key_points: List[str] = Field(description="The key points of your argument")
+    round_number: int = 0
+    evaluation_id: str = ""
+    error: Optional[StageError] = None
+    usage: Optional[TokenUsage] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -72,24 +130,111 @@ class DebateResponse(BaseModel):
 class DecisionRequest(BaseModel):
     pro_arguments: List[DebateResponse]
     anti_arguments: List[DebateResponse]
+    job_analysis: JobParseResponse
+    resume_analysis: ResumeParseResponse
     intersection_analysis: IntersectionResponse
     candidate_name: Optional[str] = None
     job_title: Optional[str] = None
+    evaluation_id: str = ""
+    attempt: int = 0
 
 
 class Reasoning(BaseModel):
     """Structured reasoning for the hiring decision."""
 
-    summary: str
-    pros: List[str]
-    cons: List[str]
+    summary: str = Field(
+        description="A detailed, 2-3 sentence summary explaining the final verdict and its context"
+    )
+    pros: List[str] = Field(
+        description="All key strengths and pro-hire arguments (at least 2-3 points)"
+    )
+    cons: List[str] = Field(
+        description="All key weaknesses and anti-hire arguments (at least 2-3 points)"
+    )
 
 
 class DecisionResponse(BaseModel):
-    decision: str  # "hire" or "no_hire"
-    confidence: float
+    decision: str = Field(json_schema_extra={"enum": ["hire", "no_hire"]})
+    confidence: float = Field(description="Confidence in the decision from 0.0 to 1.0")
     reasoning: Reasoning
-    key_factors: List[str]
+    key_factors: List[str] = Field(
+        description="The most important factors that drove the decision"
+    )
+    evaluation_id: str = ""
+    error: Optional[StageError] = None
+    usage: Optional[TokenUsage] = None
+
+
+# Fused evaluation models: one LLM call answers for the job and resume
+# parsers, the intersection and the decision (EvaluationOptions.mode="fused")
+class FusedEvaluationRequest(BaseModel):
+    job_description: str
+    job_title: str
+    resume_content: str
+    candidate_name: str
+    evaluation_id: str = ""
+    attempt: int = 0
+
+
+class FusedEvaluationResponse(BaseModel):
+    job_analysis: JobParseResponse
+    resume_analysis: ResumeParseResponse
+    intersection_analysis: IntersectionResponse
+    decision: DecisionResponse
+    evaluation_id: str = ""
+    error: Optional[StageError] = None
+    usage: Optional[TokenUsage] = None
+
+
+class StreamDelta(BaseModel):
+    """New text of an answer an agent is still writing."""
+
+    position: str  # 'evaluation', 'pro' or 'anti', as in TranscriptEntry
+    field: str  # JSON field being written, e.g. "argument"
+    text: str
+    round_number: int = 0
+    evaluation_id: str = ""
+    reset: bool = False  # the text sent so far is void: the answer is being retried
+
+
+class EvaluationOptions(BaseModel):
+    """Per-evaluation settings for how the pipeline runs."""
+
+    # "full": parse, evaluate, debate and decide, one LLM call per step.
+    # "fused": a single LLM call returns the parsed job and resume, the
+    # intersection and the decision, with no debate (for bulk screening).
+    mode: Literal["full", "fused"] = "full"
+
+    # "sequential": pro and anti take turns, each answering the other's
+    # latest argument. "parallel": both argue round N at the same time, each
+    # answering the other side's round N-1 argument.
+    debate_mode: Literal["sequential", "parallel"] = "sequential"
+    # The debate stops early (see DebateConvergenceDetector) once both sides
+    # converge or one concedes, but never before min_debate_rounds
+    min_debate_rounds: int = Field(1, ge=1)
+    max_debate_rounds: int = Field(3, ge=1, le=10)
+    # Triage on the intersection's overall_compatibility: candidates below
+    # triage_reject_below or above triage_accept_above skip the debate (None
+    # disables that side). triage_decision picks who decides for them: the
+    # decision agent ("llm") or a rule based on the score ("deterministic").
+    triage_reject_below: Optional[float] = Field(0.25, ge=0.0, le=1.0)
+    triage_accept_above: Optional[float] = Field(0.9, ge=0.0, le=1.0)
+    triage_decision: Literal["llm", "deterministic"] = "llm"
+    # Stream the intersection analysis and debate arguments to the progress
+    # events while they are written
+    stream_output: bool = True
+
+
+# Readiness handshake models
+class ReadinessCheck(BaseModel):
+    """Sent by the coordinator to check that an agent is handling messages."""
+
+    nonce: str
+
+
+class ReadinessAck(BaseModel):
+    agent_name: str
+    nonce: str
 
 
 class TranscriptEntry(BaseModel):
@@ -109,3 +254,5 @@ class FinalResult(BaseModel):
     intersection_analysis: IntersectionResponse
     decision: DecisionResponse
     transcript: List[TranscriptEntry]
+    stage_timings: Optional[Dict[str, float]] = None  # seconds per pipeline stage
+    stage_tokens: Optional[Dict[str, TokenUsage]] = None  # LLM tokens per pipeline stage
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from helper_func import llm_client
+from helper_func.concurrency import AdaptiveConcurrencyLimiter
+from helper_func.hedging import HedgePolicy
+from helper_func.key_pool import APIKeyPool
+from helper_func.rate_limiter import RateLimiter
+
+ANSWER = {"success": True, "content": "{}", "tokens": 10}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Fresh limits, with hedges sent after 0.05s for stage "parse" """
+    limiter = AdaptiveConcurrencyLimiter()
+    policy = HedgePolicy(budget=1.0, min_samples=1)
+    policy.record(0.05, "parse")
+    monkeypatch.setattr(llm_client, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(llm_client, "concurrency_limiter", limiter)
+    monkeypatch.setattr(llm_client, "hedge_policy", policy)
+    monkeypatch.setattr(llm_client, "key_pool", APIKeyPool(["key"]))
+    monkeypatch.setattr(llm_client, "rate_limiter", RateLimiter())
+    return limiter
+
+
+def _agent(monkeypatch, delays):
+    """Agent whose API calls answer after the given delays, in order"""
+    delays = list(delays)
+
+    async def post(self, url, headers, payload, api_key, on_delta=None):
+        await asyncio.sleep(delays.pop(0))
+        return dict(ANSWER), None
+
+    monkeypatch.setattr(llm_client.SimpleLLMAgent, "_post", post)
+    return llm_client.SimpleLLMAgent("test")
+
+
+async def _hedged_call(agent):
+    outcome = await agent._post_hedged("url", {}, {}, 100, "key", latency_key="parse")
+    await asyncio.sleep(0.01)  # let the cancelled copy clean up
+    return outcome
+
+
+def test_cancelled_hedge_gives_back_its_slot_without_a_latency_sample(monkeypatch, limiter):
+    # The primary answers while the hedge is still waiting
+    agent = _agent(monkeypatch, [0.1, 1.0])
+
+    result, _ = asyncio.run(_hedged_call(agent))
+
+    assert result["success"]
+    assert llm_client.hedge_policy.hedges == 1
+    assert limiter.in_flight == 0
+    assert limiter.snapshot()["latency"] == {}
+
+
+def test_completed_hedge_records_its_latency(monkeypatch, limiter):
+    # The hedge answers first
+    agent = _agent(monkeypatch, [1.0, 0.01])
+
+    result, _ = asyncio.run(_hedged_call(agent))
+
+    assert result["success"]
+    assert llm_client.hedge_policy.hedge_wins == 1
+    assert limiter.in_flight == 0
+    assert list(limiter.snapshot()["latency"]) == ["parse"]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from hiring_agents import coordinator_agent
+from hiring_agents.coordinator_agent import (
+    EvaluationSession,
+    save_triage_decision,
+    triage_decision,
+)
+from models.models import IntersectionResponse
+
+
+def _session(score: float) -> EvaluationSession:
+    session = EvaluationSession("eval-1", "resume", "job", "Ann", "Engineer")
+    session.intersection_analysis = IntersectionResponse(
+        analysis="Fit",
+        overall_compatibility=score,
+        skill_matches=["Python"],
+        skill_gaps=["Go"],
+        experience_match="good",
+    )
+    return session
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    calls = []
+
+    async def record(*args):
+        calls.append(args)
+
+    monkeypatch.setattr(coordinator_agent, "save_top_candidate", record)
+    return calls
+
+
+async def _triage(score: float, verdict: str):
+    """Decide at triage (sessions need a running loop) and save the result"""
+    session = _session(score)
+    decision = triage_decision(session, verdict)
+    await save_triage_decision(None, "coordinator", session, decision)
+    return decision
+
+
+@pytest.mark.parametrize("score", [0.0, 0.1, 0.15, 0.2])
+def test_triage_reject_is_never_saved(saved, score):
+    decision = asyncio.run(_triage(score, "reject"))
+
+    assert decision.decision == "no_hire"
+    assert decision.confidence * 100 >= 80
+    assert saved == []
+
+
+def test_confident_triage_accept_is_saved(saved):
+    decision = asyncio.run(_triage(0.95, "accept"))
+
+    assert len(saved) == 1
+    assert saved[0][5] is decision
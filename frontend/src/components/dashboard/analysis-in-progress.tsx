@@ -9,6 +9,7 @@ interface AgentEvent {
   message: string
   step: string
   position: string
+  evaluation_id: string
   timestamp: number
 }
 
@@ -40,9 +41,26 @@ export function AnalysisInProgress() {
 
       ws.onmessage = (event) => {
         const data = JSON.parse(event.data) as AgentEvent
-        console.log('📨 Received event:', data)
 
-        setEvents(prev => [...prev, data])
+        // Streamed text ("agent_delta") grows the agent's in-progress entry
+        // for that evaluation, which its final "agent_message" then replaces;
+        // "agent_reset" clears it when the answer is retried
+        setEvents(prev => {
+          const index = prev.findLastIndex(
+            e => e.type === "agent_delta"
+              && e.evaluation_id === data.evaluation_id
+              && e.agent_name === data.agent_name
+          )
+          if (index === -1) return data.type === "agent_reset" ? prev : [...prev, data]
+          const merged = data.type === "agent_delta"
+            ? { ...prev[index], message: prev[index].message + data.message }
+            : data.type === "agent_reset"
+              ? { ...prev[index], message: "" }
+              : data
+          return [...prev.slice(0, index), merged, ...prev.slice(index + 1)]
+        })
+        if (data.type === "agent_delta" || data.type === "agent_reset") return
+        console.log('📨 Received event:', data)
 
         // Update current step based on the event
         if (data.step === "initialization") setCurrentStep("Initializing agents...")